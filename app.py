@@ -21,8 +21,112 @@ def get_args():
     parser.add_argument("--width", help='cap width', type=int, default=960)
     parser.add_argument("--height", help='cap height', type=int, default=540)
 
+    parser.add_argument("--max_num_hands", help='Hands to detect', type=int, default=2)
+    parser.add_argument('--roi',
+                        help='Detect hands on a crop around the previous hands',
+                        action='store_true')
+    parser.add_argument("--roi_padding",
+                        help='Margin around the hands, relative to their size.',
+                        type=float,
+                        default=0.5)
+    parser.add_argument("--roi_size",
+                        help='Longest side of the crop given to MediaPipe.',
+                        type=int,
+                        default=256)
+    parser.add_argument("--roi_refresh",
+                        help='Frames between full-frame detections while fewer than --max_num_hands are tracked.',
+                        type=int,
+                        default=10)
+
+    parser.add_argument("--landmark_filter",
+                        help='Smooth the landmarks with a One-Euro filter.',
+                        action='store_true')
+    parser.add_argument("--filter_min_cutoff",
+                        help='Filter cutoff at rest in Hz, lower is smoother.',
+                        type=float,
+                        default=1.0)
+    parser.add_argument("--filter_beta",
+                        help='How fast the filter cutoff rises with speed, higher lags less.',
+                        type=float,
+                        default=10.0)
+    parser.add_argument("--frame_skip",
+                        help='Most frames in a row predicted instead of detected, 0 to detect every frame. Implies --landmark_filter.',
+                        type=int,
+                        default=0)
+    parser.add_argument("--skip_tolerance",
+                        help='Prediction error, as a share of the frame, up to which more frames are skipped.',
+                        type=float,
+                        default=0.01)
+
+    parser.add_argument("--event_queue",
+                        help='Gesture events queued before some are dropped.',
+                        type=int,
+                        default=256)
+    parser.add_argument("--console_rate",
+                        help='Most terminal redraws per second.',
+                        type=float,
+                        default=10.0)
+
+    parser.add_argument("--rotation_speed",
+                        help='Volume change while rotating, percent per second.',
+                        type=float,
+                        default=30.0)
+    parser.add_argument("--volume_rate",
+                        help='Most volume commands per second, 0 for no limit.',
+                        type=float,
+                        default=20.0)
+    parser.add_argument("--volume_slew",
+                        help='Glide to a new volume at this many percent per second, 0 to jump.',
+                        type=float,
+                        default=0.0)
+    parser.add_argument("--volume_curve",
+                        help='Transfer curve from gesture to volume.',
+                        choices=["linear", "rectifier"],
+                        default="linear")
+    parser.add_argument("--remember_paused",
+                        help='Save the players paused by a gesture on exit and resume them after a restart, optionally to this file.',
+                        nargs="?",
+                        const="",
+                        default=None)
+
+    parser.add_argument("--metrics_port",
+                        help='Serve Prometheus metrics on this local port, 0 for off.',
+                        type=int,
+                        default=0)
+    parser.add_argument("--metrics_log",
+                        help='Print metrics as a JSON line every this many seconds, 0 for off.',
+                        type=float,
+                        default=0.0)
+    parser.add_argument("--flamegraph_seconds",
+                        help='How long SIGUSR1 samples stacks for.',
+                        type=float,
+                        default=10.0)
+
+    parser.add_argument("--shm_name",
+                        help='Publish landmarks to this shared memory block.',
+                        default=None)
+    parser.add_argument("--shm_slots",
+                        help='Frames kept in the shared memory ring.',
+                        type=int,
+                        default=64)
+
+    parser.add_argument("--collect",
+                        help='Append labeled samples to this file, see pygac.collect.',
+                        default=None)
+    parser.add_argument("--collect_label",
+                        help='Label for collected samples, keys 0-9 change it with --display.',
+                        type=int,
+                        default=-1)
+    parser.add_argument("--collect_mode",
+                        help='Which features to collect, keys k and h switch with --display.',
+                        choices=["keypoint", "point_history"],
+                        default="keypoint")
+
     parser.add_argument('--use_static_image_mode', action='store_true')
     parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--display',
+                        help='Show the camera with the landmarks drawn',
+                        action='store_true')
     parser.add_argument("--min_detection_confidence",
                         help='min_detection_confidence',
                         type=float,
@@ -41,6 +145,81 @@ def get_args():
                         default=0.5)
     parser.add_argument("--driver", help="Sound card", type=str, default=None)
 
+    parser.add_argument("--max_fps",
+                        help='Frame rate cap while hands are visible, 0 for none.',
+                        type=float,
+                        default=30)
+    parser.add_argument("--idle_fps",
+                        help='Frame rate while no hands are visible, 0 to never idle.',
+                        type=float,
+                        default=5)
+    parser.add_argument("--idle_after",
+                        help='Seconds without hands before going idle.',
+                        type=float,
+                        default=2.0)
+    parser.add_argument("--idle_scale",
+                        help='Frame scale used for hand detection while idle.',
+                        type=float,
+                        default=0.5)
+
+    parser.add_argument("--vote",
+                        help='How finger gestures are smoothed over frames.',
+                        choices=["count", "confidence", "decay"],
+                        default="count")
+    parser.add_argument("--vote_decay",
+                        help='Per-frame decay of votes with --vote decay.',
+                        type=float,
+                        default=0.85)
+    parser.add_argument("--vote_enter",
+                        help='Share of votes a gesture needs to take over.',
+                        type=float,
+                        default=0.0)
+    parser.add_argument("--vote_exit",
+                        help='Share of votes below which a gesture can be replaced.',
+                        type=float,
+                        default=1.0)
+
+    parser.add_argument("--tflite_backend",
+                        help='TFLite interpreter package to use.',
+                        choices=["auto", "tflite_runtime", "ai_edge_litert", "tensorflow", "numpy"],
+                        default="auto")
+    parser.add_argument("--num_threads",
+                        help='Threads per TFLite interpreter.',
+                        type=int,
+                        default=1)
+    parser.add_argument('--no_xnnpack',
+                        help='Do not apply the XNNPACK delegate',
+                        action='store_true')
+    parser.add_argument("--model_variant",
+                        help='Classifier variant written by pygac.model.quantize.',
+                        choices=["float", "dynamic", "int8", "float16"],
+                        default="float")
+
+    parser.add_argument("--profile_startup", "--profile-startup",
+                        help='Print time to first processed frame per subsystem',
+                        action='store_true')
+
+    parser.add_argument("--replay",
+                        help='Video file or .npz landmark stream to use instead of the camera.',
+                        type=str,
+                        default=None)
+    parser.add_argument("--replay_fps",
+                        help='Frame rate of .npz landmark streams, videos use their own.',
+                        type=float,
+                        default=30.0)
+    parser.add_argument("--record_landmarks",
+                        help='Save the detected landmarks to this .npz stream.',
+                        type=str,
+                        default=None)
+
+    parser.add_argument('--pipeline',
+                        help='Run capture, inference and actuation on separate threads',
+                        action='store_true')
+    parser.add_argument("--capture_depth",
+                        help='Frames buffered between capture and inference.',
+                        type=int,
+                        default=2)
+
     args = parser.parse_args()
 
     return args
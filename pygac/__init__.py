@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from .pygac import GestureControl
+import time
+
+import_started = time.perf_counter()  # For --profile-startup
 
 __version__ = "1.0.1"
 __maintainer__ = "Irreq"
+
+
+def __getattr__(name):
+    # OpenCV, NumPy and friends are only imported once actually needed
+    if name == "GestureControl":
+        from .pygac import GestureControl
+        return GestureControl
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
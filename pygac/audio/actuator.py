@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rate-limited volume actuator.
+
+Gestures produce a target volume on every frame, the sound server only
+needs a handful of updates per second. Targets are coalesced and sent
+at most `max_rate` times per second, optionally slewing towards the
+target at a fixed speed and mapped through a transfer curve.
+"""
+
+import time
+import threading
+
+from ..utils import continuous_rectifier
+from . import pulse
+
+LINEAR = "linear"
+RECTIFIER = "rectifier"  # utils.continuous_rectifier, soft near 0 and 100
+
+CURVES = (LINEAR, RECTIFIER)
+
+SLEW_INTERVAL = 0.02  # Seconds between slew steps without a rate limit
+
+
+def transfer(percentage, curve=LINEAR):
+    """Volume to send for a gesture level, both 0 - 100"""
+    if curve == LINEAR:
+        return percentage
+    low = continuous_rectifier(0, 0, 100)
+    high = continuous_rectifier(0, 100, 100)
+    return (continuous_rectifier(0, percentage, 100) - low) / (high - low) * 100
+
+
+class VolumeActuator(object):
+    """Applies the latest target volume from a background thread
+
+    ARGUMENTS:
+        - connection        pulse.SoundServerConnection() Where to send.
+        - sink              str() Sink to change.
+        - max_rate          float() Most volume commands per second, 0 for
+                            no limit. Slewing still steps every
+                            SLEW_INTERVAL at most.
+        - slew              float() Percent per second to move towards the
+                            target, 0 to jump straight to it.
+        - curve             str() One of CURVES.
+        - metrics           metrics.Metrics() Optional, added to the
+                            recorders of `connection`, which time each
+                            command where it is written.
+    """
+
+    def __init__(self, connection, sink=pulse.DEFAULT_SINK, max_rate=20.0,
+                 slew=0.0, curve=LINEAR, metrics=None):
+        if curve not in CURVES:
+            raise ValueError("Unknown volume curve: %s" % curve)
+
+        self.connection = connection
+        self.sink = sink
+        self.period = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.slew = slew
+        self.curve = curve
+        self.metrics = metrics
+        if metrics is not None and metrics not in connection.recorders:
+            connection.recorders.append(metrics)
+
+        self.target = None
+        self.timestamp = None  # Frame of a target not sent yet
+        self.level = None  # Last level sent, before the curve
+        self.targets = 0
+        self.sent = 0
+        self.closed = False
+
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="pygac-volume",
+                                        daemon=True)
+        self._thread.start()
+
+    def set_target(self, percentage, timestamp=None):
+        """Request a volume, returns immediately
+
+        `timestamp` is the time.perf_counter() of the frame the target
+        comes from, handed to the connection with the first command
+        moving towards it.
+        """
+        with self._condition:
+            self.target = max(0.0, min(100.0, float(percentage)))
+            self.timestamp = timestamp
+            self.targets += 1
+            self._condition.notify()
+
+    def _next_level(self, elapsed):
+        if self.slew <= 0 or self.level is None or self.closed:
+            return self.target
+        # Long pauses do not turn into a jump, at most one period of travel
+        step = self.slew * min(elapsed, max(self.period, 0.05))
+        if abs(self.target - self.level) <= step:
+            return self.target
+        return self.level + step if self.target > self.level else self.level - step
+
+    def _run(self):
+        last = 0.0
+        while True:
+            with self._condition:
+                while not self.closed and self.target in (None, self.level):
+                    self._condition.wait()
+                if self.target in (None, self.level):
+                    return  # Closed with nothing left to send
+
+                period = self.period
+                if self.slew > 0 and self.level is not None:
+                    period = max(period, SLEW_INTERVAL)  # Do not spin while gliding
+                delay = last + period - time.monotonic()
+                if delay > 0 and not self.closed:
+                    self._condition.wait(delay)  # Later targets coalesce
+                    continue
+
+                now = time.monotonic()
+                self.level = self._next_level(now - last)
+                percentage = int(round(transfer(self.level, self.curve)))
+                timestamp, self.timestamp = self.timestamp, None
+
+            self.connection.set_volume(percentage, sink=self.sink, timestamp=timestamp)
+            self.sent += 1
+            last = now
+
+    def close(self, timeout=1.0):
+        """Send the final target right away and stop the thread"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def report(self):
+        return {"targets": self.targets, "sent": self.sent,
+                "coalesced": max(0, self.targets - self.sent)}
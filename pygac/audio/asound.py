@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ALSA soundcard discovery without amixer.
+
+Cards are listed from `/proc/asound/cards`, their mixer controls are
+read straight from the control device (`/dev/snd/controlC<n>`) with the
+same ioctl alsa-lib uses. Both are cached per card, so a rescan only
+rereads one small file and queries cards that are new. A background
+thread rescans when `/dev/snd` changes (inotify), or every few seconds
+where inotify is not available, so USB cards plugged in later show up.
+
+Point `root` at a directory laid out like `/proc/asound` and pass your
+own `read_controls` to run discovery against fixtures.
+"""
+
+import os
+import re
+import ctypes
+import ctypes.util
+import select
+import threading
+
+from collections import namedtuple
+
+PROC_ROOT = "/proc/asound"
+DEV_ROOT = "/dev/snd"
+
+Soundcard = namedtuple("Soundcard", ["number", "id", "name", "controls"])
+
+# " 0 [PCH            ]: HDA-Intel - HDA Intel PCH"
+CARD_PATTERN = re.compile(r"^\s*(\d+)\s+\[(\S+)\s*\]:\s*(.*?)\s*$")
+
+
+class _ElemId(ctypes.Structure):
+    """struct snd_ctl_elem_id"""
+    _fields_ = [
+        ("numid", ctypes.c_uint),
+        ("iface", ctypes.c_int),
+        ("device", ctypes.c_uint),
+        ("subdevice", ctypes.c_uint),
+        ("name", ctypes.c_char * 44),
+        ("index", ctypes.c_uint),
+    ]
+
+
+class _ElemList(ctypes.Structure):
+    """struct snd_ctl_elem_list"""
+    _fields_ = [
+        ("offset", ctypes.c_uint),  # First element to get
+        ("space", ctypes.c_uint),  # Room in `pids`
+        ("used", ctypes.c_uint),  # Elements written to `pids`
+        ("count", ctypes.c_uint),  # Elements the card has
+        ("pids", ctypes.POINTER(_ElemId)),
+        ("reserved", ctypes.c_ubyte * 50),
+    ]
+
+
+def _iowr(kind, number, size):
+    return (3 << 30) | (size << 16) | (ord(kind) << 8) | number
+
+
+SNDRV_CTL_IOCTL_ELEM_LIST = _iowr("U", 0x10, ctypes.sizeof(_ElemList))
+SNDRV_CTL_ELEM_IFACE_MIXER = 2
+
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ATTRIB = 0x004
+
+
+def read_cards(root=PROC_ROOT):
+    """(number, id, name) of every registered card, [] without ALSA"""
+    try:
+        with open(os.path.join(root, "cards")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    cards = []
+    for line in lines:
+        match = CARD_PATTERN.match(line)
+        if match is not None:
+            cards.append((int(match.group(1)), match.group(2), match.group(3)))
+    return cards
+
+
+def read_elements(number, dev_root=DEV_ROOT):
+    """Names of the mixer elements of card `number`, e.g. "Master Playback Volume" """
+    import fcntl
+
+    with open(os.path.join(dev_root, "controlC%d" % number), "rb", buffering=0) as f:
+        elements = _ElemList()
+        fcntl.ioctl(f.fileno(), SNDRV_CTL_IOCTL_ELEM_LIST, elements)  # Count only
+
+        ids = (_ElemId * elements.count)()
+        elements.space = elements.count
+        elements.pids = ctypes.cast(ids, ctypes.POINTER(_ElemId))
+        fcntl.ioctl(f.fileno(), SNDRV_CTL_IOCTL_ELEM_LIST, elements)
+
+    return [ids[i].name.decode("utf-8", "replace") for i in range(elements.used)
+            if ids[i].iface == SNDRV_CTL_ELEM_IFACE_MIXER]
+
+
+def mixer_controls(elements, blacklist=()):
+    """Simple mixer names with a volume, as amixer shows them, minus the blacklist"""
+    controls = []
+    for element in elements:
+        for suffix in (" Playback Volume", " Volume"):
+            if element.endswith(suffix):
+                name = element[:-len(suffix)]
+                break
+        else:
+            continue
+        if any(item in name.lower() for item in blacklist):
+            continue
+        if name not in controls:
+            controls.append(name)
+    return controls
+
+
+class InotifyWatch(object):
+    """Waits for entries to be created or removed in one directory"""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path),
+                                  IN_CREATE | IN_DELETE | IN_ATTRIB) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "Cannot watch %s" % path)
+
+    def wait(self, timeout):
+        """True if something changed within `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        os.read(self.fd, 4096)  # Which entry does not matter, cards are rescanned
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SoundcardDiscovery(object):
+    """Cached soundcard map, optionally kept current in the background
+
+    ARGUMENTS:
+        - root              str() Directory laid out like /proc/asound.
+        - dev_root          str() Directory with the control devices, watched
+                            for hotplug.
+        - blacklist         list() Substrings of control names to ignore.
+        - read_controls     callable(number) Mixer element names of a card,
+                            `read_elements` by default.
+        - interval          float() Seconds between rescans, a safety net
+                            when inotify works.
+        - settle            float() Wait after a hotplug event, the card
+                            registers its controls a moment after its
+                            device appears.
+    """
+
+    def __init__(self, root=PROC_ROOT, dev_root=DEV_ROOT, blacklist=(),
+                 read_controls=None, interval=5.0, settle=0.2):
+        self.root = root
+        self.dev_root = dev_root
+        self.blacklist = blacklist
+        self.read_controls = read_controls or (
+            lambda number: read_elements(number, self.dev_root))
+        self.interval = interval
+        self.settle = settle
+
+        self.cards = {}  # Number -> Soundcard
+        self.scans = 0
+        self.reads = 0  # Cards whose controls were queried
+        self._listing = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._watch = None
+
+    def _card(self, number, card_id, name):
+        try:
+            elements = self.read_controls(number)
+            self.reads += 1
+        except OSError as e:
+            print("Cannot read the controls of card %d: %s" % (number, e))
+            elements = []
+        return Soundcard(number, card_id, name, mixer_controls(elements, self.blacklist))
+
+    def scan(self):
+        """Refresh the cache
+
+        RETURNS:
+            - list()            Soundcards added since the last scan.
+            - list()            Soundcards removed since the last scan.
+        """
+        self.scans += 1
+        listing = read_cards(self.root)
+        if listing == self._listing:
+            return [], []
+        self._listing = listing
+
+        current = {number: (card_id, name) for number, card_id, name in listing}
+        removed = [card for number, card in self.cards.items()
+                   if current.get(number, (None,))[0] != card.id]
+        cards = {number: card for number, card in self.cards.items()
+                 if card not in removed}
+
+        added = []
+        for number, (card_id, name) in sorted(current.items()):
+            if number not in cards:
+                cards[number] = self._card(number, card_id, name)
+                added.append(cards[number])
+
+        self.cards = cards
+        return added, removed
+
+    def start(self, callback):
+        """Rescan on hotplug and call `callback(added, removed)` on changes"""
+        try:
+            self._watch = InotifyWatch(self.dev_root)
+        except (OSError, AttributeError):
+            self._watch = None  # Polling only
+
+        self._thread = threading.Thread(target=self._run, args=(callback,),
+                                        name="pygac-soundcards", daemon=True)
+        self._thread.start()
+
+    def _run(self, callback):
+        while not self._stop.is_set():
+            if self._watch is not None:
+                if self._watch.wait(self.interval):
+                    self._stop.wait(self.settle)
+            else:
+                self._stop.wait(self.interval)
+            if self._stop.is_set():
+                break
+
+            added, removed = self.scan()
+            if added or removed:
+                callback(added, removed)
+
+    def close(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + timeout)
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
+
+    def report(self):
+        return {"cards": len(self.cards), "scans": self.scans, "reads": self.reads,
+                "inotify": self._watch is not None}
@@ -9,6 +9,9 @@ import dbus
 from dbus.mainloop.glib import DBusGMainLoop
 
 from .. import utils
+from . import pulse
+from . import mpris
+from . import asound
 
 """
 TODO:
@@ -17,8 +20,6 @@ TODO:
 + Get initial volume level from start. -> VolumeControls.__init__
 """
 
-DBusGMainLoop(set_as_default=True)
-
 CONTROLS = {
     "ALSA": {
         "mute": "amixer set Master -q mute",
@@ -55,8 +56,7 @@ class Cards:
 
     class PulseAudio:
         def set_volume(percentage):
-            cmd = f"pactl -- set-sink-volume 1 {percentage}%"
-            output(cmd)
+            pulse.default_connection().set_volume(percentage, sink="1")
 
     class PipeWire:
         pass
@@ -135,57 +135,43 @@ class VolumeControls:
 
 
     def _aggregate_soundcards(self, blacklist=BLACKLIST, whitelist=WHITELIST):
-        """Find the name of soundcards to use for audio control."""
+        """Find the name of soundcards to use for audio control.
+
+        Cards come from /proc/asound and are kept up to date as they are
+        plugged in or removed, see `asound.SoundcardDiscovery`.
+        """
 
-        card_number = 0
+        self.discovery = asound.SoundcardDiscovery(blacklist=blacklist)
         self.soundcards = {}
+        self._soundcards_changed(*self.discovery.scan())
 
-        while True:
-            tmp_card = []
-            try:
-                output = subprocess.check_output(f"amixer -c {str(card_number)}",
-                                                 shell=True,
-                                                 stderr=subprocess.STDOUT)
-
-                # Match only 'Master' and similar
-                pattern = "(Simple mixer control) ('[A-Z][^']*['])"
-
-                # Ignore blacklisted devices
-                for _, match in re.findall(pattern, str(output)):
-                    candidate = True
-                    for item in blacklist:
-                        if item in match.lower():
-                            candidate = False
-                            break
-                    if not candidate:
-                        continue
-
-                    if match == "'Master'":
-                        try:
-                            self.get_initial_volume(card=card_number)
-                        except Exception as e:
-                            print(e)
-                    tmp_card.append(match)
-
-                    # for w_item in whitelist:
-                    #     if w_item in match.lower():
-                    #         tmp_card.append(match)
-                    #         if match == "'Master'":
-                    #             try:
-                    #                 self.get_initial_volume(card=card_number)
-                    #             except Exception as e:
-                    #                 print(e)
-
-                if any(tmp_card):
-                    self.soundcards[card_number] = tmp_card
-            except:
+        # Only the first card's level, one amixer call instead of one per card
+        for card_number, controls in sorted(self.soundcards.items()):
+            if "'Master'" in controls:
+                self.get_initial_volume(card=card_number)
                 break
-            card_number += 1
 
         print(self.soundcards)
 
+        self.discovery.start(self._soundcards_hotplugged)
+
         return self.soundcards
 
+    def _soundcards_changed(self, added, removed):
+        """Apply the cards added and removed since the last discovery scan"""
+        soundcards = dict(self.soundcards)  # Swapped whole, never mutated in use
+        for card in removed:
+            soundcards.pop(card.number, None)
+        for card in added:
+            if card.controls:
+                # Quoted like amixer prints them, ready for `amixer set`
+                soundcards[card.number] = ["'%s'" % name for name in card.controls]
+        self.soundcards = soundcards
+
+    def _soundcards_hotplugged(self, added, removed):
+        self._soundcards_changed(added, removed)
+        print(self.soundcards)
+
     def volume_change(self, value, change=None):
         if change:
             self.change = change
@@ -217,36 +203,48 @@ class VolumeControls:
             self.muted = True
 
     def set_volume(self):
-        cmd = f"pactl -- set-sink-volume 1 {self.percentage}%"
         print(self.percentage, end="\r     ")
-        os.system(cmd)
+        pulse.default_connection().set_volume(self.percentage, sink="1")
         # self.test_soundcards.handle("set_Volume", self.percentage)
 
 
-def do_nothing(*args, **kwargs):
-    """Do nothing"""
-    pass
-
 class DbusHandler:
 
-    players = []
     # driver = "alsa"
 
-    tmp_directory = utils.temporary_directory
+    snapshot_path = utils.temporary_directory + '/paused-players.json'
+
+    mpris_target = None  # Only drive players whose bus name contains this
 
     def __init__(self):
         # self.tmp_directory = temporary_directory
         # self.controls = getattr(Controls, self.driver, None)
         # if self.controls is None:
         #     raise Exception("Unsupported driver: %s", self.driver)
+        DBusGMainLoop(set_as_default=True)
         self.bus = dbus.SessionBus()
-        self._getPlayerList()
-
-    def _getPlayerList(self):
-        for i in self.bus.list_names():
-            if i.startswith("org.mpris.MediaPlayer2."):
-                self.players.append(i)
-    def _get_player_name(self, i, player):
+        self.player_cache = mpris.PlayerCache(self.bus)
+        self.paused_players = mpris.PausedPlayers()
+        try:
+            self.mainloop = mpris.run_mainloop()
+        except ImportError:
+            # Without PyGObject signals are never delivered and the cache
+            # goes stale, fall back to asking the players every time
+            self.mainloop = None
+
+    @property
+    def players(self):
+        return self.player_cache.players
+
+    def _with_status(self, *statuses):
+        if self.mainloop is None:
+            self.player_cache.refresh()
+        names = self.player_cache.with_status(*statuses)
+        if self.mpris_target is not None:
+            names = [name for name in names if self.mpris_target in name]
+        return names
+
+    def _get_player_name(self, i, player=None):
         if i.startswith("org.mpris.MediaPlayer2."):
             return i[len("org.mpris.MediaPlayer2."):]
         else:
@@ -266,94 +264,49 @@ class LinuxWrapper(DbusHandler, VolumeControls):
 
     def pause(self):
         player_names = []
-        for i in self.players:
-            player = self.bus.get_object(i, '/org/mpris/MediaPlayer2')
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Playing':
-                player_name = self._get_player_name(i, player)
-                player_names.append(player_name)
-                player.Pause(dbus_interface='org.mpris.MediaPlayer2.Player',
-                             reply_handler=do_nothing, error_handler=do_nothing)
+        for i in self._with_status('Playing'):
+            if self.player_cache.call(i, 'Pause'):
+                player_names.append(i)
         if player_names != []:
-            for i in os.listdir(self.tmp_directory+'/paused-players/'):
-
-                os.remove(self.tmp_directory+'/paused-players/'+i)
-            for player_name in player_names:
-                player_status_file = open(self.tmp_directory+'/paused-players/'+player_name,
-                                          "w")
-                player_status_file.close()
+            self.paused_players.replace(player_names)
 
 
     def play(self):
-        for i in os.listdir(self.tmp_directory+'/paused-players/'):
-            try:
-                player = self.bus.get_object('org.mpris.MediaPlayer2.'+i,
-                                        '/org/mpris/MediaPlayer2')
-            except Exception:
-                if i in os.listdir(self.tmp_directory+'/paused-players'):
-                    os.remove(self.tmp_directory+'/paused-players/'+i)
-
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Paused':
-                player.Play(dbus_interface='org.mpris.MediaPlayer2.Player',
-                            reply_handler=do_nothing, error_handler=do_nothing)
-                if i in os.listdir(self.tmp_directory+'/paused-players'):
-                    os.remove(self.tmp_directory+'/paused-players/'+i)
+        paused = set(self._with_status('Paused'))
+        for i in self.paused_players:
+            if i in paused:
+                self.player_cache.call(i, 'Play')
+            if i in paused or i not in self.player_cache.status:
+                self.paused_players.discard(i)
+
+    def save_paused_players(self, path=None):
+        """Write the paused players to disk, see `--remember_paused`"""
+        return self.paused_players.snapshot(path or self.snapshot_path)
+
+    def restore_paused_players(self, path=None):
+        return self.paused_players.restore(path or self.snapshot_path)
 
 
     def stop(self):
-        for i in self.players:
-            player = self.bus.get_object(i, '/org/mpris/MediaPlayer2')
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Playing' or player_status == 'Stopped':
-                player.Stop(dbus_interface='org.mpris.MediaPlayer2.Player',
-                            reply_handler=do_nothing,
-                            error_handler=do_nothing)
+        for i in self._with_status('Playing', 'Stopped'):
+            self.player_cache.call(i, 'Stop')
 
 
     def toggle(self):
-        playing = False
-        for i in self.players:
-            player = self.bus.get_object(i, '/org/mpris/MediaPlayer2')
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Playing':
-                playing = True
-        if playing:
+        if self._with_status('Playing'):
             self.pause()
         else:
             self.play()
 
 
     def next(self):
-        for i in self.players:
-            player = self.bus.get_object(i, '/org/mpris/MediaPlayer2')
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Playing':
-                player.Next(dbus_interface='org.mpris.MediaPlayer2.Player',
-                            reply_handler=do_nothing,
-                            error_handler=do_nothing)
+        for i in self._with_status('Playing'):
+            self.player_cache.call(i, 'Next')
 
 
     def previous(self):
-        for i in self.players:
-            player = self.bus.get_object(i, '/org/mpris/MediaPlayer2')
-            player_status = player.Get('org.mpris.MediaPlayer2.Player',
-                                       'PlaybackStatus',
-                                       dbus_interface='org.freedesktop.DBus.Properties')
-            if player_status == 'Playing':
-                player.Previous(dbus_interface='org.mpris.MediaPlayer2.Player',
-                                reply_handler=do_nothing,
-                                error_handler=do_nothing)
+        for i in self._with_status('Playing'):
+            self.player_cache.call(i, 'Previous')
 
     # def mute(self):
     #     os.system(CONTROLS[self.driver]["mute"])
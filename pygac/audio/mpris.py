@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Event-driven cache of MPRIS media players.
+
+Players coming and going are tracked through `NameOwnerChanged`, their
+playback status through `PropertiesChanged`. Commands are dispatched
+from the cache with asynchronous calls, so no gesture waits for a
+D-Bus round-trip.
+"""
+
+import os
+import json
+import tempfile
+import threading
+
+import dbus
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+
+def do_nothing(*args, **kwargs):
+    """Do nothing"""
+    pass
+
+
+def run_mainloop():
+    """Run a GLib main loop on a daemon thread so signals get delivered"""
+    from gi.repository import GLib
+
+    loop = GLib.MainLoop()
+    thread = threading.Thread(target=loop.run, name="pygac-dbus", daemon=True)
+    thread.start()
+    return loop
+
+
+class PlayerCache(object):
+    """Live MPRIS players and their last known PlaybackStatus"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.status = {}  # bus name -> "Playing" / "Paused" / "Stopped"
+        self.proxies = {}  # bus name -> proxy object
+        self._owners = {}  # unique connection name -> bus name
+        self._lock = threading.Lock()
+
+        bus.add_signal_receiver(self._name_owner_changed,
+                                signal_name="NameOwnerChanged",
+                                dbus_interface="org.freedesktop.DBus",
+                                bus_name="org.freedesktop.DBus",
+                                path="/org/freedesktop/DBus")
+        bus.add_signal_receiver(self._properties_changed,
+                                signal_name="PropertiesChanged",
+                                dbus_interface=PROPERTIES_INTERFACE,
+                                path=MPRIS_PATH,
+                                sender_keyword="sender")
+
+        # Players that were running before us, the only synchronous calls
+        for name in bus.list_names():
+            if name.startswith(MPRIS_PREFIX):
+                try:
+                    self._add(name, bus.get_name_owner(name))
+                except dbus.DBusException:
+                    pass
+
+    @property
+    def players(self):
+        with self._lock:
+            return list(self.proxies)
+
+    def with_status(self, *statuses):
+        """Names of the players currently in one of `statuses`"""
+        with self._lock:
+            return [name for name, status in self.status.items()
+                    if status in statuses]
+
+    def _add(self, name, owner):
+        proxy = self.bus.get_object(name, MPRIS_PATH, introspect=False)
+        with self._lock:
+            self.proxies[name] = proxy
+            self._owners[owner] = name
+            self.status.setdefault(name, "Stopped")
+
+        proxy.Get(PLAYER_INTERFACE, "PlaybackStatus",
+                  dbus_interface=PROPERTIES_INTERFACE,
+                  reply_handler=lambda status: self._set(name, status),
+                  error_handler=do_nothing)
+
+    def _remove(self, name):
+        with self._lock:
+            self.proxies.pop(name, None)
+            self.status.pop(name, None)
+            for owner in [o for o, n in self._owners.items() if n == name]:
+                del self._owners[owner]
+
+    def _set(self, name, status):
+        with self._lock:
+            if name in self.proxies:
+                self.status[name] = str(status)
+
+    def _name_owner_changed(self, name, old_owner, new_owner):
+        if not name.startswith(MPRIS_PREFIX):
+            return
+        if old_owner:
+            self._remove(name)
+        if new_owner:
+            self._add(name, new_owner)
+
+    def _properties_changed(self, interface, changed, invalidated, sender=None):
+        if interface != PLAYER_INTERFACE or "PlaybackStatus" not in changed:
+            return
+        with self._lock:
+            name = self._owners.get(sender)
+        if name is not None:
+            self._set(name, changed["PlaybackStatus"])
+
+    def refresh(self):
+        """Synchronously re-read the players and their PlaybackStatus
+
+        For when no main loop delivers the signals, costs a round-trip
+        per player.
+        """
+        names = [name for name in self.bus.list_names() if name.startswith(MPRIS_PREFIX)]
+        for name in set(self.players) - set(names):
+            self._remove(name)
+
+        for name in names:
+            try:
+                owner = self.bus.get_name_owner(name)
+                proxy = self.bus.get_object(name, MPRIS_PATH, introspect=False)
+                status = proxy.Get(PLAYER_INTERFACE, "PlaybackStatus",
+                                   dbus_interface=PROPERTIES_INTERFACE)
+            except dbus.DBusException:
+                self._remove(name)
+                continue
+            with self._lock:
+                self.proxies[name] = proxy
+                self._owners[owner] = name
+                self.status[name] = str(status)
+
+    def call(self, name, method):
+        """Invoke a Player method without waiting for the reply"""
+        with self._lock:
+            proxy = self.proxies.get(name)
+        if proxy is None:
+            return False
+        getattr(proxy, method)(dbus_interface=PLAYER_INTERFACE,
+                               reply_handler=do_nothing,
+                               error_handler=do_nothing)
+        return True
+
+
+class PausedPlayers(object):
+    """Players paused by a gesture, so that play only resumes those
+
+    Kept in memory; `generation` increases on every change so a snapshot
+    is only written when something actually changed.
+    """
+
+    def __init__(self):
+        self.names = set()
+        self.generation = 0
+        self._saved_generation = 0
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def replace(self, names):
+        self.names = set(names)
+        self.generation += 1
+
+    def discard(self, name):
+        if name in self.names:
+            self.names.remove(name)
+            self.generation += 1
+
+    def snapshot(self, path):
+        """Atomically write the set to `path` if it changed since the last one"""
+        if self.generation == self._saved_generation:
+            return False
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".paused-players-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"generation": self.generation,
+                           "players": sorted(self.names)}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        self._saved_generation = self.generation
+        return True
+
+    def restore(self, path):
+        """Load a snapshot written by `snapshot`, if there is one"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        self.names = set(data.get("players", []))
+        self.generation = self._saved_generation = data.get("generation", 0)
+        return True
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Persistent control channel to PulseAudio/PipeWire.
+
+Instead of forking `pactl` through a shell for every volume change, one
+connection stays open: a libpulse client through `pulsectl` where it is
+installed, which PipeWire serves through pipewire-pulse as well, else a
+long-lived `pacmd` process fed commands over stdin. Requests are
+coalesced per sink on a writer thread, so only the latest target is
+sent when the gesture moves faster than the sound server can follow.
+"""
+
+import abc
+import time
+import shutil
+import threading
+import subprocess
+
+PA_VOLUME_NORM = 0x10000  # 100% in PulseAudio volume units
+
+DEFAULT_SINK = "@DEFAULT_SINK@"
+
+
+class SoundServerConnection(object, metaclass=abc.ABCMeta):
+    """Coalescing volume writer, subclasses decide how a command is sent
+
+    Anything with a `record(name, seconds)` method, like metrics.Metrics,
+    can be added to `recorders`. It gets an "actuation" span per command
+    that reached the sound server, timed around the actual call, and an
+    "end_to_end" span from the `timestamp` (time.perf_counter()) given
+    with the request, if any.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.coalesced = 0
+        self.closed = False
+        self.recorders = []
+
+        self._pending = {}  # sink -> (latest requested percentage, timestamp)
+        self._busy = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._writer,
+                                        name="pygac-volume", daemon=True)
+        self._thread.start()
+
+    def set_volume(self, percentage, sink=DEFAULT_SINK, timestamp=None):
+        """Request a volume, returns immediately"""
+        with self._condition:
+            if sink in self._pending:
+                self.coalesced += 1
+                if timestamp is None:  # The write still answers that frame
+                    timestamp = self._pending[sink][1]
+            self._pending[sink] = (int(percentage), timestamp)
+            self._condition.notify()
+
+    def flush(self, timeout=None):
+        """Wait until every pending request has been sent"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._busy, timeout)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self._thread.join(1.0)
+
+    def _writer(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self.closed)
+                if not self._pending:
+                    return
+                sink, (percentage, timestamp) = self._pending.popitem()
+                self._busy = True
+
+            start = time.perf_counter()
+            try:
+                self._send(sink, percentage)
+                self.sent += 1
+            except Exception as e:
+                print(e)
+            else:
+                end = time.perf_counter()
+                for recorder in self.recorders:
+                    recorder.record("actuation", end - start)
+                    if timestamp is not None:
+                        recorder.record("end_to_end", end - timestamp)
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()  # Wake up flush()
+
+    @abc.abstractmethod
+    def _send(self, sink, percentage):
+        """Apply one volume, called from the writer thread only"""
+
+
+class PacmdConnection(SoundServerConnection):
+    """A single `pacmd` process reading commands from stdin (PulseAudio)"""
+
+    command = ["pacmd"]
+
+    def __init__(self, command=None):
+        if command is not None:
+            self.command = command
+        self.process = None
+        SoundServerConnection.__init__(self)
+
+    def _spawn(self):
+        self.process = subprocess.Popen(self.command,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL,
+                                        text=True,
+                                        bufsize=1)
+
+    def _send(self, sink, percentage):
+        line = "set-sink-volume %s %d\n" % (sink, PA_VOLUME_NORM * percentage // 100)
+        for _ in range(2):  # Respawn once if the server went away
+            if self.process is None or self.process.poll() is not None:
+                self._spawn()
+            try:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
+                return
+            except (BrokenPipeError, OSError):
+                self.process = None
+        raise IOError("Could not reach the sound server through %s" % self.command[0])
+
+    def close(self):
+        SoundServerConnection.close(self)
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(1.0)
+            except Exception:
+                self.process.kill()
+
+
+class NativeConnection(SoundServerConnection):
+    """One libpulse client through `pulsectl`, for PulseAudio and PipeWire
+
+    ARGUMENTS:
+        - connect           callable() Returns a connected `pulsectl.Pulse`,
+                            or anything with the same sink methods.
+    """
+
+    def __init__(self, connect=None):
+        if connect is not None:
+            self._connect = connect
+        self.client = self._connect()  # Fail here, before the writer starts
+        SoundServerConnection.__init__(self)
+
+    @staticmethod
+    def _connect():
+        import pulsectl
+        return pulsectl.Pulse("pygac")
+
+    def _sink(self, sink):
+        if sink == DEFAULT_SINK:
+            return self.client.get_sink_by_name(self.client.server_info().default_sink_name)
+        if sink.isdigit():
+            return self.client.sink_info(int(sink))
+        return self.client.get_sink_by_name(sink)
+
+    def _send(self, sink, percentage):
+        for attempt in range(2):  # Reconnect once if the server went away
+            try:
+                if self.client is None:
+                    self.client = self._connect()
+                self.client.volume_set_all_chans(self._sink(sink), percentage / 100)
+                return
+            except Exception as e:
+                # pulsectl raises PulseError, PulseDisconnected or OSError
+                self._disconnect()
+                if attempt:
+                    raise IOError("Could not reach the sound server: %s" % e)
+
+    def _disconnect(self):
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+    def close(self):
+        SoundServerConnection.close(self)
+        self._disconnect()
+
+
+class PactlConnection(SoundServerConnection):
+    """Last resort without `pulsectl` or `pacmd`: one `pactl` per coalesced update"""
+
+    def _send(self, sink, percentage):
+        subprocess.run(["pactl", "set-sink-volume", sink, "%d%%" % percentage],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class RecordingConnection(SoundServerConnection):
+    """Fake sound server, remembers what would have been sent"""
+
+    def __init__(self):
+        self.volumes = []
+        SoundServerConnection.__init__(self)
+
+    def _send(self, sink, percentage):
+        self.volumes.append((sink, percentage))
+
+
+def _is_pipewire():
+    try:
+        info = subprocess.check_output(["pactl", "info"], stderr=subprocess.STDOUT)
+    except Exception:
+        return False
+    return b"PipeWire" in info
+
+
+def open_connection():
+    """Best available connection to the running sound server"""
+    try:
+        return NativeConnection()
+    except ImportError:
+        pass
+    except Exception as e:
+        print("Cannot connect to the sound server through pulsectl: %s" % e)
+
+    if shutil.which("pacmd") is not None and not _is_pipewire():
+        return PacmdConnection()
+    print("Install pulsectl to keep one connection to the sound server, "
+          "falling back to one pactl per volume change")
+    return PactlConnection()
+
+
+_default_connection = None
+_default_lock = threading.Lock()
+
+
+def default_connection():
+    """Process-wide connection, opened on first use"""
+    global _default_connection
+    with _default_lock:
+        if _default_connection is None:
+            _default_connection = open_connection()
+        return _default_connection
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks, results are printed as JSON so runs can be compared.
+
+    python3 -m pygac.benchmark classifiers --hands 2
+    python3 -m pygac.benchmark record session.mp4 session.npz
+    python3 -m pygac.benchmark replay session.mp4 --output before.json
+    python3 -m pygac.benchmark replay session.npz
+    python3 -m pygac.benchmark roi session.mp4
+    python3 -m pygac.benchmark skip session.npz --frame_skip 3
+    python3 -m pygac.benchmark shm --readers 3
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from .model import KeyPointClassifier
+from .model import PointHistoryClassifier
+from .pygac import GestureControl
+from .profiling import StageRecorder
+from .replay import LandmarkStream
+from .landmarks import HandLandmarks
+from .shm import LandmarkPublisher, LandmarkReader
+from .audio.pulse import RecordingConnection
+
+KEYPOINT_CSV = 'pygac/model/keypoint_classifier/keypoint.csv'
+POINT_HISTORY_CSV = 'pygac/model/point_history_classifier/point_history.csv'
+
+
+def load_samples(path, count):
+    """First `count` feature rows of a bundled dataset, label column dropped"""
+    data = np.loadtxt(path, delimiter=',', dtype=np.float32, max_rows=count)
+    return np.ascontiguousarray(data[:, 1:])
+
+
+def per_call(classifier, rows):
+    """The previous path: one fresh array and one invoke per hand"""
+    interpreter = classifier.interpreter
+    for row in rows:
+        interpreter.set_tensor(classifier.input_details[0]['index'],
+                               np.array([list(row)], dtype=np.float32))
+        interpreter.invoke()
+        result = interpreter.get_tensor(classifier.output_details[0]['index'])
+        np.argmax(np.squeeze(result))
+
+
+def timed(function, iterations):
+    """Mean microseconds per call"""
+    function()  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_classifiers(hands=2, iterations=2000):
+    results = {}
+    for name, cls, path in [("keypoint", KeyPointClassifier, KEYPOINT_CSV),
+                            ("point_history", PointHistoryClassifier, POINT_HISTORY_CSV)]:
+        rows = load_samples(path, hands)
+        single = cls(max_batch=1)
+        batched = cls(max_batch=hands)
+
+        per_call_us = timed(lambda: per_call(single, rows), iterations)
+        batched_us = timed(lambda: batched.classify_batch(rows), iterations)
+
+        results[name] = {
+            "backend": batched.backend,
+            "load_ms": round(batched.load_time * 1000, 3),
+            "hands": hands,
+            "per_call_us": round(per_call_us, 2),
+            "batched_us": round(batched_us, 2),
+            "speedup": round(per_call_us / batched_us, 2),
+        }
+    return results
+
+
+def replay_args(path, **options):
+    """Arguments for an unpaced, headless GestureControl run on `path`"""
+    args = argparse.Namespace(
+        device=-1, width=960, height=540, headless=True,
+        min_detection_confidence=0.7, min_tracking_confidence=0.5,
+        delay=0.4, threshold=0.012,
+        max_fps=0, idle_fps=0,  # Replay as fast as possible
+        replay=path,
+    )
+    vars(args).update(options)
+    return args
+
+
+def bench_replay(path, trace_allocations=False, **options):
+    """Run a recording through the real pipeline, audio goes to a stub"""
+    stages = StageRecorder(trace_allocations=trace_allocations)
+    volume = RecordingConnection()
+
+    gc = GestureControl(replay_args(path, **options),
+                        stage_recorder=stages, volume_connection=volume)
+    gc.start()
+    volume.flush()
+
+    report = stages.report()
+    report["source"] = path
+    report["volume_changes"] = volume.sent
+    if gc.roi_tracker is not None:
+        report["roi"] = gc.roi_tracker.report()
+    if gc.frame_skipper is not None:
+        report["frame_skip"] = gc.frame_skipper.report()
+    return report
+
+
+def landmark_error(reference, other):
+    """Mean landmark distance in pixels and share of frames with equal hand counts
+
+    Hands are paired by handedness, MediaPipe does not keep them in the
+    same order from one run to the next.
+    """
+    frames = min(len(reference.counts), len(other.counts))
+    agree = reference.counts[:frames] == other.counts[:frames]
+
+    errors = []
+    for frame in np.flatnonzero(agree):
+        n = reference.counts[frame]
+        if n == 0:
+            continue
+        hands = np.argsort(reference.handedness[frame, :n], kind="stable")
+        other_hands = np.argsort(other.handedness[frame, :n], kind="stable")
+        delta = (reference.points[frame, hands, :, :2]
+                 - other.points[frame, other_hands, :, :2])
+        delta *= (reference.width, reference.height)
+        errors.append(np.sqrt((delta ** 2).sum(axis=-1)).mean())
+
+    return {
+        "frames": frames,
+        "hand_count_agreement": round(float(agree.mean()), 4) if frames else 0.0,
+        "mean_error_px": round(float(np.mean(errors)), 3) if errors else 0.0,
+        "max_error_px": round(float(np.max(errors)), 3) if errors else 0.0,
+    }
+
+
+def bench_roi(path, padding=0.5, size=256, refresh=10):
+    """Full-frame against ROI detection on the same video"""
+    with tempfile.TemporaryDirectory() as directory:
+        full_path = os.path.join(directory, "full.npz")
+        roi_path = os.path.join(directory, "roi.npz")
+
+        full = bench_replay(path, record_landmarks=full_path)
+        roi = bench_replay(path, record_landmarks=roi_path,
+                           roi=True, roi_padding=padding, roi_size=size,
+                           roi_refresh=refresh)
+
+        # Full-frame detection is the reference the crops are measured against
+        accuracy = landmark_error(LandmarkStream(full_path), LandmarkStream(roi_path))
+
+    return {
+        "source": path,
+        "full_frame": {"fps": full["fps"], "stages": full["stages"]},
+        "roi": {"fps": roi["fps"], "stages": roi["stages"], "tracking": roi["roi"],
+                "accuracy": accuracy},
+        "speedup": round(roi["fps"] / full["fps"], 2) if full["fps"] else 0.0,
+    }
+
+
+def bench_skip(path, frame_skip=3, tolerance=0.01, **filter_options):
+    """Detection on every frame against filtered and predicted landmarks
+
+    A landmark stream is its own reference, a video is detected in full
+    once to get one.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        reference_path, record = path, {}
+        if not path.endswith(".npz"):
+            reference_path = record["record_landmarks"] = os.path.join(directory,
+                                                                       "full.npz")
+        filtered_path = os.path.join(directory, "filtered.npz")
+        skipped_path = os.path.join(directory, "skipped.npz")
+
+        full = bench_replay(path, **record)
+        filtered = bench_replay(path, record_landmarks=filtered_path,
+                                landmark_filter=True, **filter_options)
+        skipped = bench_replay(path, record_landmarks=skipped_path,
+                               frame_skip=frame_skip, skip_tolerance=tolerance,
+                               **filter_options)
+
+        reference = LandmarkStream(reference_path)
+        filtered["accuracy"] = landmark_error(reference, LandmarkStream(filtered_path))
+        skipped["accuracy"] = landmark_error(reference, LandmarkStream(skipped_path))
+
+    return {
+        "source": path,
+        "full_frame": {"fps": full["fps"], "stages": full["stages"]},
+        "filtered": {"fps": filtered["fps"], "accuracy": filtered["accuracy"]},
+        "skipped": {"fps": skipped["fps"], "stages": skipped["stages"],
+                    "frame_skip": skipped["frame_skip"],
+                    "accuracy": skipped["accuracy"]},
+        "speedup": round(skipped["fps"] / full["fps"], 2) if full["fps"] else 0.0,
+    }
+
+
+def shm_reader(name, ready, done, results):
+    """Reader process: consume frames until the writer is done"""
+    reader = LandmarkReader(name)
+    received, latencies = 0, []
+    ready.set()
+
+    start = time.perf_counter()
+    while True:
+        finished = done.is_set()
+        for record in reader.wait(timeout=0.1, interval=0):
+            received += 1
+            if received % 64 == 0:
+                latencies.append(time.time() - float(record["publish_time"]))
+        if finished and reader.frames == reader.next_frame:
+            break
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    results.put({
+        "received": received,
+        "missed": reader.missed,
+        "retries": reader.retries,
+        "frames_per_s": round(received / seconds, 1),
+        "latency_p50_us": round(latencies[len(latencies) // 2] * 1e6, 1) if latencies else 0.0,
+        "latency_p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1) if latencies else 0.0,
+    })
+    reader.close()
+
+
+def bench_shm(readers=2, frames=100000, slots=64, hands=2, rate=0.0):
+    """One writer, several reader processes on the shared landmark ring
+
+    With `rate` 0 the writer runs flat out, which shows its own cost and
+    how far readers fall behind; a camera rate shows reader latency.
+    """
+    landmarks = HandLandmarks(max_num_hands=hands)
+    landmarks.count = hands
+    landmarks.handedness[:] = ["Left", "Right"][:hands]
+    landmarks.points[...] = np.random.rand(*landmarks.points.shape)
+    signs = np.arange(hands, dtype=np.int32)
+    confidences = np.ones(hands, dtype=np.float32)
+
+    publisher = LandmarkPublisher("pygac-bench-%d" % os.getpid(),
+                                  slots=slots, max_hands=hands)
+    done = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = []
+    for _ in range(readers):
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(target=shm_reader,
+                                          args=(publisher.name, ready, done, results))
+        process.start()
+        ready.wait()
+        processes.append(process)
+
+    period = 1.0 / rate if rate > 0 else 0.0
+    start = time.perf_counter()
+    for frame in range(frames):
+        publisher.publish(landmarks, signs, signs, confidences, time.perf_counter())
+        if period:
+            time.sleep(max(0.0, start + (frame + 1) * period - time.perf_counter()))
+    seconds = time.perf_counter() - start
+    done.set()
+
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    publisher.close()
+
+    return {
+        "frames": frames,
+        "slots": slots,
+        "slot_bytes": publisher.dtype.itemsize,
+        "writer_frames_per_s": round(frames / seconds, 1),
+        "writer_us_per_frame": round(seconds / frames * 1e6, 2),
+        "readers": reports,
+    }
+
+
+def get_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classifiers = subparsers.add_parser("classifiers",
+                                        help="Per-hand vs batched TFLite inference")
+    classifiers.add_argument("--hands", type=int, default=2)
+    classifiers.add_argument("--iterations", type=int, default=2000)
+
+    replay = subparsers.add_parser("replay",
+                                   help="End-to-end timings on a recorded session")
+    replay.add_argument("source", help="Video file or .npz landmark stream")
+    replay.add_argument("--pipeline", action="store_true")
+    replay.add_argument("--trace_allocations", action="store_true",
+                        help="Report bytes allocated per frame (slows the run)")
+    replay.add_argument("--output", help="Also write the JSON report here")
+
+    roi = subparsers.add_parser("roi",
+                                help="Throughput and accuracy of ROI tracking")
+    roi.add_argument("source", help="Video file")
+    roi.add_argument("--roi_padding", type=float, default=0.5)
+    roi.add_argument("--roi_size", type=int, default=256)
+    roi.add_argument("--roi_refresh", type=int, default=10)
+
+    skip = subparsers.add_parser("skip",
+                                 help="Throughput and accuracy of predictive frame skipping")
+    skip.add_argument("source", help="Video file or .npz landmark stream")
+    skip.add_argument("--frame_skip", type=int, default=3)
+    skip.add_argument("--skip_tolerance", type=float, default=0.01)
+    skip.add_argument("--filter_min_cutoff", type=float, default=1.0)
+    skip.add_argument("--filter_beta", type=float, default=10.0)
+
+    shm = subparsers.add_parser("shm",
+                                help="Shared-memory landmark ring, one writer")
+    shm.add_argument("--readers", type=int, default=2)
+    shm.add_argument("--frames", type=int, default=100000)
+    shm.add_argument("--slots", type=int, default=64)
+    shm.add_argument("--rate", type=float, default=0.0,
+                     help="Frames per second to write, 0 for as fast as possible")
+
+    record = subparsers.add_parser("record",
+                                   help="Save the landmarks of a video as a stream")
+    record.add_argument("source", help="Video file")
+    record.add_argument("destination", help=".npz landmark stream")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = get_args(argv)
+
+    if args.command == "classifiers":
+        results = bench_classifiers(args.hands, args.iterations)
+
+    elif args.command == "replay":
+        results = bench_replay(args.source, pipeline=args.pipeline,
+                               trace_allocations=args.trace_allocations)
+
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+
+    elif args.command == "roi":
+        results = bench_roi(args.source, args.roi_padding, args.roi_size,
+                            args.roi_refresh)
+
+    elif args.command == "skip":
+        results = bench_skip(args.source, args.frame_skip, args.skip_tolerance,
+                             filter_min_cutoff=args.filter_min_cutoff,
+                             filter_beta=args.filter_beta)
+
+    elif args.command == "shm":
+        results = bench_shm(args.readers, args.frames, args.slots, rate=args.rate)
+
+    elif args.command == "record":
+        results = bench_replay(args.source, record_landmarks=args.destination)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
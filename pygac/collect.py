@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Labeled sample collection.
+
+Preprocessed keypoint and point-history vectors from the live loop are
+copied into one of two preallocated record batches; a background thread
+appends full batches to a binary file and fsyncs it every few seconds,
+so the frame loop never waits on the disk. The file is a 16 byte header
+followed by fixed-size little-endian records:
+
+    header
+        0   magic       8s      b"PYGACSM1"
+        8   version     uint32  1
+        12  record_size uint32  bytes per record
+
+    record
+        0   kind        uint8   0 keypoint, 1 point history
+        1   length      uint8   features used
+        2   label       uint16  class id
+        4   (padding)
+        8   timestamp   float64 time.time()
+        16  features    float32 (42,)
+
+Samples are turned into rows of the training CSVs with
+
+    python3 -m pygac.collect export samples.bin
+"""
+
+import os
+import csv
+import time
+import argparse
+import threading
+
+import numpy as np
+
+from .landmarks import NUM_FEATURES
+
+MAGIC = b"PYGACSM1"
+VERSION = 1
+HEADER_SIZE = 16
+
+KEYPOINT = 0
+POINT_HISTORY = 1
+KINDS = {"keypoint": KEYPOINT, "point_history": POINT_HISTORY}
+
+KEYPOINT_CSV = 'pygac/model/keypoint_classifier/keypoint.csv'
+POINT_HISTORY_CSV = 'pygac/model/point_history_classifier/point_history.csv'
+
+RECORD_DTYPE = np.dtype({
+    "names": ["kind", "length", "label", "timestamp", "features"],
+    "formats": ["u1", "u1", "<u2", "<f8", ("<f4", (NUM_FEATURES,))],
+    "offsets": [0, 1, 2, 8, 16],
+    "itemsize": 16 + 4 * NUM_FEATURES,
+})
+
+
+def _header():
+    return MAGIC + np.array([VERSION, RECORD_DTYPE.itemsize], dtype="<u4").tobytes()
+
+
+def _records(path):
+    """Whole records in an existing sample file"""
+    with open(path, "rb") as f:
+        if f.read(HEADER_SIZE) != _header():
+            raise ValueError("%s is not a sample file of this version" % path)
+    return (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+
+class SampleWriter(object):
+    """Append-only sample file fed from the frame loop
+
+    ARGUMENTS:
+        - path              str() File to append to, created if missing.
+        - batch             int() Records per write.
+        - flush_interval    float() Longest time a sample waits in memory.
+        - fsync_interval    float() Seconds between fsyncs.
+    """
+
+    def __init__(self, path, batch=256, flush_interval=1.0, fsync_interval=5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+
+        if os.path.exists(path) and os.path.getsize(path):
+            records = _records(path)
+            self.file = open(path, "ab")
+            # Drop a record torn by a crash, the next ones would be misaligned
+            self.file.truncate(HEADER_SIZE + records * RECORD_DTYPE.itemsize)
+        else:
+            self.file = open(path, "wb")
+            self.file.write(_header())
+
+        self.added = 0
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+
+        # The frame loop fills one batch while the other is written
+        self._batches = [np.zeros(batch, dtype=RECORD_DTYPE) for _ in range(2)]
+        self._active = 0
+        self._filled = 0
+        self._full = None  # Batch index and length waiting for the writer
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="pygac-samples",
+                                        daemon=True)
+        self._thread.start()
+
+    def add(self, kind, label, features):
+        """Queue one sample, returns immediately"""
+        with self._condition:
+            if self._full is not None and self._filled == len(self._batches[0]):
+                self.dropped += 1  # Both batches full, the disk is too slow
+                return
+            batch, index = self._batches[self._active], self._filled
+            length = len(features)
+            batch["kind"][index] = kind
+            batch["length"][index] = length
+            batch["label"][index] = label
+            batch["timestamp"][index] = time.time()
+            batch["features"][index, :length] = features
+            batch["features"][index, length:] = 0
+            self._filled += 1
+            self.added += 1
+
+            if self._filled == len(self._batches[0]):
+                self._swap()
+
+    def _swap(self):
+        """Hand the active batch to the writer, lock held"""
+        if self._full is not None or not self._filled:
+            return
+        self._full = (self._active, self._filled)
+        self._active = 1 - self._active
+        self._filled = 0
+        self._condition.notify()
+
+    def _run(self):
+        synced = time.monotonic()
+        while True:
+            with self._condition:
+                if self._full is None and not self.closed:
+                    self._condition.wait(self.flush_interval)
+                self._swap()  # Flush whatever waited long enough
+                full, closed = self._full, self.closed
+
+            if full is not None:
+                index, length = full
+                self.file.write(self._batches[index][:length].tobytes())
+                self.written += length
+                with self._condition:
+                    self._full = None
+                    if self._filled == len(self._batches[0]):
+                        self._swap()
+
+            if closed or time.monotonic() - synced >= self.fsync_interval:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                synced = time.monotonic()
+
+            with self._condition:
+                if self.closed and self._full is None and not self._filled:
+                    return
+
+    def close(self):
+        """Write and fsync everything queued"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.file.close()
+
+    def report(self):
+        return {"added": self.added, "written": self.written, "dropped": self.dropped}
+
+
+def read_samples(path):
+    """All records of a sample file as a read-only structured memmap"""
+    records = _records(path)
+    if not records:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE,
+                     shape=(records,))
+
+
+def export_csv(path, keypoint_csv=KEYPOINT_CSV, point_history_csv=POINT_HISTORY_CSV):
+    """Append the samples to the training CSVs, `label,features...` per row"""
+    records = read_samples(path)
+    counts = {}
+    for kind, destination in ((KEYPOINT, keypoint_csv),
+                              (POINT_HISTORY, point_history_csv)):
+        selected = records[records["kind"] == kind]
+        with open(destination, "a", newline="") as f:
+            writer = csv.writer(f)
+            for record in selected:
+                length = int(record["length"])
+                writer.writerow([int(record["label"])]
+                                + record["features"][:length].tolist())
+        counts[destination] = len(selected)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.collect")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("source", help="Sample file written by --collect")
+    parser.add_argument("--keypoint_csv", default=KEYPOINT_CSV)
+    parser.add_argument("--point_history_csv", default=POINT_HISTORY_CSV)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for destination, count in export_csv(args.source, args.keypoint_csv,
+                                             args.point_history_csv).items():
+            print("%d rows appended to %s" % (count, destination))
+    else:
+        records = read_samples(args.source)
+        for name, kind in KINDS.items():
+            labels = records["label"][records["kind"] == kind]
+            counts = np.bincount(labels) if len(labels) else []
+            print(name, {label: int(n) for label, n in enumerate(counts) if n})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gesture events.
+
+The frame loop publishes what it recognized as small typed events, a
+dispatcher thread hands them to subscribers. Publishing never blocks:
+when the queue is full the oldest continuous event (a pinch level, a
+rotation step, a volume) is dropped first, so discrete events like a
+hand opening are only lost when nothing else can go.
+"""
+
+import sys
+import time
+import threading
+
+from collections import deque, namedtuple
+
+# `hand` is the handedness as reported after mirroring, "Left" or "Right"
+HandEnter = namedtuple("HandEnter", "hand timestamp")
+HandLeave = namedtuple("HandLeave", "hand timestamp")
+Open = namedtuple("Open", "hand timestamp")
+Close = namedtuple("Close", "hand timestamp")
+RotateClockwise = namedtuple("RotateClockwise", "hand timestamp")
+RotateCounterClockwise = namedtuple("RotateCounterClockwise", "hand timestamp")
+Pinch = namedtuple("Pinch", "hand level timestamp")  # level 0.0 - 1.0
+Volume = namedtuple("Volume", "percentage timestamp")
+
+EVENTS = (HandEnter, HandLeave, Open, Close,
+          RotateClockwise, RotateCounterClockwise, Pinch, Volume)
+
+# Only the latest of these matters, they may be dropped under pressure
+CONTINUOUS = (RotateClockwise, RotateCounterClockwise, Pinch, Volume)
+
+
+class EventBus(object):
+    """Bounded event queue with a dispatcher thread
+
+    ARGUMENTS:
+        - maxlen            int() Events queued before some are dropped.
+    """
+
+    def __init__(self, maxlen=256):
+        self.maxlen = maxlen
+        self.published = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._events = deque()
+        self._subscribers = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def subscribe(self, callback, *types):
+        """Call `callback(event)` for every event, or only for `types`"""
+        with self._condition:
+            self._subscribers = self._subscribers + [(callback, types or EVENTS)]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._condition:
+            self._subscribers = [(c, t) for c, t in self._subscribers
+                                 if c is not callback]
+
+    def publish(self, event):
+        """Queue an event, returns immediately"""
+        with self._condition:
+            if self.closed:
+                return
+            if len(self._events) >= self.maxlen:
+                self._drop()
+            self._events.append(event)
+            self.published += 1
+            self._condition.notify()
+
+    def _drop(self):
+        self.dropped += 1
+        for number, event in enumerate(self._events):
+            if isinstance(event, CONTINUOUS):
+                del self._events[number]
+                return
+        self._events.popleft()
+
+    def start(self):
+        """Start the dispatcher thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pygac-events",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._events and not self.closed:
+                    self._condition.wait()
+                if not self._events:
+                    return
+                event = self._events.popleft()
+                subscribers = self._subscribers
+
+            for callback, types in subscribers:
+                if isinstance(event, types):
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(e)
+
+    def close(self, timeout=1.0):
+        """Deliver what is queued, then stop the dispatcher"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def report(self):
+        return {"published": self.published, "dropped": self.dropped}
+
+
+class ConsoleRenderer(object):
+    """Volume bar and last gesture on the terminal, redrawn at most `max_rate` Hz"""
+
+    def __init__(self, max_rate=10.0, stream=None):
+        self.period = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.stream = stream or sys.stdout
+        self.percentage = None
+        self.gesture = ""
+        self._drawn = 0.0
+        self._dirty = False
+
+    def attach(self, bus):
+        bus.subscribe(self, Volume, Open, Close,
+                      RotateClockwise, RotateCounterClockwise)
+        return self
+
+    def __call__(self, event):
+        if isinstance(event, Volume):
+            self.percentage = event.percentage
+        else:
+            self.gesture = type(event).__name__
+        self._dirty = True
+
+        now = time.monotonic()
+        if now - self._drawn >= self.period:
+            self.draw()
+            self._drawn = now
+
+    def draw(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        bar = "" if self.percentage is None else "%3d%% %s" % (
+            self.percentage, "=" * (self.percentage // 2))
+        self.stream.write("\r%-60s %-24s" % (bar, self.gesture))
+        self.stream.flush()
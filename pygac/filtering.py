@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Landmark smoothing and predictive frame skipping.
+
+Every landmark goes through a One-Euro filter (Casiez et al., 2012): a
+low-pass filter whose cutoff rises with the landmark's speed, so a still
+hand stops jittering while a moving one does not lag. The filtered speed
+doubles as a constant-velocity model, which lets frames between two
+detections be predicted instead of running MediaPipe on them.
+
+How many frames are skipped adapts to how well that works: after each
+detection the prediction for that frame is compared with what was
+detected. While the error stays below `tolerance` one more frame is
+skipped per detection, up to `max_skip`; a larger error halves it.
+"""
+
+import math
+
+import numpy as np
+
+from .landmarks import NUM_LANDMARKS
+
+
+def smoothing_factor(elapsed, cutoff):
+    """Exponential smoothing factor of a low-pass filter at `cutoff` Hz"""
+    r = 2 * math.pi * cutoff * elapsed
+    return r / (r + 1)
+
+
+class OneEuroFilter(object):
+    """One-Euro filter over an (N x dims) array of points
+
+    ARGUMENTS:
+        - min_cutoff        float() Cutoff in Hz at rest, lower is smoother.
+        - beta              float() How fast the cutoff rises with speed,
+                            higher lags less.
+        - d_cutoff          float() Cutoff in Hz of the speed estimate.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.velocity = None
+        self.time = None
+
+    def __call__(self, value, timestamp):
+        """Filter `value` in place and return it"""
+        if self.value is None:
+            self.value = value.astype(np.float64)
+            self.velocity = np.zeros_like(self.value)
+            self.time = timestamp
+            return value
+
+        elapsed = timestamp - self.time
+        if elapsed <= 0:
+            value[...] = self.value
+            return value
+
+        velocity = (value - self.value) / elapsed
+        self.velocity += smoothing_factor(elapsed, self.d_cutoff) * (velocity - self.velocity)
+
+        # Per point, all coordinates of a landmark share one cutoff
+        speed = np.sqrt((self.velocity ** 2).sum(axis=-1, keepdims=True))
+        alpha = smoothing_factor(elapsed, self.min_cutoff + self.beta * speed)
+        self.value += alpha * (value - self.value)
+        self.time = timestamp
+
+        value[...] = self.value
+        return value
+
+    def predict(self, timestamp, out):
+        """Extrapolate at the filtered velocity into `out`"""
+        np.multiply(self.velocity, timestamp - self.time, out=out, casting="unsafe")
+        out += self.value
+        return out
+
+
+class LandmarkFilter(object):
+    """One-Euro filters for the hands in a `HandLandmarks`
+
+    Hands are told apart by their handedness, a hand that disappears
+    loses its state. Image and world landmarks are filtered separately
+    with the same settings.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0):
+        self.options = dict(min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff)
+        self.filters = {}  # (handedness, occurrence) -> points and world filters
+        self.keys = []  # Hands of the last detection, in order
+        self._predicted = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+
+    def _keys(self, landmarks):
+        keys = []
+        for hand in range(landmarks.count):
+            label = landmarks.handedness[hand]
+            keys.append((label, sum(1 for key in keys if key[0] == label)))
+        return keys
+
+    def update(self, landmarks, timestamp):
+        """Smooth a detection in place
+
+        RETURNS:
+            - float()           Largest mean distance, in normalized image
+                                units, between the prediction for this frame
+                                and what was detected. None without a
+                                hand seen on the previous detection.
+        """
+        errors = []
+        keys = self._keys(landmarks)
+        for hand, key in enumerate(keys):
+            filters = self.filters.get(key)
+            if filters is None:
+                filters = self.filters[key] = (OneEuroFilter(**self.options),
+                                               OneEuroFilter(**self.options))
+            else:
+                predicted = filters[0].predict(timestamp, self._predicted)
+                delta = predicted[:, :2] - landmarks.points[hand, :, :2]
+                errors.append(float(np.sqrt((delta ** 2).sum(axis=-1)).mean()))
+
+            filters[0](landmarks.points[hand], timestamp)
+            filters[1](landmarks.world[hand], timestamp)
+
+        for key in list(self.filters):
+            if key not in keys:
+                del self.filters[key]
+        self.keys = keys
+
+        return max(errors) if errors else None
+
+    def predict(self, landmarks, timestamp):
+        """Load the predicted hands for `timestamp` into `landmarks`"""
+        landmarks.count = min(len(self.keys), landmarks.max_num_hands)
+        for hand in range(landmarks.count):
+            key = self.keys[hand]
+            points, world = self.filters[key]
+            points.predict(timestamp, landmarks.points[hand])
+            world.predict(timestamp, landmarks.world[hand])
+            landmarks.handedness[hand] = key[0]
+        return landmarks.count
+
+    def reset(self):
+        self.filters.clear()
+        self.keys = []
+
+
+class FrameSkipper(object):
+    """Decides which frames run hand detection
+
+    ARGUMENTS:
+        - max_skip          int() Most frames predicted in a row.
+        - tolerance         float() Prediction error, in normalized image
+                            units, up to which skipping increases.
+    """
+
+    def __init__(self, max_skip=3, tolerance=0.01):
+        self.max_skip = max_skip
+        self.tolerance = tolerance
+        self.skip = 0  # Frames predicted after each detection
+        self.pending = 0  # Left until the next detection
+
+        self.detections = 0
+        self.predictions = 0
+        self.errors = 0
+        self.error_total = 0.0
+        self.error_max = 0.0
+
+    def detect_now(self):
+        """True if this frame has to run detection"""
+        if self.pending > 0:
+            self.pending -= 1
+            self.predictions += 1
+            return False
+        self.detections += 1
+        return True
+
+    def detected(self, count, error):
+        """Adapt to the prediction error of the detection that just ran"""
+        if not count or error is None:
+            # Nothing to predict from, or a hand just appeared
+            self.skip = 0
+        else:
+            self.errors += 1
+            self.error_total += error
+            self.error_max = max(self.error_max, error)
+            if error <= self.tolerance:
+                self.skip = min(self.max_skip, self.skip + 1)
+            else:
+                self.skip //= 2
+        self.pending = self.skip
+
+    def report(self):
+        frames = self.detections + self.predictions
+        return {
+            "frames": frames,
+            "detections": self.detections,
+            "predicted": round(self.predictions / frames, 4) if frames else 0.0,
+            "skip": self.skip,
+            "mean_error": round(self.error_total / self.errors, 5) if self.errors else 0.0,
+            "max_error": round(self.error_max, 5),
+        }
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Reusable frame buffers.
+
+Frames are captured into a small ring of preallocated BGR buffers and
+converted into a preallocated RGB buffer through OpenCV's `dst=`
+outputs, so steady state processing allocates no new images.
+"""
+
+import numpy as np
+
+
+class FramePool(object):
+    """Ring of capture buffers plus one buffer per derived image"""
+
+    def __init__(self, size=2):
+        # A buffer must not be reused while a frame in it is queued or
+        # being processed, see Pipeline for how many are in flight
+        self.size = max(1, size)
+        self._captures = [None] * self.size
+        self._next = 0
+        self._buffers = {}
+
+    def capture_buffer(self):
+        """Buffer for the next `VideoCapture.read`, None until the size is known"""
+        buffer = self._captures[self._next]
+        return buffer
+
+    def captured(self, frame):
+        """Register the frame returned by `VideoCapture.read`"""
+        # OpenCV only writes in place when the shape matches, otherwise
+        # it allocates; keep whatever it returned for the next round
+        self._captures[self._next] = frame
+        self._next = (self._next + 1) % self.size
+        return frame
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        """Named scratch buffer, reallocated only when the shape changes"""
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer
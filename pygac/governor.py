@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Adaptive frame-rate governor.
+
+While hands are visible frames are processed at up to `max_fps`. After
+`idle_after` seconds without a hand the governor drops to `idle_fps` and
+asks for downscaled frames, which is enough to notice a hand entering
+the view. The first detection switches straight back to full rate.
+"""
+
+import time
+
+from .utils import CvFpsCalc
+
+ACTIVE = "active"
+IDLE = "idle"
+
+
+class FrameRateGovernor(object):
+    """Paces the main loop and tracks CPU time per power state"""
+
+    def __init__(self, max_fps=30, idle_fps=5, idle_after=2.0, idle_scale=0.5):
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.idle_scale = idle_scale
+
+        self.state = ACTIVE
+        self.transitions = 0
+
+        self.cpu_time = {ACTIVE: 0.0, IDLE: 0.0}
+        self.wall_time = {ACTIVE: 0.0, IDLE: 0.0}
+        self.frames = {ACTIVE: 0, IDLE: 0}
+        self.fps = 0.0  # Rolling average in the current state
+        self._fps_calc = {ACTIVE: CvFpsCalc(buffer_len=10), IDLE: CvFpsCalc(buffer_len=10)}
+
+        now = time.monotonic()
+        self._last_seen = now
+        self._deadline = now
+        self._clock = now
+        self._cpu_clock = time.process_time()
+
+    @property
+    def scale(self):
+        """Factor to resize frames by before hand detection"""
+        return self.idle_scale if self.state == IDLE else 1.0
+
+    def _period(self):
+        fps = self.idle_fps if self.state == IDLE else self.max_fps
+        return 1.0 / fps if fps > 0 else 0.0
+
+    def wait(self):
+        """Sleep until the next frame is due in the current state"""
+        now = time.monotonic()
+        if self._deadline > now:
+            time.sleep(self._deadline - now)
+            now = self._deadline
+        self._deadline = now + self._period()
+
+    def _account(self):
+        now = time.monotonic()
+        cpu = time.process_time()
+        self.wall_time[self.state] += now - self._clock
+        self.cpu_time[self.state] += cpu - self._cpu_clock
+        self._clock, self._cpu_clock = now, cpu
+        return now
+
+    def update(self, hands_visible):
+        """Report whether the last frame had hands, returns the new state"""
+        now = self._account()
+        self.frames[self.state] += 1
+        self.fps = self._fps_calc[self.state].get()
+
+        if hands_visible:
+            self._last_seen = now
+            if self.state == IDLE:
+                self.state = ACTIVE
+                self.transitions += 1
+                self._deadline = now  # Next frame right away, at full size
+        elif (self.state == ACTIVE and self.idle_fps > 0
+              and now - self._last_seen > self.idle_after):
+            self.state = IDLE
+            self.transitions += 1
+
+        return self.state
+
+    def report(self):
+        """CPU time, wall time and frame rate per state"""
+        self._account()
+        report = {}
+        for state in (ACTIVE, IDLE):
+            wall = self.wall_time[state]
+            report[state] = {
+                "frames": self.frames[state],
+                "wall_s": round(wall, 3),
+                "cpu_s": round(self.cpu_time[state], 3),
+                "cpu_load": round(self.cpu_time[state] / wall, 3) if wall else 0.0,
+                "fps": round(self.frames[state] / wall, 2) if wall else 0.0,
+            }
+        report["transitions"] = self.transitions
+        return report
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Vectorized hand landmark preprocessing.
+
+All hands of a frame are stored in one preallocated (hands x 21 x 3)
+float32 array and projected, normalized and boxed as batched NumPy
+operations. The buffers returned are the ones fed to the classifiers.
+tests/test_landmarks.py checks them against the per-landmark list
+helpers they replaced.
+"""
+
+import itertools
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 2  # x and y per landmark
+
+MIRRORED_HANDEDNESS = {"Left": "Right", "Right": "Left"}
+
+
+def _flatten(landmarks):
+    """Yield x, y, z for every landmark of a MediaPipe landmark list"""
+    return itertools.chain.from_iterable(
+        (landmark.x, landmark.y, landmark.z) for landmark in landmarks.landmark)
+
+
+class HandLandmarks(object):
+    """Preallocated landmark buffers for up to `max_num_hands` hands"""
+
+    def __init__(self, max_num_hands=2):
+        self.max_num_hands = max_num_hands
+        self.count = 0
+        self.handedness = [""] * max_num_hands
+
+        # MediaPipe stores coordinates as 32-bit floats, so nothing is lost
+        self.points = np.zeros((max_num_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.world = np.zeros((max_num_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+
+        self.pixels = np.zeros((max_num_hands, NUM_LANDMARKS, 2), dtype=np.int32)
+        self.features = np.zeros((max_num_hands, NUM_FEATURES), dtype=np.float32)
+        self.brects = np.zeros((max_num_hands, 4), dtype=np.int32)
+
+        self._scale = np.empty(2, dtype=np.float64)
+        self._projected = np.empty((max_num_hands, NUM_LANDMARKS, 2), dtype=np.float64)
+        self._relative = np.empty((max_num_hands, NUM_LANDMARKS, 2), dtype=np.int32)
+        self._abs = np.empty((max_num_hands, NUM_FEATURES), dtype=np.int32)
+        self._max_abs = np.empty((max_num_hands, 1), dtype=np.int32)
+
+    def load(self, multi_hand_landmarks, multi_hand_world_landmarks=None,
+             multi_handedness=None):
+        """Copy a MediaPipe result into the landmark buffers"""
+        self.count = min(len(multi_hand_landmarks), self.max_num_hands)
+
+        for index in range(self.count):
+            self.points[index].reshape(-1)[:] = np.fromiter(
+                _flatten(multi_hand_landmarks[index]),
+                dtype=np.float32, count=NUM_LANDMARKS * 3)
+
+            if multi_hand_world_landmarks is not None:
+                self.world[index].reshape(-1)[:] = np.fromiter(
+                    _flatten(multi_hand_world_landmarks[index]),
+                    dtype=np.float32, count=NUM_LANDMARKS * 3)
+
+            if multi_handedness is not None:
+                self.handedness[index] = multi_handedness[index].classification[0].label
+
+        return self.count
+
+    def mirror(self):
+        """Mirror horizontally, as if the frame had been flipped before detection"""
+        n = self.count
+        np.subtract(1.0, self.points[:n, :, 0], out=self.points[:n, :, 0])
+        np.negative(self.world[:n, :, 0], out=self.world[:n, :, 0])
+        for index in range(n):
+            self.handedness[index] = MIRRORED_HANDEDNESS.get(
+                self.handedness[index], self.handedness[index])
+
+    def project(self, image_width, image_height):
+        """Pixel coordinates of every landmark, same as `calc_landmark_list`"""
+        n = self.count
+        self._scale[0], self._scale[1] = image_width, image_height
+
+        projected = self._projected[:n]
+        np.multiply(self.points[:n, :, :2], self._scale, out=projected)
+        np.trunc(projected, out=projected)
+        np.minimum(projected, self._scale - 1, out=projected)
+        self.pixels[:n] = projected
+
+        return self.pixels[:n]
+
+    def normalize(self):
+        """Wrist relative, max-abs scaled features, same as `pre_process_landmark`"""
+        n = self.count
+
+        relative = self._relative[:n]
+        np.subtract(self.pixels[:n], self.pixels[:n, :1], out=relative)
+
+        max_abs = self._max_abs[:n]
+        np.abs(relative.reshape(n, -1), out=self._abs[:n])
+        np.max(self._abs[:n], axis=1, keepdims=True, out=max_abs)
+        max_abs[max_abs == 0] = 1  # A degenerate hand collapsed to a point
+
+        np.divide(relative.reshape(n, -1), max_abs, out=self.features[:n],
+                  casting="same_kind")
+
+        return self.features[:n]
+
+    def bounding_rects(self):
+        """Bounding boxes as [x0, y0, x1, y1], same as `calc_bounding_rect`"""
+        n = self.count
+
+        np.min(self.pixels[:n], axis=1, out=self.brects[:n, :2])
+        np.max(self.pixels[:n], axis=1, out=self.brects[:n, 2:])
+        self.brects[:n, 2:] += 1  # cv.boundingRect is inclusive
+
+        return self.brects[:n]
+
+    def process(self, image_width, image_height):
+        """Project and normalize in one go, returns the classifier input"""
+        self.project(image_width, image_height)
+        return self.normalize()
+
+
+class PointHistory(object):
+    """Fixed-size fingertip history in a ring buffer
+
+    Every point is written twice, at `i` and `i + length`, so the last
+    `length` points are always one contiguous slice and the classifier
+    features are a single vectorized subtraction into a reused buffer.
+    """
+
+    def __init__(self, length=16):
+        self.length = length
+        self.count = 0
+        self._head = 0  # Oldest point
+        self._points = np.zeros((2 * length, 2), dtype=np.float64)
+        self._relative = np.zeros((length, 2), dtype=np.float64)
+        self._scale = np.ones(2, dtype=np.float64)
+        self.features = np.zeros(length * 2, dtype=np.float32)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count == self.length
+
+    def append(self, x, y):
+        if self.count < self.length:
+            index = self.count
+            self.count += 1
+        else:
+            index = self._head
+            self._head = (self._head + 1) % self.length
+
+        self._points[index] = self._points[index + self.length] = x, y
+
+    def window(self):
+        """View of the stored points, oldest first, no copy"""
+        return self._points[self._head:self._head + self.count]
+
+    def feature_view(self, image_width, image_height):
+        """Points relative to the oldest one, scaled by the image size
+
+        Same values as `pre_process_point_history`, written into
+        `features` which is returned as a view of `2 * len(self)` floats.
+        """
+        n = self.count
+        window = self.window()
+        relative = self._relative[:n]
+        self._scale[0], self._scale[1] = image_width, image_height
+
+        np.subtract(window, window[:1], out=relative)
+        relative /= self._scale
+        self.features[:2 * n].reshape(n, 2)[:] = relative
+
+        return self.features[:2 * n]
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Always-on instrumentation.
+
+Frame stages are timed with the same begin/mark/end calls as
+profiling.StageRecorder and kept in log-linear histograms (the layout
+HdrHistogram uses), so recording is a few integer operations and
+memory stays constant however long the program runs. The numbers are
+served in the Prometheus text format, printed as a JSON line every few
+seconds, or both. A sampling profiler can be started with SIGUSR1 and
+writes folded stacks that flamegraph.pl or speedscope can draw.
+
+    python3 app.py --metrics_port 9464 --metrics_log 10
+    curl localhost:9464/metrics
+    kill -USR1 <pid>
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram(object):
+    """Log-linear histogram of durations
+
+    Values are counted in nanoseconds with `precision` significant bits,
+    every bucket is within 2 ** -precision of the values in it. One
+    thread records into a histogram, others may read it at any time.
+    """
+
+    def __init__(self, precision=4, max_exponent=40):
+        self.precision = precision
+        self.sub_buckets = 1 << precision
+        self.counts = [0] * ((max_exponent + 1) * self.sub_buckets)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value):
+        if value < self.sub_buckets:
+            return value
+        exponent = value.bit_length() - self.precision
+        index = exponent * self.sub_buckets + (value >> (exponent - 1)) - self.sub_buckets
+        return min(index, len(self.counts) - 1)
+
+    def _upper(self, index):
+        """Largest value counted in bucket `index`"""
+        if index < self.sub_buckets:
+            return index
+        exponent, mantissa = divmod(index, self.sub_buckets)
+        return ((mantissa + self.sub_buckets + 1) << (exponent - 1)) - 1
+
+    def record(self, seconds):
+        value = int(seconds * 1e9)
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Value at quantile `q` (0 - 1) in seconds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self._upper(index), self.max) / 1e9
+        return self.max / 1e9
+
+    def summary(self):
+        """Milliseconds, rounded for printing"""
+        summary = {"count": self.count,
+                   "mean_ms": round(self.total / self.count / 1e6, 3) if self.count else 0.0}
+        for q in QUANTILES:
+            summary["p%s_ms" % str(q * 100).rstrip("0").rstrip(".")] = round(
+                self.quantile(q) * 1000, 3)
+        summary["max_ms"] = round(self.max / 1e6, 3)
+        return summary
+
+
+class Metrics(object):
+    """Span histograms, usable wherever a StageRecorder is"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.frames = 0
+        self.marks = 0
+        self.started = time.monotonic()
+
+        self._frame = {}
+        self._frame_start = None
+        self._last = None
+        self._logged = (self.started, 0)
+
+        self.mark_cost = self._calibrate()
+
+    def _calibrate(self, iterations=2000):
+        """Seconds one begin/mark/end round costs, for the overhead estimate"""
+        probe = Metrics.__new__(Metrics)
+        probe.histograms, probe._frame = {}, {}
+        probe.frames = probe.marks = 0
+        probe._frame_start = probe._last = None
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            probe.begin()
+            probe.mark("probe")
+            probe.end()
+        return (time.perf_counter() - start) / iterations / 3
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def record(self, name, seconds):
+        """Add one span measured elsewhere, e.g. on another thread"""
+        self.histogram(name).record(seconds)
+
+    def begin(self):
+        """Start of a frame"""
+        self._frame.clear()
+        self._frame_start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """End of `stage`, the next stage starts now"""
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        self._frame[stage] = self._frame.get(stage, 0.0) + now - self._last
+        self._last = now
+        self.marks += 1
+
+    def end(self):
+        """End of a frame"""
+        if self._frame_start is None:
+            return
+        self.histogram("frame").record(time.perf_counter() - self._frame_start)
+        for stage, seconds in self._frame.items():
+            self.histogram(stage).record(seconds)
+        self.frames += 1
+        self._frame_start = self._last = None
+
+    def overhead(self):
+        """Share of frame time spent in the instrumentation itself"""
+        frame = self.histograms.get("frame")
+        if frame is None or not frame.total:
+            return 0.0
+        calls = self.marks + 2 * self.frames
+        return calls * self.mark_cost / (frame.total / 1e9)
+
+    def report(self):
+        now = time.monotonic()
+        since, frames = self._logged
+        self._logged = (now, self.frames)
+        return {
+            "frames": self.frames,
+            "fps": round((self.frames - frames) / (now - since), 2) if now > since else 0.0,
+            "overhead": round(self.overhead(), 5),
+            "spans": {name: histogram.summary()
+                      for name, histogram in list(self.histograms.items())},
+        }
+
+    def prometheus(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = [
+            "# HELP pygac_frames_total Frames processed.",
+            "# TYPE pygac_frames_total counter",
+            "pygac_frames_total %d" % self.frames,
+            "# HELP pygac_instrumentation_overhead_ratio Share of frame time spent timing.",
+            "# TYPE pygac_instrumentation_overhead_ratio gauge",
+            "pygac_instrumentation_overhead_ratio %.6f" % self.overhead(),
+            "# HELP pygac_span_seconds Time spent per frame stage.",
+            "# TYPE pygac_span_seconds summary",
+        ]
+        for name, histogram in sorted(list(self.histograms.items())):
+            for q in QUANTILES:
+                lines.append('pygac_span_seconds{span="%s",quantile="%s"} %.9f' % (
+                    name, q, histogram.quantile(q)))
+            lines.append('pygac_span_seconds_sum{span="%s"} %.9f' % (name, histogram.total / 1e9))
+            lines.append('pygac_span_seconds_count{span="%s"} %d' % (name, histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer(object):
+    """Serves `Metrics.prometheus()` on http://host:port/metrics"""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       name="pygac-metrics", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonLogger(object):
+    """Prints `Metrics.report()` as one JSON line every `interval` seconds"""
+
+    def __init__(self, metrics, interval, stream=None):
+        self.metrics = metrics
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="pygac-metrics-log",
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.stream.write(json.dumps(self.metrics.report()) + "\n")
+            self.stream.flush()
+
+    def close(self):
+        self._stop.set()
+
+
+class SamplingProfiler(object):
+    """Samples the stacks of every thread and writes folded stacks
+
+    ARGUMENTS:
+        - directory         str() Where flamegraphs are written.
+        - seconds           float() How long one run samples for.
+        - rate              float() Samples per second.
+    """
+
+    def __init__(self, directory, seconds=10.0, rate=100.0):
+        self.directory = directory
+        self.seconds = seconds
+        self.rate = rate
+        self._thread = None
+
+    def trigger(self, *args):
+        """Start a run in the background, safe to use as a signal handler"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, name="pygac-profiler",
+                                        daemon=True)
+        self._thread.start()
+
+    def sample(self):
+        """Folded stack of every thread except this one"""
+        stacks = []
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s (%s:%d)" % (code.co_name,
+                                             os.path.basename(code.co_filename),
+                                             code.co_firstlineno))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks.append(";".join(reversed(stack)))
+        return stacks
+
+    def run(self):
+        """Sample for `seconds`, returns the path written"""
+        stacks = Counter()
+        period = 1.0 / self.rate
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            stacks.update(self.sample())
+            time.sleep(period)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "flamegraph-%d-%d.folded" % (
+            os.getpid(), int(time.time())))
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write("%s %d\n" % (stack, count))
+        print("Flamegraph written to %s" % path)
+        return path
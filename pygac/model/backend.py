@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+TFLite interpreter backends.
+
+The classifiers only need an Interpreter, so the lightest package that
+provides one is used: `tflite_runtime`, then `ai_edge_litert`, and full
+TensorFlow only as a last resort. Without any of them, models exported
+with `pygac.model.numpy_engine` run on plain NumPy.
+"""
+
+import os
+import time
+
+BACKENDS = ("tflite_runtime", "ai_edge_litert", "tensorflow", "numpy")
+
+
+def _import_backend(name):
+    """The Interpreter class and OpResolverType enum of a backend"""
+    if name == "tflite_runtime":
+        from tflite_runtime import interpreter
+    elif name == "ai_edge_litert":
+        from ai_edge_litert import interpreter
+    elif name == "numpy":
+        from .numpy_engine import NumpyInterpreter
+        return NumpyInterpreter, None
+    elif name == "tensorflow":
+        import tensorflow as tf
+        return tf.lite.Interpreter, getattr(tf.lite.experimental, "OpResolverType", None)
+    else:
+        raise ValueError("Unknown TFLite backend: %s" % name)
+
+    # Older releases have no OpResolverType and always apply XNNPACK
+    return interpreter.Interpreter, getattr(interpreter, "OpResolverType", None)
+
+
+_resolved = {}
+
+
+def resolve(backend="auto", model_path=None):
+    """Name, Interpreter and OpResolverType of the backend to use"""
+    names = BACKENDS if backend in (None, "auto") else (backend,)
+
+    for name in names:
+        if (name == "numpy" and backend in (None, "auto") and model_path is not None
+                and not os.path.exists(os.path.splitext(model_path)[0] + ".npz")):
+            continue  # Not exported
+        if name not in _resolved:
+            try:
+                _resolved[name] = _import_backend(name)
+            except ImportError:
+                _resolved[name] = None
+        if _resolved[name] is not None:
+            return (name,) + _resolved[name]
+
+    raise ImportError("No TFLite interpreter available, install one of: %s"
+                      % ", ".join(names))
+
+
+def load_interpreter(model_path, num_threads=1, xnnpack=True, backend="auto"):
+    """Create an Interpreter for `model_path`
+
+    ARGUMENTS:
+        - model_path        str() Path to a .tflite file.
+        - num_threads       int() Threads used by the interpreter.
+        - xnnpack           bool() Apply the default XNNPACK delegate.
+        - backend           str() "auto" or one of BACKENDS.
+    RETURNS:
+        - Interpreter       Not yet allocated.
+        - str()             Name of the backend used.
+        - float()           Seconds it took, import included.
+    """
+    start = time.perf_counter()
+
+    name, Interpreter, OpResolverType = resolve(backend, model_path)
+
+    options = {}
+    if OpResolverType is not None:
+        if xnnpack:
+            options["experimental_op_resolver_type"] = OpResolverType.AUTO
+        else:
+            options["experimental_op_resolver_type"] = \
+                OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+
+    interpreter = Interpreter(model_path=model_path,
+                              num_threads=num_threads,
+                              **options)
+
+    return interpreter, name, time.perf_counter() - start
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+
+from .backend import load_interpreter
+from ..pipeline import LatencyCounter
+
+
+class TFLiteClassifier(object):
+    """TFLite model classifying up to `max_batch` hands per invoke"""
+
+    def __init__(
+        self,
+        model_path,
+        num_threads=1,
+        max_batch=1,
+        xnnpack=True,
+        backend="auto",
+    ):
+        self.interpreter, self.backend, self.load_time = load_interpreter(
+            model_path, num_threads=num_threads, xnnpack=xnnpack, backend=backend)
+        self.invoke_latency = LatencyCounter()
+
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+        self.input_index = self.input_details[0]['index']
+        self.output_index = self.output_details[0]['index']
+        self.num_inputs = int(self.input_details[0]['shape'][-1])
+
+        # Resized once, every call reuses the same input tensor
+        self.max_batch = max_batch
+        self.interpreter.resize_tensor_input(self.input_index,
+                                             [max_batch, self.num_inputs])
+        self.interpreter.allocate_tensors()
+
+        # Callables returning views of the interpreter's own buffers. The
+        # views must not be kept across invoke(), so they are fetched per call
+        self._input = self.interpreter.tensor(self.input_index)
+        self._output = self.interpreter.tensor(self.output_index)
+
+        # Full-integer models take and return quantized tensors
+        self.input_dtype = np.dtype(self.input_details[0]['dtype'])
+        self.input_quantization = self.input_details[0].get('quantization', (0.0, 0))
+        self.output_quantization = self.output_details[0].get('quantization', (0.0, 0))
+        self.quantized_input = self.input_dtype.kind in "iu"
+        self.quantized_output = np.dtype(self.output_details[0]['dtype']).kind in "iu"
+
+    def classify_batch(self, inputs):
+        """Classify an (N x num_inputs) array in a single invoke
+
+        RETURNS:
+            - np.ndarray        argmax index per row
+            - np.ndarray        confidence of that index per row
+        """
+        n = len(inputs)
+        if n > self.max_batch:
+            raise ValueError("Batch of %d exceeds max_batch=%d" % (n, self.max_batch))
+
+        if self.quantized_input:
+            scale, zero_point = self.input_quantization
+            limits = np.iinfo(self.input_dtype)
+            self._input()[:n] = np.clip(np.rint(np.asarray(inputs) / scale + zero_point),
+                                        limits.min, limits.max)
+        else:
+            self._input()[:n] = inputs
+        start = time.perf_counter()
+        self.interpreter.invoke()
+        self.invoke_latency.add(time.perf_counter() - start)
+
+        result = self._output()[:n]
+        indices = np.argmax(result, axis=1)
+        confidences = result[np.arange(n), indices]
+        if self.quantized_output:
+            scale, zero_point = self.output_quantization
+            confidences = (confidences.astype(np.float32) - zero_point) * scale
+
+        return indices, confidences
+
+    def report(self):
+        """Backend, load time and invoke latency"""
+        return {
+            "backend": self.backend,
+            "load_ms": round(self.load_time * 1000, 3),
+            "invoke": self.invoke_latency.summary(),
+        }
+
+    def __call__(
+        self,
+        inputs,
+    ):
+        indices, _ = self.classify_batch(
+            np.asarray(inputs, dtype=np.float32).reshape(1, -1))
+
+        return indices[0]
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+NumPy inference for the bundled classifiers.
+
+Both models are a handful of dense layers, so a forward pass is a few
+small matrix products. `export` writes the weights of a trained model
+to an `.npz` next to its `.tflite`, and `NumpyInterpreter` runs it with
+the subset of the TFLite Interpreter API the classifiers use, which
+lets a deployment run without any TensorFlow package.
+
+    python3 -m pygac.model.numpy_engine export
+    python3 -m pygac.model.numpy_engine compare
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+MODELS = {
+    "keypoint_classifier": (
+        'pygac/model/keypoint_classifier/keypoint_classifier',
+        'pygac/model/keypoint_classifier/keypoint.csv'),
+    "point_history_classifier": (
+        'pygac/model/point_history_classifier/point_history_classifier',
+        'pygac/model/point_history_classifier/point_history.csv'),
+}
+
+ACTIVATIONS = ("linear", "relu", "softmax")
+
+
+def weights_path(model_path):
+    """The .npz belonging to a .tflite or .hdf5 model"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def read_hdf5(path):
+    """Dense layers of a Keras .hdf5 model as (kernel, bias, activation)"""
+    import h5py
+
+    layers = []
+    with h5py.File(path, "r") as f:
+        config = f.attrs["model_config"]
+        if isinstance(config, bytes):
+            config = config.decode("utf-8")
+        config = json.loads(config)["config"]
+        if isinstance(config, dict):  # Sequential models nest their layers
+            config = config["layers"]
+
+        weights = f["model_weights"]
+        for layer in config:
+            if layer["class_name"] != "Dense":
+                continue  # Dropout and InputLayer do nothing at inference
+            name = layer["config"]["name"]
+            group = weights[name]
+            kernel, bias = (np.array(group[weight_name.decode("utf-8")
+                                           if isinstance(weight_name, bytes)
+                                           else weight_name])
+                            for weight_name in group.attrs["weight_names"])
+            layers.append((kernel, bias, layer["config"]["activation"]))
+
+    return layers
+
+
+def read_tflite(path):
+    """Dense layers of a float .tflite model as (kernel, bias, activation)
+
+    Fused activations are not exposed by the interpreter, so hidden
+    layers are taken to be ReLU as in the bundled models. The op list
+    comes from the interpreter's private `_get_ops_details`, the .hdf5
+    is the safer source where there is one. Quantized models are
+    refused, their weights would need the quantization parameters.
+    """
+    from .backend import resolve
+
+    name, Interpreter, _ = resolve("auto")
+    if name == "numpy":
+        raise ImportError("A TFLite interpreter is needed to read .tflite files")
+    interpreter = Interpreter(model_path=path)
+    interpreter.allocate_tensors()
+
+    get_ops_details = getattr(interpreter, "_get_ops_details", None)
+    if get_ops_details is None:
+        raise ImportError("The %s interpreter does not list its ops, export from "
+                          "the .hdf5 instead" % name)
+    ops = get_ops_details()
+    quantizing = sorted({op["op_name"] for op in ops} & {"QUANTIZE", "DEQUANTIZE"})
+    if quantizing:
+        raise ValueError("%s is quantized (%s), only float models can be exported"
+                         % (path, ", ".join(quantizing)))
+
+    tensors = {tensor["index"]: tensor for tensor in interpreter.get_tensor_details()}
+    dense = [op for op in ops if op["op_name"] == "FULLY_CONNECTED"]
+    softmax = any(op["op_name"] == "SOFTMAX" for op in ops)
+
+    layers = []
+    for number, op in enumerate(dense):
+        _, kernel, bias = op["inputs"]
+        for index in (kernel, bias):
+            tensor = tensors[index]
+            if (np.dtype(tensor["dtype"]) != np.float32
+                    or tuple(tensor["quantization"]) != (0.0, 0)):
+                raise ValueError("%s has %s weights in %s, only float models can "
+                                 "be exported" % (path, np.dtype(tensor["dtype"]),
+                                                  tensor["name"]))
+        activation = "relu"
+        if number == len(dense) - 1:
+            activation = "softmax" if softmax else "linear"
+        layers.append((interpreter.get_tensor(kernel).T.copy(),
+                       interpreter.get_tensor(bias).copy(),
+                       activation))
+
+    return layers
+
+
+def export(source, destination=None):
+    """Write the dense layers of `source` (.hdf5 or .tflite) to an .npz"""
+    if source.endswith((".hdf5", ".h5")):
+        layers = read_hdf5(source)
+    else:
+        layers = read_tflite(source)
+
+    arrays = {}
+    for number, (kernel, bias, activation) in enumerate(layers):
+        if activation not in ACTIVATIONS:
+            raise ValueError("Unsupported activation: %s" % activation)
+        arrays["kernel_%d" % number] = np.asarray(kernel, dtype=np.float32)
+        arrays["bias_%d" % number] = np.asarray(bias, dtype=np.float32)
+    arrays["activations"] = np.array([layer[2] for layer in layers])
+
+    destination = destination or weights_path(source)
+    np.savez(destination, **arrays)
+    return destination
+
+
+class NumpyInterpreter(object):
+    """Runs an exported model through the TFLite Interpreter API"""
+
+    INPUT, OUTPUT = 0, 1
+
+    def __init__(self, model_path, num_threads=1, **kwargs):
+        data = np.load(weights_path(model_path))
+        activations = [str(a) for a in data["activations"]]
+        self.layers = [(data["kernel_%d" % n], data["bias_%d" % n], activation)
+                       for n, activation in enumerate(activations)]
+
+        self.num_inputs = self.layers[0][0].shape[0]
+        self.num_outputs = self.layers[-1][0].shape[1]
+
+        self._batch = 1
+        self._buffers = []
+        self._tensors = {}
+        self.allocate_tensors()
+
+    def _details(self, index, name, width):
+        return [{
+            "name": name,
+            "index": index,
+            "shape": np.array([self._batch, width], dtype=np.int32),
+            "dtype": np.float32,
+            "quantization": (0.0, 0),
+        }]
+
+    def get_input_details(self):
+        return self._details(self.INPUT, "input", self.num_inputs)
+
+    def get_output_details(self):
+        return self._details(self.OUTPUT, "output", self.num_outputs)
+
+    def resize_tensor_input(self, index, shape):
+        self._batch = int(shape[0])
+
+    def allocate_tensors(self):
+        batch = self._batch
+        self._tensors[self.INPUT] = np.zeros((batch, self.num_inputs), dtype=np.float32)
+        self._buffers = [np.zeros((batch, kernel.shape[1]), dtype=np.float32)
+                         for kernel, _, _ in self.layers]
+        self._tensors[self.OUTPUT] = self._buffers[-1]
+
+    def tensor(self, index):
+        return lambda: self._tensors[index]
+
+    def set_tensor(self, index, value):
+        self._tensors[index][...] = value
+
+    def get_tensor(self, index):
+        return self._tensors[index].copy()
+
+    def invoke(self):
+        x = self._tensors[self.INPUT]
+        for (kernel, bias, activation), out in zip(self.layers, self._buffers):
+            np.matmul(x, kernel, out=out)
+            out += bias
+            if activation == "relu":
+                np.maximum(out, 0, out=out)
+            elif activation == "softmax":
+                out -= out.max(axis=1, keepdims=True)
+                np.exp(out, out=out)
+                out /= out.sum(axis=1, keepdims=True)
+            x = out
+
+
+def forward(interpreter, rows):
+    """Output of an interpreter for a (rows x features) float32 array"""
+    index = interpreter.get_input_details()[0]['index']
+    interpreter.resize_tensor_input(index, list(rows.shape))
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(index, rows)
+    interpreter.invoke()
+    return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+
+
+def compare():
+    """Largest difference between NumPy and TFLite outputs on the datasets"""
+    from .backend import resolve
+
+    name, Interpreter, _ = resolve("auto")
+    if name == "numpy":
+        raise ImportError("A TFLite interpreter is needed to read .tflite files")
+
+    results = {}
+    for name, (stem, dataset) in MODELS.items():
+        rows = np.loadtxt(dataset, delimiter=',', dtype=np.float32)[:, 1:]
+
+        outputs = [forward(Interpreter(model_path=stem + ".tflite"), rows),
+                   forward(NumpyInterpreter(stem + ".tflite"), rows)]
+
+        results[name] = {
+            "rows": len(rows),
+            "max_abs_diff": float(np.abs(outputs[0] - outputs[1]).max()),
+            "argmax_mismatches": int((outputs[0].argmax(1) != outputs[1].argmax(1)).sum()),
+        }
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.model.numpy_engine")
+    parser.add_argument("command", choices=["export", "compare"])
+    parser.add_argument("--source", choices=["hdf5", "tflite"], default="tflite",
+                        help="Which bundled file to read the weights from, the "
+                             ".tflite is the model the classifiers run")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for stem, _ in MODELS.values():
+            print(export(stem + "." + args.source))
+    else:
+        json.dump(compare(), sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
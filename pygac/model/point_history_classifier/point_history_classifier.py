@@ -1,44 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import numpy as np
-import tensorflow as tf
+from ..classifier import TFLiteClassifier
 
 
-class PointHistoryClassifier(object):
+class PointHistoryClassifier(TFLiteClassifier):
     def __init__(
         self,
         model_path='pygac/model/point_history_classifier/point_history_classifier.tflite',
         score_th=0.5,
         invalid_value=0,
         num_threads=1,
+        max_batch=1,
+        xnnpack=True,
+        backend="auto",
     ):
-        self.interpreter = tf.lite.Interpreter(model_path=model_path,
-                                               num_threads=num_threads)
-
-        self.interpreter.allocate_tensors()
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        TFLiteClassifier.__init__(self, model_path, num_threads=num_threads,
+                                  max_batch=max_batch, xnnpack=xnnpack,
+                                  backend=backend)
 
         self.score_th = score_th
         self.invalid_value = invalid_value
 
-    def __call__(
-        self,
-        point_history,
-    ):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([point_history], dtype=np.float32))
-        self.interpreter.invoke()
-
-        output_details_tensor_index = self.output_details[0]['index']
-
-        result = self.interpreter.get_tensor(output_details_tensor_index)
-
-        result_index = np.argmax(np.squeeze(result))
+    def classify_batch(self, inputs):
+        indices, confidences = TFLiteClassifier.classify_batch(self, inputs)
 
-        if np.squeeze(result)[result_index] < self.score_th:
-            result_index = self.invalid_value
+        indices[confidences < self.score_th] = self.invalid_value
 
-        return result_index
+        return indices, confidences
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Quantized variants of the bundled classifiers.
+
+Each model is converted from its `.hdf5` into three more `.tflite`
+files next to the shipped float one:
+
+    dynamic     int8 weights, float activations
+    int8        int8 weights and activations, int8 input and output,
+                calibrated on rows of the training CSV
+    float16     float16 weights
+
+TFLite only quantizes weights of 1024 elements or more in the dynamic
+variant. Every layer of the bundled classifiers is smaller, so for them
+`dynamic` comes out the same as the float model. It is kept for
+retrained, larger architectures.
+
+`report` runs every variant that exists over its dataset and compares
+top-1 accuracy, agreement with the float model, invoke latency and file
+size. `python3 app.py --model_variant int8` picks one at runtime.
+
+    python3 -m pygac.model.quantize export
+    python3 -m pygac.model.quantize report --output variants.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from .numpy_engine import MODELS
+from .train import load_dataset, split
+
+VARIANTS = ("float", "dynamic", "int8", "float16")
+
+
+def variant_path(stem, variant="float"):
+    """The .tflite of a variant, the float model keeps its old name"""
+    if variant not in VARIANTS:
+        raise ValueError("Unknown model variant: %s" % variant)
+    if variant == "float":
+        return stem + ".tflite"
+    return "%s_%s.tflite" % (stem, variant)
+
+
+def model_path(name, variant="float"):
+    return variant_path(MODELS[name][0], variant)
+
+
+def calibration_rows(data, count=500, seed=42):
+    """Up to `count` feature rows spread over the dataset, for int8 ranges"""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(data), size=min(count, len(data)), replace=False))
+    return np.ascontiguousarray(data[rows, 1:], dtype=np.float32)
+
+
+def convert(model, variant, calibration=None):
+    """Serialized .tflite of a Keras model in the given variant"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant != "float":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if calibration is None:
+            raise ValueError("The int8 variant needs calibration rows")
+
+        def representative_dataset():
+            for row in calibration:
+                yield [row.reshape(1, -1)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def export(names=None, variants=VARIANTS[1:], samples=500, seed=42):
+    """Write the variants of the given models, all of them by default"""
+    import tensorflow as tf
+
+    written = []
+    for name in names or list(MODELS):
+        stem, dataset = MODELS[name]
+        model = tf.keras.models.load_model(stem + ".hdf5", compile=False)
+        data, _, _ = load_dataset(dataset)
+        calibration = calibration_rows(data, samples, seed)
+
+        for variant in variants:
+            path = variant_path(stem, variant)
+            with open(path, "wb") as f:
+                f.write(convert(model, variant, calibration))
+            written.append(path)
+
+    return written
+
+
+def evaluate(path, data, rows, backend="auto"):
+    """Top-1 accuracy and latency of one model, a single row per invoke
+
+    RETURNS:
+        - dict()            The report.
+        - np.ndarray        Predicted class per row, for comparing variants.
+    """
+    from .classifier import TFLiteClassifier
+
+    classifier = TFLiteClassifier(path, max_batch=1, backend=backend)
+    predictions = np.empty(len(rows), dtype=np.int64)
+    for number, row in enumerate(rows):
+        indices, _ = classifier.classify_batch(data[row:row + 1, 1:])
+        predictions[number] = indices[0]
+
+    labels = data[rows, 0].astype(np.int64)
+    report = classifier.report()
+    report.update({
+        "size_kb": round(os.path.getsize(path) / 1024, 2),
+        "accuracy": round(float(np.mean(predictions == labels)), 4),
+    })
+    return report, predictions
+
+
+def report(names=None, variants=VARIANTS, backend="auto", seed=42):
+    """Accuracy, latency and size of every exported variant
+
+    Accuracy is measured on the rows `pygac.model.train` holds out for
+    validation, agreement is the share of rows on which a variant
+    predicts the same class as the float model.
+    """
+    results = {}
+    for name in names or list(MODELS):
+        stem, dataset = MODELS[name]
+        data, _, _ = load_dataset(dataset)
+        _, rows = split(data, seed=seed)
+
+        reference = None
+        results[name] = {}
+        for variant in variants:
+            path = variant_path(stem, variant)
+            if not os.path.exists(path):
+                results[name][variant] = {"missing": path}
+                continue
+
+            start = time.perf_counter()
+            result, predictions = evaluate(path, data, rows, backend=backend)
+            if variant == "float":
+                reference = predictions
+            if reference is not None:
+                result["agreement"] = round(float(np.mean(predictions == reference)), 4)
+            result["evaluate_s"] = round(time.perf_counter() - start, 2)
+            results[name][variant] = result
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.model.quantize")
+    parser.add_argument("command", choices=["export", "report"])
+    parser.add_argument("models", nargs="*",
+                        help="Models to use, all by default: %s" % ", ".join(MODELS))
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=None)
+    parser.add_argument("--samples", type=int, default=500,
+                        help="Calibration rows for the int8 variant")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tflite_backend", default="auto",
+                        help="Interpreter used by report")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+    for name in args.models:
+        if name not in MODELS:
+            parser.error("unknown model: %s" % name)
+
+    if args.command == "export":
+        variants = [v for v in args.variants or VARIANTS if v != "float"]
+        for path in export(args.models, variants, args.samples, args.seed):
+            print("Wrote %s" % path)
+        return
+
+    results = report(args.models, args.variants or VARIANTS,
+                     backend=args.tflite_backend, seed=args.seed)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Retrain the bundled classifiers.
+
+The first run converts each dataset CSV into a float32 `.npy` next to
+it. Like the CSV it is row-major, one row per sample with the label in
+column 0 followed by the features. Later runs memory-map that file, which takes milliseconds
+instead of parsing megabytes of text, and mini-batches are gathered
+straight from the map. The trained model replaces the shipped `.hdf5`,
+`.tflite` and NumPy `.npz`.
+
+    python3 -m pygac.model.train
+    python3 -m pygac.model.train keypoint_classifier --epochs 500
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from .numpy_engine import MODELS
+from .numpy_engine import export as export_npz
+
+# Hidden layers (units, dropout before them) of the shipped models
+ARCHITECTURES = {
+    "keypoint_classifier": [(20, 0.2), (10, 0.4)],
+    "point_history_classifier": [(24, 0.2), (10, 0.5)],
+}
+
+
+def cache_path(dataset):
+    return os.path.splitext(dataset)[0] + ".npy"
+
+
+def load_dataset(dataset, rebuild=False):
+    """Dataset as a read-only, row-major (rows, 1 + features) float32 memmap
+
+    Each row is a sample, the label in column 0 and its features after it.
+    The `.npy` cache is rebuilt when the CSV is newer.
+
+    RETURNS:
+        - np.memmap()       The samples.
+        - float()           Seconds it took.
+        - bool()            Whether the CSV had to be parsed.
+    """
+    start = time.perf_counter()
+    path = cache_path(dataset)
+
+    parsed = (rebuild or not os.path.exists(path)
+              or os.path.getmtime(path) < os.path.getmtime(dataset))
+    if parsed:
+        data = np.loadtxt(dataset, delimiter=',', dtype=np.float32, ndmin=2)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp, path)
+
+    data = np.load(path, mmap_mode="r")
+    return data, time.perf_counter() - start, parsed
+
+
+def split(data, validation=0.25, seed=42):
+    """Shuffled row indices for training and validation"""
+    order = np.random.default_rng(seed).permutation(len(data))
+    cut = int(len(data) * (1 - validation))
+    return np.sort(order[:cut]), np.sort(order[cut:])
+
+
+def batches(data, indices, batch_size, rng):
+    """Shuffled (features, labels) mini-batches gathered from the memmap"""
+    order = rng.permutation(indices)
+    for start in range(0, len(order), batch_size):
+        # Sorted rows read the map front to back
+        rows = data[np.sort(order[start:start + batch_size])]
+        yield rows[:, 1:], rows[:, 0].astype(np.int64)
+
+
+def read_labels(stem):
+    with open(stem + "_label.csv", encoding='utf-8-sig') as f:
+        return [row[0] for row in csv.reader(f)]
+
+
+def build_model(name, num_features, num_classes):
+    import tensorflow as tf
+
+    layers = [tf.keras.layers.Input((num_features, ))]
+    for units, dropout in ARCHITECTURES[name]:
+        layers.append(tf.keras.layers.Dropout(dropout))
+        layers.append(tf.keras.layers.Dense(units, activation='relu'))
+    layers.append(tf.keras.layers.Dense(num_classes, activation='softmax'))
+
+    model = tf.keras.models.Sequential(layers)
+    model.compile(optimizer='adam',
+                  loss='sparse_categorical_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+
+def fit(model, data, train_rows, validation_rows, epochs=1000, batch_size=128,
+        patience=20, seed=42):
+    """Mini-batch training with early stopping on validation loss"""
+    rng = np.random.default_rng(seed)
+    validation = data[validation_rows]
+    x_val, y_val = validation[:, 1:], validation[:, 0].astype(np.int64)
+
+    best_loss, best_weights, waited = float("inf"), None, 0
+    epoch_times = []
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        for x, y in batches(data, train_rows, batch_size, rng):
+            model.train_on_batch(x, y)
+        epoch_times.append(time.perf_counter() - start)
+
+        loss, accuracy = model.evaluate(x_val, y_val, batch_size=batch_size, verbose=0)
+        if loss < best_loss:
+            best_loss, best_weights, waited = loss, model.get_weights(), 0
+        else:
+            waited += 1
+            if waited > patience:
+                break
+
+    if best_weights is not None:  # None without an epoch with a finite loss
+        model.set_weights(best_weights)
+    loss, accuracy = model.evaluate(x_val, y_val, batch_size=batch_size, verbose=0)
+    return {
+        "epochs": len(epoch_times),
+        "epoch_ms": round(sum(epoch_times) / len(epoch_times) * 1000, 2)
+                    if epoch_times else 0.0,
+        "validation_loss": round(float(loss), 4),
+        "validation_accuracy": round(float(accuracy), 4),
+    }
+
+
+def export(model, stem):
+    """Write `stem`.hdf5, `stem`.tflite and `stem`.npz"""
+    import tensorflow as tf
+
+    try:
+        model.save(stem + ".hdf5", include_optimizer=False, save_format="h5")
+    except (TypeError, ValueError):
+        # Keras 3 only goes by the extension
+        model.save(stem + ".h5", include_optimizer=False)
+        os.replace(stem + ".h5", stem + ".hdf5")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(stem + ".tflite", "wb") as f:
+        f.write(converter.convert())
+
+    export_npz(stem + ".hdf5")
+    return [stem + ext for ext in (".hdf5", ".tflite", ".npz")]
+
+
+def train(names=None, epochs=1000, batch_size=128, patience=20, seed=42,
+          rebuild_cache=False, save=True):
+    """Train, report and export the given models, all of them by default"""
+    results = {}
+    for name in names or list(MODELS):
+        stem, dataset = MODELS[name]
+
+        data, load_time, parsed = load_dataset(dataset, rebuild=rebuild_cache)
+        num_classes = len(read_labels(stem))
+        train_rows, validation_rows = split(data, seed=seed)
+
+        model = build_model(name, data.shape[1] - 1, num_classes)
+        report = fit(model, data, train_rows, validation_rows, epochs=epochs,
+                     batch_size=batch_size, patience=patience, seed=seed)
+        report.update({
+            "rows": len(data),
+            "load_ms": round(load_time * 1000, 2),
+            "parsed_csv": parsed,
+        })
+        if save:
+            report["files"] = export(model, stem)
+        results[name] = report
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.model.train")
+    parser.add_argument("models", nargs="*",
+                        help="Models to train, all by default: %s" % ", ".join(MODELS))
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--batch_size", type=int, default=128)
+    parser.add_argument("--patience", type=int, default=20,
+                        help="Epochs without improvement before stopping")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rebuild_cache", action="store_true",
+                        help="Parse the CSVs again even if the cache is current")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="Train and report, but keep the shipped models")
+    args = parser.parse_args(argv)
+    for name in args.models:
+        if name not in MODELS:
+            parser.error("unknown model: %s" % name)
+
+    results = train(args.models, epochs=args.epochs, batch_size=args.batch_size,
+                    patience=args.patience, seed=args.seed,
+                    rebuild_cache=args.rebuild_cache, save=not args.dry_run)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Staged frame pipeline.
+
+Capture, inference and actuation run on their own threads, so a slow
+camera or a slow sound server never stalls the other stages. Frames go
+through a bounded ring buffer that drops the oldest frame when full.
+Actions are coalesced instead, only the latest call of each one waits,
+so a volume change is never lost to a burst of older ones.
+"""
+
+import time
+import threading
+
+from collections import deque, OrderedDict
+
+
+class RingBuffer(object):
+    """Bounded FIFO that drops the oldest entry instead of blocking"""
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.dropped = 0
+        self.closed = False
+        self._items = deque(maxlen=maxlen)
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None once closed and drained"""
+        with self._condition:
+            while not self._items and not self.closed:
+                if not self._condition.wait(timeout):
+                    return None
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class CoalescingBuffer(object):
+    """FIFO keeping only the latest item per key
+
+    A key put again moves to the back with its new item. `maxlen` bounds
+    the number of distinct keys, beyond it the oldest key is dropped.
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._items = OrderedDict()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, key, item):
+        with self._condition:
+            if self._items.pop(key, None) is not None:
+                self.coalesced += 1
+            elif len(self._items) == self.maxlen:
+                self._items.popitem(last=False)
+                self.dropped += 1
+            self._items[key] = item
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None once closed and drained"""
+        with self._condition:
+            while not self._items and not self.closed:
+                if not self._condition.wait(timeout):
+                    return None
+            if self._items:
+                return self._items.popitem(last=False)[1]
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class LatencyCounter(object):
+    """Running latency statistics in seconds"""
+
+    def __init__(self, window=256):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = 0.0
+        self._recent = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self._recent.append(seconds)
+
+    def percentile(self, q):
+        """Percentile over the recent window"""
+        if not self._recent:
+            return 0.0
+        recent = sorted(self._recent)
+        return recent[min(len(recent) - 1, int(q / 100 * len(recent)))]
+
+    def summary(self):
+        """Milliseconds, rounded for printing"""
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.maximum * 1000, 3),
+        }
+
+
+class Pipeline(object):
+    """Capture -> inference -> actuation on three threads"""
+
+    def __init__(self, capture_depth=2, actuation_depth=4):
+        self.frames = RingBuffer(capture_depth)
+        self.actions = CoalescingBuffer(actuation_depth)
+
+        self.latency = {
+            "capture": LatencyCounter(),
+            "inference": LatencyCounter(),
+            "actuation": LatencyCounter(),
+            "queue": LatencyCounter(),  # Frame waiting for inference
+            "end_to_end": LatencyCounter(),  # Frame captured to volume set
+        }
+
+        self._threads = []
+        self._running = False
+        self._latency_lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add one latency measured elsewhere, e.g. by the volume writer"""
+        with self._latency_lock:
+            self.latency[name].add(seconds)
+
+    def actuate(self, timestamp, function, *args):
+        """Queue an audio side effect caused by the frame taken at `timestamp`
+
+        A call still waiting for the same `function` is replaced.
+        """
+        self.actions.put(function, (timestamp, function, args))
+
+    def _capture(self, capture):
+        try:
+            while self._running:
+                start = time.perf_counter()
+                image = capture()
+                if image is None:
+                    break
+                timestamp = time.perf_counter()
+                self.latency["capture"].add(timestamp - start)
+                self.frames.put((timestamp, image))
+        finally:
+            self.frames.close()
+
+    def _inference(self, infer):
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                timestamp, image = item
+                start = time.perf_counter()
+                self.latency["queue"].add(start - timestamp)
+                infer(timestamp, image)
+                self.latency["inference"].add(time.perf_counter() - start)
+        finally:
+            self.actions.close()
+
+    def _actuation(self):
+        while True:
+            item = self.actions.get()
+            if item is None:
+                break
+            timestamp, function, args = item
+            start = time.perf_counter()
+            try:
+                function(*args)
+            except Exception as e:
+                print(e)
+            end = time.perf_counter()
+            self.record("actuation", end - start)
+            self.record("end_to_end", end - timestamp)
+
+    def start(self, capture, infer):
+        """`capture()` returns a frame or None, `infer(timestamp, frame)` consumes it"""
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture, args=(capture,),
+                             name="pygac-capture", daemon=True),
+            threading.Thread(target=self._inference, args=(infer,),
+                             name="pygac-inference", daemon=True),
+            threading.Thread(target=self._actuation,
+                             name="pygac-actuation", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def is_alive(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stop(self, timeout=2.0):
+        """Stop the stages, True once every thread has exited
+
+        A capture thread stuck in a read keeps running, the capture
+        device must not be released under it.
+        """
+        self._running = False
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return not self.is_alive()
+
+    def stats(self):
+        """Per-stage latency and queue statistics"""
+        stats = {name: counter.summary() for name, counter in self.latency.items()}
+        stats["frames_dropped"] = self.frames.dropped
+        stats["actions_coalesced"] = self.actions.coalesced
+        stats["actions_dropped"] = self.actions.dropped
+        return stats
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Per-stage frame timing and memory, used by the benchmarks"""
+
+import time
+import resource
+import tracemalloc
+
+from collections import defaultdict
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in kB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class StageRecorder(object):
+    """Splits each frame into consecutive named stages"""
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.allocations = []  # Peak bytes allocated within each frame
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self.samples = defaultdict(list)  # stage -> seconds per frame
+        self.peak_rss = defaultdict(int)  # stage -> peak RSS after the stage
+        self.rss_growth = defaultdict(int)  # stage -> peak RSS gained during it
+        self.frames = []  # seconds per frame
+
+        self._frame = defaultdict(float)
+        self._frame_start = None
+        self._last = None
+        self._rss = peak_rss_kb()
+
+    def begin(self):
+        """Start of a frame"""
+        self._frame.clear()
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._frame_start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """End of `stage`, the next stage starts now"""
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        self._frame[stage] += now - self._last
+        self._last = now
+
+        rss = peak_rss_kb()
+        self.rss_growth[stage] += rss - self._rss
+        self.peak_rss[stage] = max(self.peak_rss[stage], rss)
+        self._rss = rss
+
+    def end(self):
+        """End of a frame"""
+        if self._frame_start is None:
+            return
+        self.frames.append(time.perf_counter() - self._frame_start)
+        if self.trace_allocations:
+            self.allocations.append(tracemalloc.get_traced_memory()[1] - self._traced)
+        for stage, seconds in self._frame.items():
+            self.samples[stage].append(seconds)
+        self._frame_start = self._last = None
+
+    def report(self):
+        stages = {}
+        for stage, samples in self.samples.items():
+            stages[stage] = {
+                "frames": len(samples),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+                "peak_rss_kb": self.peak_rss[stage],
+                "rss_growth_kb": self.rss_growth[stage],
+            }
+
+        total = sum(self.frames)
+        report = {
+            "frames": len(self.frames),
+            "fps": round(len(self.frames) / total, 2) if total else 0.0,
+            "frame_p50_ms": round(percentile(self.frames, 50) * 1000, 3),
+            "frame_p99_ms": round(percentile(self.frames, 99) * 1000, 3),
+            "peak_rss_kb": peak_rss_kb(),
+            "stages": stages,
+        }
+
+        if self.allocations:
+            # Timings are inflated while tracing, compare these separately
+            report["allocated_per_frame_kb"] = {
+                "mean": round(sum(self.allocations) / len(self.allocations) / 1024, 1),
+                "p99": round(percentile(self.allocations, 99) / 1024, 1),
+            }
+
+        return report
@@ -1,176 +1,87 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import os
 import csv
-import copy
+import math
 import time
 import signal
-import argparse
-import itertools
-
-from collections import Counter
-from collections import deque
-
-import cv2 as cv
-import numpy as np
-import mediapipe as mp
-
-from .model import KeyPointClassifier
-from .model import PointHistoryClassifier
-
-from .utils import GracefulExit, CvFpsCalc
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+# OpenCV, NumPy and everything built on them are imported where they are
+# first needed, the camera and model loading then import them concurrently
+
+from . import import_started
+from . import utils
+from .utils import GracefulExit, continuous_rectifier
+from .pipeline import Pipeline
+from .governor import FrameRateGovernor
+from .metrics import Metrics, MetricsServer, JsonLogger, SamplingProfiler
+from .events import EventBus, ConsoleRenderer
+from .events import HandEnter, HandLeave, Open, Close
+from .events import RotateClockwise, RotateCounterClockwise, Pinch, Volume
 from .audio import AudioWrapper
-
-"""
-TODO:
-
-+ Limit FPS to prevent too fast volume changes. -> GestureControl.start
-"""
-
-e = 2.71828182846
+from .audio import pulse
+from .audio.actuator import VolumeActuator
 
 PALM_WIDTH = 10  # Purely an estimate
 
-def continuous_rectifier(x0, x, x1):
-    """
-    Theoretical Continuous Analog Rectifier For Artificial Neural Networks.
-
-    NOTE:           The algorithm yields an input-value rectified
-                    between two other values calculated by the relative
-                    distance distance. This equation is defined as:
-                    ______________________________________________________
-
-                                            x1 - x0
-                    f(x0, x, x1) = ------------------------ + x0
-                                           -(2*x - x1 - x0)
-                                            ---------------
-                                   1 + (5e)     x1 - x0
-                    ______________________________________________________
-                    If x is not between x0 and x1, x will be valued
-                    closest to that value. This will create.
-                    If x0<x<x1, x will kind of keep its value apart
-                    from minor changes. If not x0<x<x1, x will be
-                    fit within boundaries. It is basically the
-                    sigmoid function, but instead of: x -> 0<x<1
-                    it is: x -> x0<x<x1
-
-    ARGUMENTS:
-        - x0                float() The lower boundary (min).
-        - x                 float() The value to rectify.
-        - x1                float() The upper boundary (max).
-    RETURNS:
-        - float()           x0 <= x <= x1
-    """
-
-    return (x1 - x0) / (1 + (5*e) ** -((2*x - x1 - x0) / (x1 - x0))) + x0
+MAX_ROTATION_STEP = 0.2  # Seconds of rotation a single frame may apply
+
+# MediaPipe, TensorFlow and OpenCV import parts of each other, importing
+# them from two startup threads at once deadlocks on the module locks.
+# The imports take turns, the rest of each subsystem's setup does not.
+_import_lock = threading.Lock()
 
 def exp_decay(x, m):
     """Exponential decay to estimate distance from lens"""
-    return np.log(x/m) / -0.25
+    return math.log(x/m) / -0.25
 
 def eucleidian_distance(p0, p1):
     """Calculate absolute distance between two points"""
     return (((p0[0] - p1[0])**2) + ((p0[1] - p1[1])**2))**.5
 
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
-
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return temp_landmark_list
-
-def pre_process_point_history(image, point_history):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    temp_point_history = copy.deepcopy(point_history)
-
-    base_x, base_y = 0, 0
-    for index, point in enumerate(temp_point_history):
-        if index == 0:
-            base_x, base_y = point[0], point[1]
-
-        temp_point_history[index][0] = (temp_point_history[index][0] -
-                                        base_x) / image_width
-        temp_point_history[index][1] = (temp_point_history[index][1] -
-                                        base_y) / image_height
-
-    temp_point_history = list(
-        itertools.chain.from_iterable(temp_point_history))
-
-    return temp_point_history
-
 
 class GestureControl(GracefulExit, AudioWrapper):
     """Documentation"""
 
     use_brect = True
-    previous = ""
-    mode = ""
-
-    exit_now = False  # Gracefully halt the program on interupt <Ctrl-C>
-
-    # For FPS
-    start_tick = cv.getTickCount()
-    fps_freq = 1000.0 / cv.getTickFrequency()
-    difftimes = deque(maxlen=10)
 
     def __init__(self, args=None, callback=None, driver=None, **entries):
         self.__dict__.update(entries)
         if args is None:
             raise Exception("No arguments")
 
+        # Per-instance, several controllers may share a process
+        self.exit_now = False  # Gracefully halt the program on interupt <Ctrl-C>
+        self.previous_handstatus = ""  # `previous` is the media player method
+        self.mode = ""
+        self.percentage = 50
+
         # print(args.verbose)
         self.verbose = not args.headless
 
+        # Gestures go out as events, the console is just one subscriber
+        self.events = EventBus(maxlen=getattr(args, "event_queue", 256))
         if callback is not None:
             self.callback = callback
+            self.events.subscribe(callback)
+        self.console = None
+        if self.verbose:
+            self.console = ConsoleRenderer(
+                max_rate=getattr(args, "console_rate", 10.0)).attach(self.events)
+        self.visible_hands = set()
+
+        # Volume changes are rate limited and coalesced by the actuator
+        self.rotation_speed = getattr(args, "rotation_speed", 30.0)  # % per second
+        self.rotation_time = None
+        self.volume_level = float(self.percentage)
+        self.volume_actuator = None
+        self.volume_options = dict(
+            max_rate=getattr(args, "volume_rate", 20.0),
+            slew=getattr(args, "volume_slew", 0.0),
+            curve=getattr(args, "volume_curve", "linear"),
+        )
 
         self.cap_device = args.device
         self.cap_width = args.width
@@ -181,50 +92,184 @@ class GestureControl(GracefulExit, AudioWrapper):
 
         self.min_detection_confidence = args.min_detection_confidence
         self.min_tracking_confidence = args.min_tracking_confidence
+        self.max_num_hands = getattr(args, "max_num_hands", 2)
+
+        # Detect on a crop around the previous frame's hands
+        self.roi_tracker = None
+        self.roi_hands = None
+        if getattr(args, "roi", False):
+            from .tracking import RoiTracker
+            self.roi_tracker = RoiTracker(padding=getattr(args, "roi_padding", 0.5),
+                                          size=getattr(args, "roi_size", 256),
+                                          max_num_hands=self.max_num_hands,
+                                          refresh=getattr(args, "roi_refresh", 10))
+
+        # Smoothed landmarks, predicted on frames that skip detection
+        self.landmark_filter = None
+        self.frame_skipper = None
+        self.landmark_time = 0.0
+        self.replay_fps = getattr(args, "replay_fps", 30.0)
+        max_skip = getattr(args, "frame_skip", 0)
+        if getattr(args, "landmark_filter", False) or max_skip:
+            from .filtering import LandmarkFilter, FrameSkipper
+            self.landmark_filter = LandmarkFilter(
+                min_cutoff=getattr(args, "filter_min_cutoff", 1.0),
+                beta=getattr(args, "filter_beta", 10.0))
+        if max_skip:
+            self.frame_skipper = FrameSkipper(
+                max_skip=max_skip, tolerance=getattr(args, "skip_tolerance", 0.01))
+
+        # TFLite interpreter settings
+        self.tflite_backend = getattr(args, "tflite_backend", "auto")
+        self.num_threads = getattr(args, "num_threads", 1)
+        self.xnnpack = not getattr(args, "no_xnnpack", False)
+        self.model_variant = getattr(args, "model_variant", "float")
+        if self.tflite_backend == "numpy" and self.model_variant != "float":
+            raise ValueError("The numpy backend only runs the float models")
+
+        self.use_pipeline = getattr(args, "pipeline", False)
+        self.capture_depth = getattr(args, "capture_depth", 2)
+        self.pipeline = None
+        self.frame_timestamp = 0.0
+
+        # Players paused by a gesture survive a restart, "" for the default file
+        self.remember_paused = getattr(args, "remember_paused", None)
+
+        # Sound server channel, opened on first volume change unless given
+        self.volume_connection = entries.get("volume_connection")
+
+        # Recorded input instead of the camera, video file or landmark stream
+        self.replay = getattr(args, "replay", None)
+        self.record_landmarks = getattr(args, "record_landmarks", None)
+
+        # Labeled samples for the training CSVs, see pygac.collect
+        self.collect = getattr(args, "collect", None)
+        self.collect_label = getattr(args, "collect_label", -1)
+        self.collect_kind = getattr(args, "collect_mode", "keypoint")
+        self.sample_writer = None
+
+        # Landmarks and classifier outputs for other processes
+        self.shm_name = getattr(args, "shm_name", None)
+        self.shm_slots = getattr(args, "shm_slots", 64)
+        self.landmark_publisher = None
+        self.landmark_stream = None
+        self.landmark_recorder = None
+        self.frame_width, self.frame_height = self.cap_width, self.cap_height
+
+        # Debug window with the landmarks drawn, off unless asked for
+        self.display = getattr(args, "display", False)
+        self.key = -1
+
+        # Capture buffers, allocated once the subsystems are up
+        self.frame_pool = None
+
+        # Optional profiling.StageRecorder, splits frame time into stages
+        self.stage_recorder = entries.get("stage_recorder")
+
+        # Always-on span histograms, served over HTTP and/or logged
+        self.metrics_port = getattr(args, "metrics_port", 0)
+        self.metrics_log = getattr(args, "metrics_log", 0.0)
+        self.metrics = None
+        self.metrics_outputs = []
+        if self.metrics_port or self.metrics_log:
+            self.metrics = Metrics()
+            if self.stage_recorder is None:
+                self.stage_recorder = self.metrics
+
+        self.governor = FrameRateGovernor(
+            max_fps=getattr(args, "max_fps", 30),
+            idle_fps=getattr(args, "idle_fps", 5),
+            idle_after=getattr(args, "idle_after", 2.0),
+            idle_scale=getattr(args, "idle_scale", 0.5),
+        )
 
-        # Initiate GracefulExit and AudioWrapper
-        for base_class in [self.__class__.__bases__[0]]:
-             base_class.__init__(self)
+        # Seconds spent per subsystem until the first frame is processed
+        self.profile_startup = getattr(args, "profile_startup", False)
+        self.startup_times = {"import": time.perf_counter() - import_started}
+        self.init_started = time.perf_counter()
+        self.first_frame = True
+
+        self.vote_options = dict(
+            mode=getattr(args, "vote", "count"),
+            decay=getattr(args, "vote_decay", 0.85),
+            enter=getattr(args, "vote_enter", 0.0),
+            exit=getattr(args, "vote_exit", 1.0),
+        )
 
-        signal.signal(signal.SIGINT, self._exit_gracefully)
-        signal.signal(signal.SIGTERM, self._exit_gracefully)
+        # Pinch state
+        self.detected = False
+        self.pinch_previous = 0
+
+        # Which sink and which MPRIS players this controller drives
+        self.sink = getattr(args, "sink", pulse.DEFAULT_SINK)
+        self.mpris_target = getattr(args, "mpris_target", None)
+
+        # Signal handlers are process-wide, a supervisor installs its own
+        if entries.get("handle_signals", True):
+            GracefulExit.__init__(self)
+            signal.signal(signal.SIGINT, self._exit_gracefully)
+            signal.signal(signal.SIGTERM, self._exit_gracefully)
+            if hasattr(signal, "SIGUSR1"):
+                self.profiler = SamplingProfiler(
+                    utils.temporary_directory,
+                    seconds=getattr(args, "flamegraph_seconds", 10.0))
+                signal.signal(signal.SIGUSR1, self.profiler.trigger)
 
     def _exit_gracefully(self, *args, **kwargs):
         self.exit_now = True
 
-    def get_fps(self, as_int=True):
-        """Calculate Camera FPS"""
-        current_tick = cv.getTickCount()
-        different_time = (current_tick - self.start_tick) * self.fps_freq
-        self.start_tick = current_tick
+    def _open_camera(self):
+        with _import_lock:
+            import cv2 as cv
 
-        self.difftimes.append(different_time)
+        self.cap = cv.VideoCapture(self.replay if self.replay is not None
+                                   else self.cap_device)
+        if self.replay is None:
+            self.cap.set(cv.CAP_PROP_FRAME_WIDTH, self.cap_width)
+            self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, self.cap_height)
+        elif self.cap.get(cv.CAP_PROP_FPS) > 0:
+            self.replay_fps = self.cap.get(cv.CAP_PROP_FPS)
 
-        fps = 1000.0 / (sum(self.difftimes) / len(self.difftimes))
-        if as_int:
-            return int(fps)
-        else:
-            fps_rounded = round(fps, 2)
-
-            return fps_rounded
-
-    def aggregate_vision(self):
-        """Initialize CV object and aggregate devices"""
-        self.cap = cv.VideoCapture(self.cap_device)
-        # self.cap.set(cv.CAP_PROP_FRAME_WIDTH, self.cap_width)
-        # self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, self.cap_height)
+    def _load_hands(self):
+        with _import_lock:
+            import mediapipe as mp
 
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
-            max_num_hands=2,
+            max_num_hands=self.max_num_hands,
             min_detection_confidence=self.min_detection_confidence,
             min_tracking_confidence=self.min_tracking_confidence,
         )
 
-        self.keypoint_classifier = KeyPointClassifier()
+        if self.roi_tracker is not None:
+            # Every crop has coordinates of its own, landmarks tracked from
+            # the previous crop or frame would be in the wrong place
+            self.roi_hands = self.mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=self.max_num_hands,
+                min_detection_confidence=self.min_detection_confidence,
+            )
+
+    def _load_classifiers(self):
+        from .model import KeyPointClassifier, PointHistoryClassifier
+        from .model.backend import resolve
+        from .model.quantize import model_path
+
+        with _import_lock:
+            resolve(self.tflite_backend, model_path("keypoint_classifier", self.model_variant))
+
+        interpreter_options = dict(num_threads=self.num_threads,
+                                   xnnpack=self.xnnpack,
+                                   backend=self.tflite_backend)
 
-        self.point_history_classifier = PointHistoryClassifier()
+        self.keypoint_classifier = KeyPointClassifier(
+            model_path=model_path("keypoint_classifier", self.model_variant),
+            max_batch=self.max_num_hands, **interpreter_options)
+
+        self.point_history_classifier = PointHistoryClassifier(
+            model_path=model_path("point_history_classifier", self.model_variant),
+            **interpreter_options)
 
 
         with open('pygac/model/keypoint_classifier/keypoint_classifier_label.csv',
@@ -241,169 +286,694 @@ class GestureControl(GracefulExit, AudioWrapper):
                 row[0] for row in self.point_history_classifier_labels
             ]
 
-        self.cvFpsCalc = CvFpsCalc(buffer_len=10)
+    def _connect_audio(self):
+        """D-Bus, soundcard discovery and the sound server channel
+
+        Media players and soundcards are optional, the volume goes through
+        the sound server. Their errors are printed, startup carries on.
+        """
+        if self.replay is None:
+            # LinuxWrapper is D-Bus plus soundcards, each may fail on its own
+            parts = [base for base in AudioWrapper.__bases__ if base is not object]
+            for part in parts or [AudioWrapper]:
+                try:
+                    part.__init__(self)
+                except Exception as e:
+                    print("Warning: %s unavailable, volume changes still work: %s"
+                          % (part.__name__, e))
+            if self.remember_paused is not None and hasattr(self, "paused_players"):
+                self.restore_paused_players(self.remember_paused or None)
+
+        if self.volume_connection is None:
+            self.volume_connection = pulse.default_connection()
+
+        self.volume_level = float(self.percentage)
+        self.volume_actuator = VolumeActuator(self.volume_connection,
+                                              sink=self.sink,
+                                              metrics=self.metrics,
+                                              **self.volume_options)
+
+    def _timed(self, name, function):
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            self.startup_times[name] = time.perf_counter() - start
+
+    def aggregate_vision(self):
+        """Initialize CV object and aggregate devices
+
+        Camera, MediaPipe, the classifiers and audio are independent of
+        each other and are brought up concurrently. The first of them to
+        fail raises here, once all of them have finished.
+        """
+        start = time.perf_counter()
+
+        tasks = {
+            "classifiers": self._load_classifiers,
+            "audio": self._connect_audio,
+        }
+
+        if self.replay is not None and self.replay.endswith(".npz"):
+            # Landmarks were recorded, neither camera nor MediaPipe needed
+            from .replay import LandmarkStream
+            self.cap = None
+            self.landmark_stream = LandmarkStream(self.replay)
+            self.frame_width = self.landmark_stream.width
+            self.frame_height = self.landmark_stream.height
+        else:
+            tasks["camera"] = self._open_camera
+            tasks["mediapipe"] = self._load_hands
+
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [executor.submit(self._timed, name, task)
+                       for name, task in tasks.items()]
+        for future in futures:
+            future.result()  # Re-raise whatever failed
+
+        self.startup_done = time.perf_counter()
+        self.startup_times["startup"] = self.startup_done - start
+
+        import numpy as np
+
+        from .frames import FramePool
+        from .landmarks import HandLandmarks
+
+        # Capture buffers are reused, enough of them for every queued frame
+        self.frame_pool = FramePool(
+            size=self.capture_depth + 2 if self.use_pipeline else 1)
+
+        if self.record_landmarks is not None:
+            from .replay import LandmarkRecorder
+            self.landmark_recorder = LandmarkRecorder(max_num_hands=self.max_num_hands)
 
 
+
+        self.landmarks = HandLandmarks(max_num_hands=self.max_num_hands)
+
+        # Classifier outputs of the current frame, per hand
+        self.hand_signs = np.full(self.max_num_hands, -1, dtype=np.int32)
+        self.finger_gestures = np.full(self.max_num_hands, -1, dtype=np.int32)
+        self.finger_confidences = np.zeros(self.max_num_hands, dtype=np.float32)
+
+        if self.collect is not None:
+            from .collect import SampleWriter
+            self.sample_writer = SampleWriter(self.collect)
+
+        if self.shm_name is not None:
+            from .shm import LandmarkPublisher
+            self.landmark_publisher = LandmarkPublisher(self.shm_name,
+                                                        slots=self.shm_slots,
+                                                        max_hands=self.max_num_hands)
+
         self.history_length = 16
-        self.point_history = deque(maxlen=self.history_length)
+        self.point_histories = {}  # Handedness -> PointHistory
 
-        self.finger_gesture_history = deque(maxlen=self.history_length)
+        self.gesture_votes = {}  # Handedness -> GestureVote
 
-    def handle_events(self, handstatus, fingerstatus):
-        # mode = ""
-        if handstatus == "Pointer":  # TODO limit FPS
+    def handle_events(self, hand, handstatus, fingerstatus):
+        """Publish the gestures of one hand"""
+        event = None
+        rotation = 0
+        if handstatus == "Pointer":
             if fingerstatus == "Counter Clockwise":
                 self.mode = fingerstatus
-                # self.down()
-                if self.percentage > 0:
-                    self.percentage -= 1
+                self.events.publish(RotateCounterClockwise(hand, self.frame_timestamp))
+                rotation = -1
             elif fingerstatus == "Clockwise":
                 self.mode = fingerstatus
-                # self.up()
-                if self.percentage < 100:
-                    self.percentage += 1
+                self.events.publish(RotateClockwise(hand, self.frame_timestamp))
+                rotation = 1
+        self.rotate(rotation)
 
-        if handstatus != self.previous:
+        if handstatus != self.previous_handstatus:
             if handstatus == "Pointer":
                 # self.play()
                 pass
             elif handstatus == "Open":
                 self.mode = handstatus
-                # self.play()
+                event = Open(hand, self.frame_timestamp)
             elif handstatus == "Close":
                 self.mode = handstatus
-                # self.pause()
+                event = Close(hand, self.frame_timestamp)
+
+            self.previous_handstatus = handstatus
+
+        if event is not None:
+            self.events.publish(event)
+
+    def rotate(self, direction):
+        """Turn the volume at `rotation_speed` percent per second, 0 to stop"""
+        now = self.frame_timestamp
+        if direction and self.rotation_time is not None:
+            # A dropped or slow frame must not turn into a jump
+            elapsed = min(now - self.rotation_time, MAX_ROTATION_STEP)
+            self.set_percentage(self.volume_level
+                                + direction * self.rotation_speed * elapsed)
+        self.rotation_time = now if direction else None
+
+    def set_percentage(self, percentage):
+        """New volume level, published for subscribers and sent to the sink"""
+        self.volume_level = max(0.0, min(100.0, percentage))
+        if int(round(self.volume_level)) == self.percentage:
+            return
+        self.percentage = int(round(self.volume_level))
+        self.events.publish(Volume(self.percentage, self.frame_timestamp))
+        self.apply_volume(self.volume_level)
+
+    def update_visible_hands(self, num_hands):
+        """Publish hands entering and leaving the view"""
+        visible = set(self.landmarks.handedness[:num_hands])
+        if visible == self.visible_hands:
+            return
+        for hand in visible - self.visible_hands:
+            self.events.publish(HandEnter(hand, self.frame_timestamp))
+        for hand in self.visible_hands - visible:
+            self.events.publish(HandLeave(hand, self.frame_timestamp))
+        self.visible_hands = visible
+
+    def apply_volume(self, percentage):
+        """Hand a target volume to the actuator
+
+        The actuator never blocks, so this skips the actuation stage of
+        the pipeline. The frame timestamp goes along to the sound server
+        connection, which records end_to_end once the volume is written.
+        """
+        self.volume_actuator.set_target(percentage, self.frame_timestamp)
+
+    def detect(self, image):
+        """Run hand detection on a BGR frame and load the landmark buffers
+
+        RETURNS:
+            - int()             Number of hands found.
+        """
+
+        import cv2 as cv
+
+        # Detection runs on the unflipped frame, the landmarks are mirrored
+        # afterwards instead of the pixels
+        self.frame_height, self.frame_width = image.shape[:2]
+
+        if self.skip_detection():
+            if self.landmark_recorder is not None:
+                self.landmark_recorder.add(self.landmarks)
+            return self.landmarks.count
+
+        image = cv.cvtColor(image, cv.COLOR_BGR2RGB,
+                            dst=self.frame_pool.buffer("rgb", image.shape))
+        self.mark_stage("color")
+
+        if self.governor.scale != 1.0:
+            # Presence detection only, landmarks are normalized anyway
+            scale = self.governor.scale
+            size = (int(self.frame_width * scale), int(self.frame_height * scale))
+            image = cv.resize(image, size,
+                              dst=self.frame_pool.buffer("small", (size[1], size[0], 3)),
+                              interpolation=cv.INTER_AREA)
+
+        roi = None
+        if self.roi_tracker is not None and self.governor.scale == 1.0:
+            full_image = image
+            image, roi = self.roi_tracker.crop(image, self.frame_pool)
+
+        image.flags.writeable = False
+        results = (self.hands if roi is None else self.roi_hands).process(image)
+        image.flags.writeable = True
+
+        if roi is not None and results.multi_hand_landmarks is None:
+            # Lost track, look at the whole frame again right away
+            roi = None
+            full_image.flags.writeable = False
+            results = self.hands.process(full_image)
+            full_image.flags.writeable = True
+        self.mark_stage("mediapipe")
+
+        if results.multi_hand_landmarks is None:
+            self.landmarks.count = 0
+            if self.roi_tracker is not None:
+                self.roi_tracker.update(None, self.frame_width, self.frame_height)
+        else:
+            self.landmarks.load(results.multi_hand_landmarks,
+                                results.multi_hand_world_landmarks,
+                                results.multi_handedness)
 
-            self.previous = handstatus
+            if self.roi_tracker is not None:
+                self.roi_tracker.to_full_frame(self.landmarks, roi,
+                                               self.frame_width, self.frame_height)
+                self.landmarks.project(self.frame_width, self.frame_height)
+                self.roi_tracker.update(self.landmarks.bounding_rects(),
+                                        self.frame_width, self.frame_height)
 
-        if self.verbose:
-            print(self.percentage, end="\r     ")
+            self.landmarks.mirror()
 
+        self.filter_detection()
 
-        # print(self.mode, "            ", end="\r")
-        print(self.percentage*"=", end="                                \r   ")
-    def start(self):
-        """Main Loop"""
+        if self.landmark_recorder is not None:
+            self.landmark_recorder.add(self.landmarks)
 
-        self.aggregate_vision()
+        return self.landmarks.count
 
-        first_detected = False
-        detected = False
-        previous = 0
+    def skip_detection(self):
+        """Predict this frame's landmarks instead of detecting them, if due
 
-        while not self.exit_now:
+        RETURNS:
+            - bool()            Whether the landmark buffers were predicted.
+        """
+        if self.landmark_filter is None:
+            return False
 
-            fps = self.get_fps()
-            # print(fps)
-            # # time.sleep(1/)
-            # if fps > 16:
-            #     time.sleep(1/16/(fps-16))
+        if self.replay is not None:
+            # Replays run unpaced, the filter goes by the recording's clock
+            self.landmark_time += 1.0 / self.replay_fps
+        else:
+            self.landmark_time = self.frame_timestamp
+
+        if self.frame_skipper is None or self.frame_skipper.detect_now():
+            return False
+
+        self.landmark_filter.predict(self.landmarks, self.landmark_time)
+        self.mark_stage("prediction")
+        return True
+
+    def filter_detection(self):
+        """Smooth the detected landmarks and adapt the frame skipping"""
+        if self.landmark_filter is None:
+            return
+
+        error = self.landmark_filter.update(self.landmarks, self.landmark_time)
+        if self.frame_skipper is not None:
+            self.frame_skipper.detected(self.landmarks.count, error)
+
+    def process_frame(self, image):
+        """Run detection, classification and event handling on one frame
+
+        RETURNS:
+            - int()             Number of hands found.
+        """
+        num_hands = self.handle_hands(self.detect(image))
+
+        if self.display:
+            self.show(image)
+            if self.sample_writer is not None:
+                self.handle_key(self.key)
+
+        return num_hands
+
+    def handle_key(self, key):
+        """Collection keys: 0-9 label, k keypoints, h point history, n stop"""
+        if ord("0") <= key <= ord("9"):
+            self.collect_label = key - ord("0")
+        elif key == ord("n"):
+            self.collect_label = -1
+        elif key == ord("k"):
+            self.collect_kind = "keypoint"
+        elif key == ord("h"):
+            self.collect_kind = "point_history"
+
+    def collect_sample(self, keypoint_features, point_history_features):
+        """Queue this hand's features under the current label
+
+        `point_history_features` is None when the hand has no current
+        history, then only keypoint samples are collected.
+        """
+        from .collect import KEYPOINT, POINT_HISTORY
+
+        if self.collect_kind == "keypoint":
+            self.sample_writer.add(KEYPOINT, self.collect_label, keypoint_features)
+        elif point_history_features is not None and \
+                len(point_history_features) == self.history_length * 2:
+            self.sample_writer.add(POINT_HISTORY, self.collect_label,
+                                   point_history_features)
+
+    def show(self, image):
+        """Draw the landmarks on a mirrored copy of the frame and display it"""
+        import cv2 as cv
+
+        debug_image = cv.flip(image, 1,
+                              dst=self.frame_pool.buffer("debug", image.shape))
+
+        if self.landmarks.count:
+            landmark_lists = self.landmarks.project(self.frame_width,
+                                                    self.frame_height)
+            for landmark_list in landmark_lists:
+                for x, y in landmark_list:
+                    cv.circle(debug_image, (int(x), int(y)), 4, (255, 255, 255), -1)
+
+            if self.use_brect:
+                for x0, y0, x1, y1 in self.landmarks.bounding_rects():
+                    cv.rectangle(debug_image, (int(x0), int(y0)),
+                                 (int(x1), int(y1)), (0, 0, 0), 1)
+
+        cv.imshow("Gesture Audio Control", debug_image)
+        self.key = cv.waitKey(1) & 0xFF
+        if self.key == 27:  # ESC
+            self.exit_now = True
+
+    def handle_hands(self, num_hands):
+        """Classify the hands in the landmark buffers and act on them"""
+
+        self.update_visible_hands(num_hands)
+        self.hand_signs[:] = -1
+        self.finger_gestures[:] = -1
+        self.finger_confidences[:] = 0.0
+
+        if num_hands:
+            if num_hands < 2:
+                two_hands = False
+                self.detected = False
+            else:
+                two_hands = True
 
-            ret, image = self.cap.read()
-            if not ret:
-                break
+            landmark_lists = self.landmarks.project(self.frame_width,
+                                                    self.frame_height)
+            pre_processed_landmark_lists = self.landmarks.normalize()
+            self.mark_stage("preprocessing")
+
+            seen = set()
+            collecting = self.sample_writer is not None and self.collect_label >= 0
+
+            # Every hand in a single invoke, pinching hands included
+            hand_sign_ids, _ = self.keypoint_classifier.classify_batch(
+                pre_processed_landmark_lists)
+            self.hand_signs[:num_hands] = hand_sign_ids[:num_hands]
+            self.mark_stage("keypoint_classifier")
+
+            for hand in range(num_hands):
+
+                if two_hands:
+                    if collecting:
+                        # Point histories stand still while two hands are in
+                        # view, only hand signs are collected
+                        self.collect_sample(pre_processed_landmark_lists[hand], None)
+
+                    if self.landmarks.handedness[hand] == "Right":
+                        # Distance between thumb and index
+                        points = self.landmarks.world[hand, [4, 8]].tolist()
+
+                        dist = math.dist(points[0], points[1])
+                        dist /= 0.13
+                        dist = round(dist, 2)
+                        if not self.detected:
+                            self.detected = time.time()
+
+                        else:
+                            if self.detected + self.delay < time.time():  # Allow for human to have time to adjust fingers
+                                if dist < self.pinch_previous - self.threshold or self.pinch_previous + self.threshold < dist:
+                                    self.pinch_previous = dist
+                                    level = dist*(dist < 1.0) or 1.0
+                                    self.events.publish(Pinch("Right", level, self.frame_timestamp))
+                                    self.set_percentage(100 * level)
+                    continue
+
+                landmark_list = landmark_lists[hand]
+
+                if False:
+                    length_volume = eucleidian_distance(landmark_list[4], landmark_list[8])
+
+                    length_hand = eucleidian_distance(landmark_list[2], landmark_list[17])
+
+                    variable_distance = exp_decay(length_hand, self.frame_width)
+
+                    var_vol = exp_decay(length_volume, self.frame_height)
+
+                    naive_distance_from_camera = variable_distance * PALM_WIDTH  # In cm
 
-            image = cv.flip(image, 1)
-            debug_image = copy.deepcopy(image)
+                    inverted = self.frame_height - length_volume - 50
 
-            image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+                    normalized = continuous_rectifier(0, length_volume, self.frame_height)
 
-            image.flags.writeable = False
-            results = self.hands.process(image)
-            image.flags.writeable = True
 
+                    vol = (normalized / self.frame_height) # / (10-variable_distance)
 
-            if results.multi_hand_landmarks is not None:
-                if len(results.multi_handedness) < 2:
-                    two_hands = False
-                    detected = False
+                    resul = continuous_rectifier(0, naive_distance_from_camera*vol, PALM_WIDTH*2) / (PALM_WIDTH * 2)
+
+                    print(f"{int(resul*100)}%       ", end="\r")
+
+                point_history = self.point_history(self.landmarks.handedness[hand])
+                seen.add(self.landmarks.handedness[hand])
+
+                pre_processed_point_history_list = point_history.feature_view(
+                    self.frame_width, self.frame_height)
+
+                if collecting:
+                    self.collect_sample(pre_processed_landmark_lists[hand],
+                                        pre_processed_point_history_list)
+
+                hand_sign_id = hand_sign_ids[hand]
+                if hand_sign_id == 2:
+                    point_history.append(*landmark_list[8])
                 else:
-                    two_hands = True
-                for hand_landmarks, hand_world_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_hand_world_landmarks,
-                                                      results.multi_handedness):
+                    point_history.append(0, 0)
 
-                    if two_hands:
-                        if handedness.classification[0].label == "Right":
-                            points = []
-                            for i in [4, 8]:  # Distance between thumb and index
-                                landmark = hand_world_landmarks.landmark[i]
-                                point = np.array([landmark.x, landmark.y, landmark.z])
-                                points.append(point)
+                self.mark_stage("preprocessing")
 
-                            squared_dist = np.sum((points[0]-points[1])**2, axis=0)
-                            dist = np.sqrt(squared_dist)
-                            dist /= 0.13
-                            dist = round(dist.tolist(), 2)
-                            if not detected:
-                                detected = time.time()
+                finger_gesture_id, confidence = 0, 1.0
+                point_history_len = len(pre_processed_point_history_list)
+                if point_history_len == (self.history_length * 2):
+                    finger_gesture_ids, confidences = self.point_history_classifier.classify_batch(
+                        pre_processed_point_history_list.reshape(1, -1))
+                    finger_gesture_id, confidence = finger_gesture_ids[0], confidences[0]
+                self.mark_stage("point_history_classifier")
 
-                            else:
-                                if detected + self.delay < time.time():  # Allow for human to have time to adjust fingers
-                                    if dist < previous - self.threshold or previous + self.threshold < dist:
-                                        previous = dist
-                                        self.percentage = int(100 * (dist*(dist < 1.0) or 1.0))
-                                        # self.set_volume()
-                                        # print(self.percentage, end="    \r   ")
-                                        print(self.percentage*"=", end="                                                            \r   ")
-                                        cmd = f"pactl set-sink-volume @DEFAULT_SINK@ {self.percentage}%"
-                                        # cmd = f"pactl -- set-sink-volume 1 {self.percentage}%"
-                                        os.system(cmd)
-                        continue
+                gesture_vote = self.gesture_vote(self.landmarks.handedness[hand])
+                most_common_fg_id = gesture_vote.update(finger_gesture_id, confidence)
+                self.finger_gestures[hand] = most_common_fg_id
+                self.finger_confidences[hand] = confidence
 
-                    landmark_list = calc_landmark_list(debug_image, hand_landmarks)
+                handstatus = self.keypoint_classifier_labels[hand_sign_id]
+                fingerstatus = self.point_history_classifier_labels[most_common_fg_id]
 
-                    if False:
-                        length_volume = eucleidian_distance(landmark_list[4], landmark_list[8])
+                self.handle_events(self.landmarks.handedness[hand],
+                                   handstatus, fingerstatus)
+                self.mark_stage("events")
 
-                        length_hand = eucleidian_distance(landmark_list[2], landmark_list[17])
+            if not two_hands:
+                self.pad_point_histories(seen)
 
-                        variable_distance = exp_decay(length_hand, debug_image.shape[1])
+            self.mark_stage("events")
+            return num_hands
 
-                        var_vol = exp_decay(length_volume, debug_image.shape[0])
+        else:
+            if self.detected:
+                self.detected = False
+            self.pad_point_histories()
+
+        return 0
+
+    def point_history(self, handedness):
+        """Fingertip history of one hand"""
+        point_history = self.point_histories.get(handedness)
+        if point_history is None:
+            from .landmarks import PointHistory
+            point_history = self.point_histories[handedness] = PointHistory(
+                self.history_length)
+        return point_history
+
+    def gesture_vote(self, handedness):
+        """Smoothed finger gesture of one hand"""
+        gesture_vote = self.gesture_votes.get(handedness)
+        if gesture_vote is None:
+            from .smoothing import GestureVote
+            gesture_vote = self.gesture_votes[handedness] = GestureVote(
+                len(self.point_history_classifier_labels),
+                window=self.history_length, **self.vote_options)
+        return gesture_vote
+
+    def pad_point_histories(self, seen=()):
+        """A frame passed without these hands pointing"""
+        for handedness, point_history in self.point_histories.items():
+            if handedness not in seen:
+                point_history.append(0, 0)
+
+    def read_frame(self):
+        """Grab the next camera frame into a pooled buffer"""
+        ret, image = self.cap.read(self.frame_pool.capture_buffer())
+        if ret:
+            self.frame_pool.captured(image)
+        return ret, image
+
+    def runtime_report(self):
+        """Classifier backends and latency, gesture decision latency"""
+        return {
+            "keypoint_classifier": self.keypoint_classifier.report(),
+            "point_history_classifier": self.point_history_classifier.report(),
+            "gesture_vote": {handedness: vote.report()
+                             for handedness, vote in self.gesture_votes.items()},
+            "events": self.events.report(),
+            "volume": self.volume_actuator.report(),
+            "frame_skip": (self.frame_skipper.report()
+                           if self.frame_skipper is not None else None),
+        }
+
+    def frame_done(self):
+        """Bookkeeping after every processed frame"""
+        if self.landmark_publisher is not None:
+            self.landmark_publisher.publish(self.landmarks, self.hand_signs,
+                                            self.finger_gestures,
+                                            self.finger_confidences,
+                                            self.frame_timestamp)
+
+        if self.first_frame:
+            self.first_frame = False
+            now = time.perf_counter()
+            self.startup_times["first_frame"] = now - self.startup_done
+            self.startup_times["total"] = now - import_started
+
+            if self.profile_startup:
+                print("Startup (seconds, subsystems ran concurrently):")
+                for name, seconds in self.startup_times.items():
+                    print("  %-12s %.3f" % (name, seconds))
+                print("  interpreter  %s, keypoint %.3f, point history %.3f" % (
+                    self.keypoint_classifier.backend,
+                    self.keypoint_classifier.load_time,
+                    self.point_history_classifier.load_time))
+
+    def start_metrics(self):
+        """Serve and/or log the metrics, if asked for"""
+        if self.metrics is None:
+            return
+        if self.metrics_port:
+            self.metrics_outputs.append(MetricsServer(self.metrics, self.metrics_port))
+        if self.metrics_log:
+            self.metrics_outputs.append(JsonLogger(self.metrics, self.metrics_log))
+
+    def mark_stage(self, stage):
+        """End of a profiled stage of the current frame"""
+        if self.stage_recorder is not None:
+            self.stage_recorder.mark(stage)
+
+    def release(self):
+        """Close the capture device and save what was recorded"""
+        if self.cap is not None:
+            self.cap.release()
+        if self.display:
+            import cv2 as cv
+            cv.destroyAllWindows()
+
+        self.events.close()
+        self.volume_actuator.close()
+        if self.remember_paused is not None and hasattr(self, "paused_players"):
+            self.save_paused_players(self.remember_paused or None)
+        for output in self.metrics_outputs:
+            output.close()
+        if self.landmark_publisher is not None:
+            self.landmark_publisher.close()
+        if self.sample_writer is not None:
+            self.sample_writer.close()
+            print("Samples", self.sample_writer.report())
+        if self.console is not None:
+            self.console.draw()
+
+        if self.landmark_recorder is not None:
+            self.landmark_recorder.save(self.record_landmarks,
+                                        self.frame_width, self.frame_height)
 
-                        naive_distance_from_camera = variable_distance * PALM_WIDTH  # In cm
+    def start(self):
+        """Main Loop"""
 
-                        inverted = debug_image.shape[0] - length_volume - 50
+        self.aggregate_vision()
+        self.events.start()
+        self.start_metrics()
 
-                        normalized = continuous_rectifier(0, length_volume, debug_image.shape[0])
+        if self.landmark_stream is not None:
+            return self.start_landmark_replay()
 
+        if self.use_pipeline:
+            return self.start_pipeline()
 
-                        vol = (normalized / debug_image.shape[0]) # / (10-variable_distance)
+        while not self.exit_now:
 
-                        resul = continuous_rectifier(0, naive_distance_from_camera*vol, PALM_WIDTH*2) / (PALM_WIDTH * 2)
+            self.governor.wait()
 
-                        print(f"{int(resul*100)}%       ", end="\r")
+            if self.stage_recorder is not None:
+                self.stage_recorder.begin()
 
-                    pre_processed_landmark_list = pre_process_landmark(
-                        landmark_list)
-                    pre_processed_point_history_list = pre_process_point_history(
-                        debug_image, self.point_history)
+            ret, image = self.read_frame()
+            if not ret:
+                break
+            self.mark_stage("capture")
 
-                    hand_sign_id = self.keypoint_classifier(pre_processed_landmark_list)
-                    if hand_sign_id == 2:
-                        self.point_history.append(landmark_list[8])
-                    else:
-                        self.point_history.append([0, 0])
+            self.frame_timestamp = time.perf_counter()
+            self.governor.update(self.process_frame(image))
+            self.frame_done()
 
-                    finger_gesture_id = 0
-                    point_history_len = len(pre_processed_point_history_list)
-                    if point_history_len == (self.history_length * 2):
-                        finger_gesture_id = self.point_history_classifier(
-                            pre_processed_point_history_list)
+            if self.stage_recorder is not None:
+                self.stage_recorder.end()
 
-                    self.finger_gesture_history.append(finger_gesture_id)
-                    most_common_fg_id = Counter(
-                        self.finger_gesture_history).most_common()
+        self.release()
 
-                    handstatus = self.keypoint_classifier_labels[hand_sign_id]
-                    fingerstatus = self.point_history_classifier_labels[most_common_fg_id[0][0]]
+        if self.verbose:
+            print()
+            print(self.governor.report())
+            print(self.runtime_report())
 
-                    self.handle_events(handstatus, fingerstatus)
+    def start_landmark_replay(self):
+        """Main Loop, fed from a recorded landmark stream"""
 
-            else:
-                if detected:
-                    detected = False
-                self.point_history.append([0, 0])
+        while not self.exit_now:
+
+            if self.stage_recorder is not None:
+                self.stage_recorder.begin()
+
+            if not self.landmark_stream.read(self.landmarks):
+                break
+            self.mark_stage("capture")
+
+            if not self.skip_detection():
+                self.filter_detection()
+            if self.landmark_recorder is not None:
+                self.landmark_recorder.add(self.landmarks)
+
+            self.frame_timestamp = time.perf_counter()
+            self.handle_hands(self.landmarks.count)
+            self.frame_done()
+
+            if self.stage_recorder is not None:
+                self.stage_recorder.end()
+
+        self.release()
+
+    def start_pipeline(self):
+        """Main Loop, with capture, inference and actuation on separate threads"""
+
+        self.pipeline = Pipeline(capture_depth=self.capture_depth)
+        recorders = self.volume_connection.recorders
+        recorders.append(self.pipeline)
+
+        def capture():
+            if self.exit_now:
+                return None
+            self.governor.wait()
+            ret, image = self.read_frame()
+            if not ret:
+                return None
+            return image
+
+        def infer(timestamp, image):
+            if self.stage_recorder is not None:
+                self.stage_recorder.begin()
+            self.frame_timestamp = timestamp
+            self.governor.update(self.process_frame(image))
+            self.frame_done()
+            if self.stage_recorder is not None:
+                self.stage_recorder.end()
+
+        self.pipeline.start(capture, infer)
+        try:
+            while not self.exit_now and self.pipeline.is_alive():
+                time.sleep(0.1)
+        finally:
+            if not self.pipeline.stop():
+                print("Capture did not stop, leaving the camera to the OS")
+                self.cap = None
+            self.release()
+            recorders.remove(self.pipeline)
+
+        if self.verbose:
+            print()
+            for name, stats in self.pipeline.stats().items():
+                print(name, stats)
+            print(self.governor.report())
+            print(self.runtime_report())
 
-        self.cap.release()
-        cv.destroyAllWindows()
+        self.pipeline = None
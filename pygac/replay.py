@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Recorded landmark streams.
+
+A stream is an `.npz` file holding the MediaPipe output of every frame:
+
+    points      float32 (frames, hands, 21, 3)  normalized image landmarks
+    world       float32 (frames, hands, 21, 3)  world landmarks in meters
+    counts      int32   (frames,)               hands found per frame
+    handedness  str     (frames, hands)         "Left" / "Right"
+    size        int32   (2,)                    frame width and height
+
+Replaying one runs everything after hand detection without a camera
+or MediaPipe.
+"""
+
+import numpy as np
+
+
+class LandmarkRecorder(object):
+    """Collects the landmark buffers of every frame"""
+
+    def __init__(self, max_num_hands=2):
+        self.max_num_hands = max_num_hands
+        self.points = []
+        self.world = []
+        self.counts = []
+        self.handedness = []
+
+    def add(self, landmarks):
+        self.points.append(landmarks.points.copy())
+        self.world.append(landmarks.world.copy())
+        self.counts.append(landmarks.count)
+        self.handedness.append(list(landmarks.handedness))
+
+    def save(self, path, width, height):
+        hands = self.max_num_hands
+        np.savez_compressed(
+            path,
+            points=np.array(self.points, dtype=np.float32).reshape(-1, hands, 21, 3),
+            world=np.array(self.world, dtype=np.float32).reshape(-1, hands, 21, 3),
+            counts=np.array(self.counts, dtype=np.int32),
+            handedness=np.array(self.handedness, dtype="<U5").reshape(-1, hands),
+            size=np.array([width, height], dtype=np.int32),
+        )
+
+
+class LandmarkStream(object):
+    """Feeds a recorded stream into a `HandLandmarks` frame by frame"""
+
+    def __init__(self, path):
+        data = np.load(path)
+        self.points = data["points"]
+        self.world = data["world"]
+        self.counts = data["counts"]
+        self.handedness = data["handedness"]
+        self.width, self.height = (int(v) for v in data["size"])
+        self.index = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def read(self, landmarks):
+        """Load the next frame, False once the stream is exhausted"""
+        if self.index >= len(self.counts):
+            return False
+
+        count = min(int(self.counts[self.index]), landmarks.max_num_hands)
+        landmarks.count = count
+        landmarks.points[:count] = self.points[self.index, :count]
+        landmarks.world[:count] = self.world[self.index, :count]
+        for hand in range(count):
+            landmarks.handedness[hand] = str(self.handedness[self.index, hand])
+
+        self.index += 1
+        return True
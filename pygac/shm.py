@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared-memory landmark stream.
+
+Every processed frame is written into a ring of fixed-size slots in a
+`multiprocessing.shared_memory` block, which other processes map and
+read without pickling, sockets or locks. All values are little-endian
+and C-aligned, the block is a 64 byte header followed by `slots` slots:
+
+    header
+        0   magic           8s      b"PYGACLM1"
+        8   version         uint32  1
+        12  slots           uint32  number of slots in the ring
+        16  slot_size       uint32  bytes per slot
+        20  max_hands       uint32  hands per slot
+        24  landmarks       uint32  21
+        28  writer_pid      uint32  process writing the block, 0 unknown
+        32  frames          uint64  frames written so far
+        40  (padding up to 64)
+
+    slot, frame n is stored in slot n % slots
+        0   sequence        uint64  odd while the slot is being written
+        8   frame           uint64  frame number n
+        16  capture_time    float64 time.perf_counter() at capture
+        24  publish_time    float64 time.time() when written
+        32  count           uint32  hands in this frame
+        36  handedness      uint8   (max_hands,) 0 none, 1 Left, 2 Right
+            hand_sign       int32   (max_hands,) keypoint class, -1 none
+            finger_gesture  int32   (max_hands,) smoothed point history class
+            confidence      float32 (max_hands,) finger gesture confidence
+            points          float32 (max_hands, 21, 3) normalized, mirrored
+            world           float32 (max_hands, 21, 3) meters
+
+`slot_dtype(max_hands)` gives the exact offsets. Writers follow a
+seqlock: bump `sequence` to odd, write the slot, bump it to even, then
+publish `frames`. Readers copy a slot and keep it only if `sequence`
+was the same even value before and after the copy and `frame` is the
+one they asked for; otherwise the writer lapped them.
+
+A block left behind by a crashed writer is replaced by the next
+publisher, but only once `writer_pid` is known to have exited.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = b"PYGACLM1"
+VERSION = 1
+HEADER_SIZE = 64
+NUM_LANDMARKS = 21
+DEFAULT_NAME = "pygac-landmarks"
+
+HANDEDNESS_CODES = {"": 0, "Left": 1, "Right": 2}
+HANDEDNESS_NAMES = {code: name for name, code in HANDEDNESS_CODES.items()}
+
+HEADER_DTYPE = np.dtype({
+    "names": ["magic", "version", "slots", "slot_size", "max_hands",
+              "landmarks", "writer_pid", "frames"],
+    "formats": ["S8", "<u4", "<u4", "<u4", "<u4", "<u4", "<u4", "<u8"],
+    "offsets": [0, 8, 12, 16, 20, 24, 28, 32],
+    "itemsize": HEADER_SIZE,
+})
+
+
+def slot_dtype(max_hands=2):
+    """Layout of one slot"""
+    return np.dtype([
+        ("sequence", "<u8"),
+        ("frame", "<u8"),
+        ("capture_time", "<f8"),
+        ("publish_time", "<f8"),
+        ("count", "<u4"),
+        ("handedness", "u1", (max_hands,)),
+        ("hand_sign", "<i4", (max_hands,)),
+        ("finger_gesture", "<i4", (max_hands,)),
+        ("confidence", "<f4", (max_hands,)),
+        ("points", "<f4", (max_hands, NUM_LANDMARKS, 3)),
+        ("world", "<f4", (max_hands, NUM_LANDMARKS, 3)),
+    ], align=True)
+
+
+# Blocks created by this process. Forked children inherit both the set
+# and the resource tracker the blocks are registered with.
+_published = set()
+
+
+def _attach(name):
+    """Map an existing block without letting this process unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach registers with the resource
+        # tracker, which would destroy the block when a reader exits.
+        # A tracker shared with the writer already holds the block, undoing
+        # the registration there would drop the writer's own.
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Someone else's process
+    return True
+
+
+def _remove_stale(name):
+    """Unlink a block whose writer has exited, refuse anything else"""
+    stale = _attach(name)
+    try:
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=stale.buf)
+        magic, pid = bytes(header["magic"]), int(header["writer_pid"])
+        del header
+    finally:
+        stale.close()
+
+    if magic != MAGIC:
+        raise FileExistsError("Shared memory %s exists and is not a landmark stream"
+                              % name)
+    if pid == 0:
+        raise FileExistsError("Landmark stream %s exists with no writer recorded, "
+                              "remove /dev/shm/%s if it is left over" % (name, name))
+    if _process_exists(pid):
+        raise FileExistsError("Landmark stream %s is being written by process %d"
+                              % (name, pid))
+    if not hasattr(stale, "_track"):
+        # Before Python 3.13 unlink() unregisters, whatever _attach did
+        resource_tracker.register(stale._name, "shared_memory")
+    stale.unlink()
+
+
+class LandmarkPublisher(object):
+    """Writes frames into the shared ring, a single writer per block
+
+    ARGUMENTS:
+        - name              str() Name of the shared memory block.
+        - slots             int() Frames kept before the oldest is overwritten.
+        - max_hands         int() Hands per frame.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, slots=64, max_hands=2):
+        self.dtype = slot_dtype(max_hands)
+        self.slots_count = slots
+        size = HEADER_SIZE + slots * self.dtype.itemsize
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _remove_stale(name)  # Or raise, if its writer is still running
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _published.add(self.shm.name)
+
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self.slots = np.ndarray((slots,), dtype=self.dtype, buffer=self.shm.buf,
+                                offset=HEADER_SIZE)
+        self.slots[...] = 0
+        self.header["magic"] = MAGIC
+        self.header["version"] = VERSION
+        self.header["slots"] = slots
+        self.header["slot_size"] = self.dtype.itemsize
+        self.header["max_hands"] = max_hands
+        self.header["landmarks"] = NUM_LANDMARKS
+        self.header["writer_pid"] = os.getpid()
+        self.header["frames"] = 0
+
+        self.frames = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, landmarks, hand_signs=None, finger_gestures=None,
+                confidences=None, capture_time=0.0):
+        """Write one frame from a `HandLandmarks` and the classifier outputs"""
+        slot = self.slots[self.frames % self.slots_count, ...]
+        n = min(landmarks.count, len(slot["handedness"]))
+
+        slot["sequence"] += 1  # Odd, readers back off
+        slot["frame"] = self.frames
+        slot["capture_time"] = capture_time
+        slot["publish_time"] = time.time()
+        slot["count"] = n
+        slot["handedness"][:] = 0
+        for hand in range(n):
+            slot["handedness"][hand] = HANDEDNESS_CODES.get(landmarks.handedness[hand], 0)
+        for field, values, empty in (("hand_sign", hand_signs, -1),
+                                     ("finger_gesture", finger_gestures, -1),
+                                     ("confidence", confidences, 0.0)):
+            slot[field][:] = empty
+            if values is not None:
+                slot[field][:n] = values[:n]
+        slot["points"][:n] = landmarks.points[:n]
+        slot["world"][:n] = landmarks.world[:n]
+        slot["sequence"] += 1  # Even again, the slot is consistent
+
+        self.frames += 1
+        self.header["frames"] = self.frames
+
+    def close(self):
+        """Unmap and remove the block, readers keep their mapping"""
+        del self.header, self.slots
+        self.shm.close()
+        self.shm.unlink()
+        _published.discard(self.shm.name)
+
+
+class LandmarkReader(object):
+    """Reads frames from a `LandmarkPublisher` in another process
+
+    `poll` returns the frames written since the last call, `wait` blocks
+    until there is at least one. Frames overwritten before they were read
+    are counted in `missed`, copies torn by a concurrent write are
+    retried and counted in `retries`.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = _attach(name)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if bytes(self.header["magic"]) != MAGIC or int(self.header["version"]) != VERSION:
+            self.shm.close()
+            raise ValueError("%s is not a landmark stream" % name)
+
+        self.max_hands = int(self.header["max_hands"])
+        self.dtype = slot_dtype(self.max_hands)
+        self.slots_count = int(self.header["slots"])
+        if int(self.header["slot_size"]) != self.dtype.itemsize:
+            self.shm.close()
+            raise ValueError("Unexpected slot size in %s" % name)
+
+        self.slots = np.ndarray((self.slots_count,), dtype=self.dtype,
+                                buffer=self.shm.buf, offset=HEADER_SIZE)
+
+        self.next_frame = int(self.header["frames"])  # Only new frames
+        self.missed = 0
+        self.retries = 0
+
+    @property
+    def frames(self):
+        """Frames written so far"""
+        return int(self.header["frames"])
+
+    def read(self, frame, out=None, attempts=8):
+        """Copy of `frame`, None once it has been overwritten"""
+        slot = self.slots[frame % self.slots_count, ...]
+        out = np.empty((), dtype=self.dtype) if out is None else out
+        for _ in range(attempts):
+            sequence = int(slot["sequence"])
+            if sequence & 1:
+                self.retries += 1
+                continue
+            out[...] = slot
+            if int(slot["sequence"]) == sequence:
+                return out if int(out["frame"]) == frame else None
+            self.retries += 1
+        return None
+
+    def latest(self, out=None):
+        """The most recent complete frame, None before the first one"""
+        frames = self.frames
+        while frames:
+            record = self.read(frames - 1, out)
+            if record is not None:
+                return record
+            frames = self.frames
+        return None
+
+    def poll(self):
+        """Frames written since the last call, oldest first"""
+        frames = self.frames
+        if frames - self.next_frame > self.slots_count:
+            # Lapped, the oldest frames are gone already
+            self.missed += frames - self.next_frame - self.slots_count
+            self.next_frame = frames - self.slots_count
+
+        records = []
+        for frame in range(self.next_frame, frames):
+            record = self.read(frame)
+            if record is None:
+                self.missed += 1
+            else:
+                records.append(record)
+        self.next_frame = frames
+        return records
+
+    def wait(self, timeout=None, interval=0.001):
+        """Like `poll`, but sleeps in `interval` steps until a frame arrives"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.frames == self.next_frame:
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+            time.sleep(interval)
+        return self.poll()
+
+    @staticmethod
+    def handedness(record):
+        """Handedness names of the hands in a record"""
+        return [HANDEDNESS_NAMES.get(int(code), "")
+                for code in record["handedness"][:int(record["count"])]]
+
+    def close(self):
+        del self.header, self.slots
+        self.shm.close()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gesture smoothing.
+
+Per-frame classifier outputs are noisy, so events are driven by a vote
+over recent frames. Scores per class are kept incrementally as entries
+enter and leave the window, which makes every update constant cost.
+"""
+
+import numpy as np
+
+COUNT = "count"  # Every frame in the window has one vote
+CONFIDENCE = "confidence"  # Votes weighted by classifier confidence
+DECAY = "decay"  # Exponentially decayed votes, no fixed window
+
+MODES = (COUNT, CONFIDENCE, DECAY)
+
+
+class GestureVote(object):
+    """Sliding-window vote with hysteresis
+
+    ARGUMENTS:
+        - num_classes       int() Number of gesture classes.
+        - window            int() Frames in the window (COUNT, CONFIDENCE).
+        - mode              str() One of MODES.
+        - decay             float() Per-frame factor for DECAY.
+        - enter             float() Share of the total score a class needs
+                            before it replaces the current decision.
+        - exit              float() The current decision is kept while its
+                            share stays above this.
+    """
+
+    def __init__(self, num_classes, window=16, mode=COUNT, decay=0.85,
+                 enter=0.0, exit=1.0):
+        if mode not in MODES:
+            raise ValueError("Unknown vote mode: %s" % mode)
+
+        self.num_classes = num_classes
+        self.window = window
+        self.mode = mode
+        self.decay = decay
+        self.enter = enter
+        self.exit = exit
+
+        self.scores = np.zeros(num_classes, dtype=np.float64)
+        self.decision = None
+        self.frame = 0
+
+        self._classes = np.zeros(window, dtype=np.int64)
+        self._weights = np.zeros(window, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+        # Decision latency: frames from a new input class to its decision
+        self._streak_class = None
+        self._streak_start = 0
+        self.latencies = []
+
+    def update(self, gesture, confidence=1.0):
+        """Add this frame's classification, returns the current decision"""
+        self.frame += 1
+        weight = confidence if self.mode == CONFIDENCE else 1.0
+
+        if self.mode == DECAY:
+            self.scores *= self.decay
+        else:
+            if self._count == self.window:
+                # The oldest entry leaves the window
+                self.scores[self._classes[self._head]] -= self._weights[self._head]
+            else:
+                self._count += 1
+            self._classes[self._head] = gesture
+            self._weights[self._head] = weight
+            self._head = (self._head + 1) % self.window
+
+        self.scores[gesture] += weight
+
+        if gesture != self._streak_class:
+            self._streak_class = gesture
+            self._streak_start = self.frame
+
+        self._decide()
+        return self.decision
+
+    def _decide(self):
+        leader = int(np.argmax(self.scores))
+        if leader == self.decision:
+            return
+
+        if self.decision is not None:
+            total = self.scores.sum()
+            if total <= 0:
+                return
+            current = self.scores[self.decision]
+            if self.scores[leader] <= current:
+                return  # Ties keep the current decision
+            if self.scores[leader] / total < self.enter:
+                return
+            if current / total > self.exit:
+                return
+
+        self.decision = leader
+        if leader == self._streak_class:
+            self.latencies.append(self.frame - self._streak_start)
+
+    def report(self):
+        """Decision latency in frames"""
+        latencies = self.latencies
+        return {
+            "decisions": len(latencies),
+            "mean_frames": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "max_frames": max(latencies) if latencies else 0,
+        }
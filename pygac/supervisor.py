@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Several camera streams on one machine.
+
+Every stream runs a GestureControl in its own process, with its own
+MediaPipe graph, classifiers, sound sink and MPRIS target. The
+supervisor restarts a worker when its camera goes away or it stops
+processing frames, and aggregates the health reports workers send every second.
+
+    python3 -m pygac.supervisor streams.json
+
+with streams.json along the lines of
+
+    {"defaults": {"max_fps": 15, "roi": true},
+     "streams": [{"name": "kitchen", "device": 0, "sink": "1"},
+                 {"name": "office", "device": 2, "sink": "2",
+                  "mpris_target": "spotify"}]}
+
+Stream options are the long options of app.py, with underscores.
+"""
+
+import sys
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+import multiprocessing
+
+from .utils import GracefulExit
+
+
+def stream_args(**options):
+    """GestureControl arguments for one stream, app.py defaults otherwise"""
+    args = argparse.Namespace(
+        device=-1, width=960, height=540, headless=True,
+        min_detection_confidence=0.7, min_tracking_confidence=0.5,
+        delay=0.4, threshold=0.012,
+    )
+    vars(args).update(options)
+    return args
+
+
+def run_stream(name, options, health, stop, interval=1.0):
+    """Worker process, runs one GestureControl until its camera is lost"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is for the supervisor
+
+    from .pygac import GestureControl
+
+    gc = GestureControl(stream_args(**options), handle_signals=False)
+
+    def report():
+        while not stop.wait(interval):
+            health.put({
+                "stream": name,
+                "time": time.time(),
+                "state": gc.governor.state,
+                "fps": gc.governor.fps,
+                "frames": sum(gc.governor.frames.values()),
+            })
+        gc.exit_now = True
+
+    threading.Thread(target=report, name="pygac-health", daemon=True).start()
+    gc.start()
+
+
+class Worker(object):
+    """Supervisor side of one stream"""
+
+    def __init__(self, name, options):
+        self.name = name
+        self.options = options
+        self.process = None
+        self.started = 0.0
+        self.restarts = 0
+        self.backoff = 0.0
+        self.restart_at = 0.0
+        self.last_report = None
+        self.last_seen = 0.0
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor(GracefulExit):
+    """Runs one worker process per stream and keeps them running
+
+    ARGUMENTS:
+        - streams           list() Dicts of stream options, "name" optional.
+        - defaults          dict() Options shared by every stream.
+        - interval          float() Seconds between worker health reports.
+        - timeout           float() A worker without new frames for this
+                            long is restarted.
+        - startup_timeout   float() Time allowed until the first frame.
+        - backoff           float() First delay before a restart, doubled
+                            while workers keep dying young.
+        - max_backoff       float() Longest delay before a restart.
+        - handle_signals    bool() Stop on SIGINT and SIGTERM.
+    """
+
+    def __init__(self, streams, defaults=None, interval=1.0, timeout=10.0,
+                 startup_timeout=60.0, backoff=1.0, max_backoff=30.0,
+                 handle_signals=True):
+        if handle_signals:
+            GracefulExit.__init__(self)
+        self.exit_now = False
+
+        self.interval = interval
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.min_backoff = backoff
+        self.max_backoff = max_backoff
+
+        # MediaPipe and the TFLite interpreters do not survive a fork
+        self.context = multiprocessing.get_context("spawn")
+        self.health = self.context.Queue()
+        self.stop_event = self.context.Event()
+
+        self.workers = {}
+        for number, stream in enumerate(streams):
+            options = dict(defaults or {})
+            options.update(stream)
+            name = str(options.pop("name", number))
+            self.workers[name] = Worker(name, options)
+
+    def _spawn(self, worker):
+        worker.process = self.context.Process(
+            target=run_stream, name="pygac-" + worker.name,
+            args=(worker.name, worker.options, self.health, self.stop_event,
+                  self.interval),
+            daemon=True)
+        worker.process.start()
+        worker.started = time.monotonic()
+        worker.last_report = None
+
+    def _collect(self, timeout):
+        """Read health reports for up to `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = self.health.get(timeout=remaining)
+            except queue.Empty:
+                return
+            worker = self.workers.get(message["stream"])
+            if worker is not None:
+                previous = worker.last_report or {}
+                if message["frames"] > previous.get("frames", 0):
+                    worker.last_seen = time.monotonic()  # Frames still coming
+                worker.last_report = message
+
+    def _check(self):
+        """Restart dead and silent workers, with backoff"""
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.alive:
+                if worker.last_seen > worker.started:
+                    stalled = now - worker.last_seen > self.timeout
+                else:
+                    stalled = now - worker.started > self.startup_timeout
+                if not stalled:
+                    continue
+                print("Stream %s stopped processing frames, restarting" % worker.name)
+                worker.process.terminate()
+                worker.process.join(1.0)
+
+            if worker.restart_at == 0.0:
+                if worker.process is not None:
+                    # Dying before the first frame means the camera is really gone
+                    if worker.last_seen <= worker.started:
+                        worker.backoff = min(self.max_backoff,
+                                             max(self.min_backoff, worker.backoff * 2))
+                    else:
+                        worker.backoff = self.min_backoff
+                    print("Stream %s exited (%s), restarting in %.1fs" % (
+                        worker.name, worker.process.exitcode, worker.backoff))
+                    worker.restarts += 1
+                worker.restart_at = now + worker.backoff
+
+            if now >= worker.restart_at:
+                worker.restart_at = 0.0
+                self._spawn(worker)
+
+    def report(self):
+        """Health of every stream and their combined frame rate"""
+        streams = {}
+        for name, worker in self.workers.items():
+            last = worker.last_report or {}
+            streams[name] = {
+                "alive": worker.alive,
+                "pid": worker.process.pid if worker.process is not None else None,
+                "restarts": worker.restarts,
+                "state": last.get("state"),
+                "fps": last.get("fps", 0.0),
+                "frames": last.get("frames", 0),
+            }
+        return {
+            "streams": streams,
+            "alive": sum(stream["alive"] for stream in streams.values()),
+            "total_fps": round(sum(stream["fps"] for stream in streams.values()
+                                   if stream["alive"]), 2),
+        }
+
+    def run(self, report_every=10.0):
+        """Main Loop, prints the aggregate report every `report_every` seconds"""
+        for worker in self.workers.values():
+            self._spawn(worker)
+
+        next_report = time.monotonic() + report_every
+        try:
+            while not self.exit_now:
+                self._collect(self.interval)
+                self._check()
+                if report_every and time.monotonic() >= next_report:
+                    next_report += report_every
+                    print(json.dumps(self.report()))
+        finally:
+            self.stop()
+
+    def stop(self, timeout=5.0):
+        """Ask every worker to finish, terminate the ones that do not"""
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m pygac.supervisor")
+    parser.add_argument("config", help="JSON file with defaults and streams")
+    parser.add_argument("--report_every", type=float, default=10.0,
+                        help="Seconds between aggregate health reports")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="Restart a worker without new frames for this long")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    supervisor = Supervisor(config["streams"], config.get("defaults"),
+                            timeout=args.timeout)
+    supervisor.run(report_every=args.report_every)
+    json.dump(supervisor.report(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Region-of-interest hand tracking.
+
+Once hands are found, the next frame is cropped to their padded
+bounding box and downscaled before it is handed to MediaPipe, so the
+detector looks at a few thousand pixels instead of the whole frame.
+Landmarks are mapped back to full-frame coordinates afterwards. As soon
+as no hand is found the tracker falls back to full-frame detection.
+
+A hand entering the frame outside the crop would never be seen, so while
+fewer than `max_num_hands` are tracked the whole frame is looked at
+again every `refresh` frames.
+"""
+
+import cv2 as cv
+import numpy as np
+
+
+class RoiTracker(object):
+    """Crop around the hands of the previous frame
+
+    ARGUMENTS:
+        - padding           float() Margin added on every side, relative
+                            to the size of the bounding box.
+        - size              int() Longest side of the crop after scaling.
+        - min_size          int() Smallest crop side in pixels.
+        - max_num_hands     int() Hands MediaPipe looks for.
+        - refresh           int() Frames between full-frame detections while
+                            fewer hands are tracked, 1 for every frame.
+    """
+
+    def __init__(self, padding=0.5, size=256, min_size=96, max_num_hands=2,
+                 refresh=10):
+        self.padding = padding
+        self.size = size
+        self.min_size = min_size
+        self.max_num_hands = max_num_hands
+        self.refresh = max(1, refresh)
+
+        self.roi = None  # (x0, y0, x1, y1) in unmirrored frame pixels
+        self.count = 0  # Hands inside the ROI
+        self.since_full = 0  # Cropped frames since the last full one
+        self.tracked_frames = 0
+        self.full_frames = 0
+        self.refreshes = 0
+
+    def crop(self, image, frame_pool=None):
+        """The image to detect on and the ROI it was cut from, if any"""
+        if self.roi is not None and self.count < self.max_num_hands \
+                and self.since_full + 1 >= self.refresh:
+            self.refreshes += 1
+            self.roi = None  # Look for more hands
+
+        if self.roi is None:
+            self.full_frames += 1
+            self.since_full = 0
+            return image, None
+
+        self.tracked_frames += 1
+        self.since_full += 1
+        x0, y0, x1, y1 = self.roi
+        crop = image[y0:y1, x0:x1]
+
+        scale = self.size / max(x1 - x0, y1 - y0)
+        if scale < 1.0:
+            size = (max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale)))
+            buffer = None
+            if frame_pool is not None:
+                buffer = frame_pool.buffer("roi", (size[1], size[0], image.shape[2]))
+            crop = cv.resize(crop, size, dst=buffer, interpolation=cv.INTER_AREA)
+        else:
+            crop = np.ascontiguousarray(crop)
+
+        return crop, self.roi
+
+    def to_full_frame(self, landmarks, roi, image_width, image_height):
+        """Map landmarks normalized to `roi` back to the whole frame"""
+        if roi is None:
+            return
+        x0, y0, x1, y1 = roi
+        n = landmarks.count
+        points = landmarks.points[:n]
+        points[:, :, 0] *= (x1 - x0) / image_width
+        points[:, :, 0] += x0 / image_width
+        points[:, :, 1] *= (y1 - y0) / image_height
+        points[:, :, 1] += y0 / image_height
+        points[:, :, 2] *= (x1 - x0) / image_width  # Depth is scaled like x
+
+    def update(self, brects, image_width, image_height):
+        """Track the union of this frame's bounding boxes, None to lose track"""
+        if brects is None or not len(brects):
+            self.roi = None
+            self.count = 0
+            return
+        self.count = len(brects)
+
+        x0, y0 = brects[:, 0].min(), brects[:, 1].min()
+        x1, y1 = brects[:, 2].max(), brects[:, 3].max()
+
+        # Pad, keep a minimum size, square it up roughly like MediaPipe does
+        side = max(x1 - x0, y1 - y0) * (1 + 2 * self.padding)
+        side = max(side, self.min_size)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+
+        self.roi = (
+            int(max(0, cx - side / 2)),
+            int(max(0, cy - side / 2)),
+            int(min(image_width, cx + side / 2)),
+            int(min(image_height, cy + side / 2)),
+        )
+
+        if self.roi[2] - self.roi[0] < 2 or self.roi[3] - self.roi[1] < 2:
+            self.roi = None
+
+    def report(self):
+        return {"tracked_frames": self.tracked_frames,
+                "full_frames": self.full_frames,
+                "refreshes": self.refreshes}
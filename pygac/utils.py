@@ -1,25 +1,63 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+import time
 import signal
+import tempfile
 
 from collections import deque
-import cv2 as cv
 
-temporary_directory = None  # Will be changed upon initialization
+temporary_directory = os.path.join(tempfile.gettempdir(), "PythonGestureAudioController")
+
+e = 2.71828182846
 
 def debug(text):
     print(text)
 
+def continuous_rectifier(x0, x, x1):
+    """
+    Theoretical Continuous Analog Rectifier For Artificial Neural Networks.
+
+    NOTE:           The algorithm yields an input-value rectified
+                    between two other values calculated by the relative
+                    distance distance. This equation is defined as:
+                    ______________________________________________________
+
+                                            x1 - x0
+                    f(x0, x, x1) = ------------------------ + x0
+                                           -(2*x - x1 - x0)
+                                            ---------------
+                                   1 + (5e)     x1 - x0
+                    ______________________________________________________
+                    If x is not between x0 and x1, x will be valued
+                    closest to that value. This will create.
+                    If x0<x<x1, x will kind of keep its value apart
+                    from minor changes. If not x0<x<x1, x will be
+                    fit within boundaries. It is basically the
+                    sigmoid function, but instead of: x -> 0<x<1
+                    it is: x -> x0<x<x1
+
+    ARGUMENTS:
+        - x0                float() The lower boundary (min).
+        - x                 float() The value to rectify.
+        - x1                float() The upper boundary (max).
+    RETURNS:
+        - float()           x0 <= x <= x1
+    """
+
+    return (x1 - x0) / (1 + (5*e) ** -((2*x - x1 - x0) / (x1 - x0))) + x0
+
 class CvFpsCalc(object):
     """Calculate Camera FPS"""
     def __init__(self, buffer_len=1):
-        self._start_tick = cv.getTickCount()
-        self._freq = 1000.0 / cv.getTickFrequency()
+        # Monotonic like cv.getTickCount, without importing OpenCV for it
+        self._start_tick = time.perf_counter()
+        self._freq = 1000.0  # Ticks are seconds
         self._difftimes = deque(maxlen=buffer_len)
 
     def get(self):
-        current_tick = cv.getTickCount()
+        current_tick = time.perf_counter()
         different_time = (current_tick - self._start_tick) * self._freq
         self._start_tick = current_tick
 
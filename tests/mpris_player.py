@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Minimal MPRIS player for the D-Bus tests.
+
+    python3 tests/mpris_player.py <bus address> <name> [status]
+
+Prints "ready" once its name is owned. Play, Pause, Stop and PlayPause
+change PlaybackStatus and emit PropertiesChanged like a real player.
+"""
+
+import sys
+
+import dbus
+import dbus.service
+
+from dbus.mainloop.glib import DBusGMainLoop
+from gi.repository import GLib
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_INTERFACE = "org.mpris.MediaPlayer2.Player"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+
+class Player(dbus.service.Object):
+
+    def __init__(self, bus, status):
+        dbus.service.Object.__init__(self, bus, MPRIS_PATH)
+        self.status = status
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="ss", out_signature="v")
+    def Get(self, interface, name):
+        if interface == PLAYER_INTERFACE and name == "PlaybackStatus":
+            return self.status
+        raise dbus.exceptions.DBusException("No such property: %s" % name,
+                                            name="org.freedesktop.DBus.Error.UnknownProperty")
+
+    @dbus.service.signal(PROPERTIES_INTERFACE, signature="sa{sv}as")
+    def PropertiesChanged(self, interface, changed, invalidated):
+        pass
+
+    def _set(self, status):
+        self.status = status
+        self.PropertiesChanged(PLAYER_INTERFACE, {"PlaybackStatus": status}, [])
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Play(self):
+        self._set("Playing")
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Pause(self):
+        self._set("Paused")
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def Stop(self):
+        self._set("Stopped")
+
+    @dbus.service.method(PLAYER_INTERFACE)
+    def PlayPause(self):
+        self._set("Paused" if self.status == "Playing" else "Playing")
+
+
+def main(address, name, status="Stopped"):
+    DBusGMainLoop(set_as_default=True)
+    bus = dbus.bus.BusConnection(address)
+    player = Player(bus, status)
+    bus_name = dbus.service.BusName(MPRIS_PREFIX + name, bus)
+    print("ready", flush=True)
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+from pygac.audio.actuator import VolumeActuator, SLEW_INTERVAL
+from pygac.audio.pulse import RecordingConnection
+from pygac.pipeline import Pipeline
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def actuator(**options):
+    connection = RecordingConnection()
+    return VolumeActuator(connection, **options), connection
+
+
+def test_unlimited_rate_jumps_to_the_target():
+    volume, connection = actuator(max_rate=0)
+    try:
+        volume.set_target(30)
+        assert wait_for(lambda: volume.level == 30)
+        volume.set_target(70)
+        assert wait_for(lambda: volume.level == 70)
+        assert connection.flush(5.0)
+    finally:
+        volume.close()
+        connection.close()
+    assert connection.volumes[-1][1] == 70
+    assert volume.sent == 2
+
+
+def test_unlimited_rate_slews_without_spinning():
+    volume, connection = actuator(max_rate=0, slew=200.0)
+    try:
+        volume.set_target(0)
+        assert wait_for(lambda: volume.level == 0)
+        start = time.monotonic()
+        volume.set_target(100)  # Half a second of travel
+        assert wait_for(lambda: volume.level == 100)
+        elapsed = time.monotonic() - start
+    finally:
+        volume.close()
+        connection.close()
+
+    steps = volume.sent - 1
+    assert steps <= elapsed / SLEW_INTERVAL + 2
+    assert elapsed >= 0.4
+
+
+def test_close_sends_the_final_target():
+    volume, connection = actuator(max_rate=1.0, slew=1.0)
+    volume.set_target(10)
+    assert wait_for(lambda: volume.level == 10)
+    volume.set_target(90)
+    volume.close()
+    assert connection.flush(5.0)
+    connection.close()
+    assert connection.volumes[-1][1] == 90
+
+
+def test_frame_timestamp_reaches_the_written_volume():
+    pipeline = Pipeline()
+    volume, connection = actuator(max_rate=0, slew=400.0)
+    connection.recorders.append(pipeline)
+    try:
+        volume.set_target(0, time.perf_counter())
+        assert wait_for(lambda: volume.level == 0)
+        volume.set_target(100, time.perf_counter())  # Several slew steps
+        assert wait_for(lambda: volume.level == 100)
+        assert connection.flush(5.0)
+    finally:
+        volume.close()
+        connection.close()
+
+    # Only the first step towards each target answers a frame
+    assert pipeline.latency["end_to_end"].count == 2
+    assert pipeline.latency["actuation"].count == connection.sent > 2
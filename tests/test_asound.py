@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import ctypes
+
+from pygac.audio import asound
+
+CARDS = """\
+ 0 [PCH            ]: HDA-Intel - HDA Intel PCH
+                      HDA Intel PCH at 0xf7f10000 irq 33
+ 1 [Device         ]: USB-Audio - USB Audio Device
+                      C-Media USB Audio Device at usb-0000:00:14.0-2, full speed
+"""
+
+DOCK = " 2 [Dock           ]: USB-Audio - Dock\n                      Dock at usb-0000:00:14.0-3\n"
+
+ELEMENTS = {
+    0: ["Master Playback Volume", "Master Playback Switch", "Headphone Playback Volume",
+        "PCM Playback Volume", "Capture Volume", "Mic Boost Volume"],
+    1: ["Speaker Playback Volume", "Speaker Playback Switch"],
+    2: ["Master Playback Volume"],
+}
+
+BLACKLIST = ["capture", "mic", "pcm"]
+
+
+def discovery(root, **options):
+    reads = []
+
+    def read_controls(number):
+        reads.append(number)
+        return ELEMENTS[number]
+
+    (root / "cards").write_text(CARDS)
+    found = asound.SoundcardDiscovery(root=str(root), dev_root=str(root),
+                                      blacklist=BLACKLIST,
+                                      read_controls=read_controls, **options)
+    return found, reads
+
+
+def test_elem_list_matches_the_kernel_struct():
+    # struct snd_ctl_elem_list in <sound/asound.h>
+    assert asound._ElemList.offset.offset == 0
+    assert asound._ElemList.space.offset == 4
+    assert asound._ElemList.used.offset == 8
+    assert asound._ElemList.count.offset == 12
+    assert asound._ElemList.pids.offset == 16
+    assert ctypes.sizeof(asound._ElemId) == 64
+    if ctypes.sizeof(ctypes.c_void_p) == 8:
+        assert asound.SNDRV_CTL_IOCTL_ELEM_LIST == 0xc0505510
+
+
+def test_read_cards(tmp_path):
+    (tmp_path / "cards").write_text(CARDS)
+    assert asound.read_cards(str(tmp_path)) == [
+        (0, "PCH", "HDA-Intel - HDA Intel PCH"),
+        (1, "Device", "USB-Audio - USB Audio Device"),
+    ]
+    assert asound.read_cards(str(tmp_path / "missing")) == []
+
+
+def test_blacklist():
+    assert asound.mixer_controls(ELEMENTS[0], BLACKLIST) == ["Master", "Headphone"]
+    assert asound.mixer_controls(ELEMENTS[0]) == ["Master", "Headphone", "PCM",
+                                                  "Capture", "Mic Boost"]
+
+
+def test_scan_is_cached(tmp_path):
+    found, reads = discovery(tmp_path)
+    added, removed = found.scan()
+    assert [card.number for card in added] == [0, 1]
+    assert removed == []
+    assert found.cards[0].controls == ["Master", "Headphone"]
+    assert found.cards[1].controls == ["Speaker"]
+
+    assert found.scan() == ([], [])
+    assert reads == [0, 1]
+
+
+def test_hotplug_add_and_remove(tmp_path):
+    found, reads = discovery(tmp_path)
+    found.scan()
+
+    (tmp_path / "cards").write_text(CARDS + DOCK)
+    added, removed = found.scan()
+    assert [(card.number, card.id, card.controls) for card in added] == [
+        (2, "Dock", ["Master"])]
+    assert removed == []
+    assert reads == [0, 1, 2]  # Known cards are not queried again
+
+    (tmp_path / "cards").write_text(DOCK)
+    added, removed = found.scan()
+    assert added == []
+    assert sorted(card.number for card in removed) == [0, 1]
+    assert list(found.cards) == [2]
+
+
+def test_replaced_card_is_read_again(tmp_path):
+    found, reads = discovery(tmp_path)
+    found.scan()
+
+    (tmp_path / "cards").write_text(CARDS.replace("[Device ", "[Other  "))
+    added, removed = found.scan()
+    assert [card.id for card in removed] == ["Device"]
+    assert [card.id for card in added] == ["Other"]
+    assert reads == [0, 1, 1]
+
+
+def test_background_updates(tmp_path):
+    found, _ = discovery(tmp_path, interval=0.05, settle=0.01)
+    found.scan()
+    changes = []
+    found.start(lambda added, removed: changes.append((added, removed)))
+    try:
+        (tmp_path / "cards").write_text(CARDS + DOCK)
+        (tmp_path / "controlC2").write_text("")  # What the watch sees on hotplug
+
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        found.close()
+
+    assert [card.number for card in changes[0][0]] == [2]
+    assert not found._thread.is_alive()
+
+
+def test_unreadable_card_has_no_controls(tmp_path):
+    def read_controls(number):
+        raise PermissionError(13, "Permission denied")
+
+    (tmp_path / "cards").write_text(CARDS)
+    found = asound.SoundcardDiscovery(root=str(tmp_path), read_controls=read_controls)
+    added, _ = found.scan()
+    assert [card.controls for card in added] == [[], []]
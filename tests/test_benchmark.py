@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from pygac.benchmark import landmark_error
+from pygac.landmarks import HandLandmarks
+from pygac.replay import LandmarkRecorder, LandmarkStream
+
+
+def record(path, frames):
+    """`frames` of [(handedness, x), ...], saved as a 100 x 100 landmark stream"""
+    recorder = LandmarkRecorder(2)
+    for hands in frames:
+        landmarks = HandLandmarks(2)
+        landmarks.count = len(hands)
+        for index, (handedness, x) in enumerate(hands):
+            landmarks.handedness[index] = handedness
+            landmarks.points[index, :, 0] = x
+        recorder.add(landmarks)
+    recorder.save(path, 100, 100)
+    return LandmarkStream(path)
+
+
+def test_hands_are_paired_by_handedness(tmp_path):
+    full = record(str(tmp_path / "full.npz"),
+                  [[("Left", 0.2), ("Right", 0.8)], [("Left", 0.2), ("Right", 0.8)], []])
+    roi = record(str(tmp_path / "roi.npz"),
+                 [[("Right", 0.8), ("Left", 0.2)], [("Left", 0.21), ("Right", 0.8)], [("Left", 0.5)]])
+
+    error = landmark_error(full, roi)
+    assert error["frames"] == 3
+    assert error["hand_count_agreement"] == round(2 / 3, 4)
+    assert np.isclose(error["mean_error_px"], 0.25, atol=1e-3)  # 1 px off on one hand of two
+    assert np.isclose(error["max_error_px"], 0.5, atol=1e-3)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+
+import numpy as np
+
+from pygac.collect import (SampleWriter, read_samples, export_csv, KEYPOINT,
+                           POINT_HISTORY, HEADER_SIZE, RECORD_DTYPE)
+from pygac.landmarks import NUM_FEATURES
+
+
+def write(path, samples, **options):
+    writer = SampleWriter(path, **options)
+    for kind, label, features in samples:
+        writer.add(kind, label, features)
+    writer.close()
+    return writer
+
+
+def samples(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(KEYPOINT if n % 2 else POINT_HISTORY, n % 7,
+             rng.uniform(-1, 1, NUM_FEATURES if n % 2 else 32).astype(np.float32))
+            for n in range(count)]
+
+
+def test_records_survive_reopening(tmp_path):
+    path = str(tmp_path / "samples.bin")
+    first, second = samples(10), samples(5, seed=1)
+    write(path, first)
+    writer = write(path, second)
+
+    records = read_samples(path)
+    assert writer.report() == {"added": 5, "written": 5, "dropped": 0}
+    assert len(records) == 15
+    for record, (kind, label, features) in zip(records, first + second):
+        assert (record["kind"], record["label"], record["length"]) == (kind, label, len(features))
+        np.testing.assert_array_equal(record["features"][:len(features)], features)
+        assert not record["features"][len(features):].any()
+
+
+def test_torn_record_is_truncated(tmp_path):
+    path = str(tmp_path / "samples.bin")
+    write(path, samples(3))
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (RECORD_DTYPE.itemsize // 2))  # Crash mid-record
+
+    write(path, samples(2, seed=1))
+
+    size = tmp_path.joinpath("samples.bin").stat().st_size
+    assert size == HEADER_SIZE + 5 * RECORD_DTYPE.itemsize
+    records = read_samples(path)
+    expected = samples(3) + samples(2, seed=1)
+    assert records["label"].tolist() == [label for _, label, _ in expected]
+    np.testing.assert_array_equal(records["features"][3, :32], expected[3][2])
+
+
+def test_export_round_trips_through_the_csvs(tmp_path):
+    path = str(tmp_path / "samples.bin")
+    keypoint_csv = tmp_path / "keypoint.csv"
+    point_history_csv = tmp_path / "point_history.csv"
+    keypoint_csv.write_text("0," + ",".join(["0.5"] * NUM_FEATURES) + "\n")
+    written = samples(9)
+    write(path, written)
+
+    counts = export_csv(path, str(keypoint_csv), str(point_history_csv))
+
+    assert counts == {str(keypoint_csv): 4, str(point_history_csv): 5}
+    for destination, kind, skip in ((keypoint_csv, KEYPOINT, 1),
+                                    (point_history_csv, POINT_HISTORY, 0)):
+        with open(destination, newline="") as f:
+            rows = list(csv.reader(f))[skip:]
+        expected = [(label, features) for k, label, features in written if k == kind]
+        assert len(rows) == len(expected)
+        for row, (label, features) in zip(rows, expected):
+            assert int(row[0]) == label
+            np.testing.assert_array_equal(np.array(row[1:], dtype=np.float32), features)
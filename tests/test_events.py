@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from pygac.events import EventBus, HandEnter, Open, Close, Pinch, Volume
+
+
+def delivered(bus, *types):
+    events = []
+    bus.subscribe(events.append, *types)
+    bus.start()
+    bus.close()
+    return events
+
+
+def test_oldest_continuous_event_is_dropped_first():
+    bus = EventBus(maxlen=3)
+    for event in (Open("Right", 0), Volume(10, 1), Close("Right", 2),
+                  Volume(20, 3), Pinch("Right", 0.5, 4)):
+        bus.publish(event)
+
+    assert delivered(bus) == [Open("Right", 0), Close("Right", 2), Pinch("Right", 0.5, 4)]
+    assert bus.report() == {"published": 5, "dropped": 2}
+
+
+def test_discrete_events_go_only_when_nothing_else_can():
+    bus = EventBus(maxlen=2)
+    for event in (Open("Right", 0), Close("Right", 1), HandEnter("Left", 2)):
+        bus.publish(event)
+
+    assert delivered(bus) == [Close("Right", 1), HandEnter("Left", 2)]
+    assert bus.dropped == 1
+
+
+def test_close_delivers_what_is_queued():
+    bus = EventBus()
+    for percentage in range(100):
+        bus.publish(Volume(percentage, percentage))
+
+    assert [event.percentage for event in delivered(bus)] == list(range(100))
+    bus.publish(Volume(100, 100))  # Ignored once closed
+    assert bus.published == 100
+
+
+def test_subscribers_get_their_types_and_survive_errors():
+    bus = EventBus()
+
+    def broken(event):
+        raise RuntimeError("Subscriber failed")
+
+    bus.subscribe(broken)
+    bus.publish(Open("Left", 0))
+    bus.publish(Volume(50, 1))
+
+    assert delivered(bus, Volume) == [Volume(50, 1)]
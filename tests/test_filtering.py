@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from pygac.filtering import OneEuroFilter, LandmarkFilter, FrameSkipper
+from pygac.landmarks import HandLandmarks, NUM_LANDMARKS
+
+RATE = 30.0
+
+
+def run(filter, values):
+    return np.array([filter(value.copy(), n / RATE) for n, value in enumerate(values)])
+
+
+def test_still_input_is_smoothed():
+    rng = np.random.default_rng(0)
+    jitter = 0.5 + rng.normal(0, 0.005, (300, 1, 2))
+
+    filtered = run(OneEuroFilter(), jitter)[30:]
+    assert filtered.std() < jitter[30:].std() / 2
+
+
+def test_moving_input_lags_less_than_at_rest():
+    ramp = np.linspace(0, 1, 60).reshape(-1, 1, 1).repeat(2, axis=2)
+
+    lag = np.abs(run(OneEuroFilter(), ramp) - ramp)[10:].mean()
+    rest_lag = np.abs(run(OneEuroFilter(beta=0.0), ramp) - ramp)[10:].mean()
+    assert lag < rest_lag / 5
+
+
+def test_prediction_follows_the_velocity():
+    filter = OneEuroFilter()
+    for n in range(30):
+        filter(np.array([[n / RATE, 0.0]]), n / RATE)  # One unit per second
+
+    predicted = filter.predict(30 / RATE, np.empty((1, 2)))
+    assert abs(predicted[0, 0] - 1.0) < 0.05
+
+
+def hand(x, handedness="Right"):
+    landmarks = HandLandmarks(2)
+    landmarks.count = 1
+    landmarks.handedness[0] = handedness
+    landmarks.points[0] = np.full((NUM_LANDMARKS, 3), x, dtype=np.float32)
+    return landmarks
+
+
+def test_new_hand_has_no_error():
+    filter = LandmarkFilter()
+    assert filter.update(hand(0.5), 0.0) is None
+    assert filter.update(hand(0.5), 1 / RATE) == 0.0
+    assert filter.update(hand(0.5, "Left"), 2 / RATE) is None  # Right left
+
+
+def test_skip_grows_within_tolerance_and_halves_beyond():
+    skipper = FrameSkipper(max_skip=3, tolerance=0.01)
+    skips = []
+    for error in (0.005, 0.005, 0.005, 0.005, 0.05, 0.05):
+        skipper.detected(1, error)
+        skips.append(skipper.skip)
+    assert skips == [1, 2, 3, 3, 1, 0]
+
+
+def test_skipped_frames_are_predicted():
+    skipper = FrameSkipper(max_skip=2)
+    skipper.detected(1, 0.0)
+    skipper.detected(1, 0.0)
+    assert [skipper.detect_now() for _ in range(4)] == [False, False, True, True]
+    assert skipper.report()["predicted"] == 0.5
+
+
+def test_new_or_lost_hand_stops_skipping():
+    filter = LandmarkFilter()
+    skipper = FrameSkipper(max_skip=3)
+    for n in range(4):
+        skipper.detected(1, filter.update(hand(0.5), n / RATE))
+    assert skipper.skip == 3
+
+    skipper.detected(1, filter.update(hand(0.5, "Left"), 4 / RATE))
+    assert skipper.skip == 0
+    assert skipper.detect_now()
+
+    skipper.detected(1, 0.0)
+    skipper.detected(0, None)
+    assert skipper.skip == 0
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from pygac.audio.pulse import RecordingConnection
+from pygac.benchmark import replay_args
+from pygac.landmarks import HandLandmarks
+from pygac.replay import LandmarkRecorder
+
+
+class CountingClassifier(object):
+    """Wraps a classifier, remembers the size of every batch"""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.batches = []
+
+    def classify_batch(self, inputs):
+        self.batches.append(len(inputs))
+        return self.classifier.classify_batch(inputs)
+
+
+def two_hands():
+    landmarks = HandLandmarks(2)
+    landmarks.count = 2
+    landmarks.handedness[:] = ["Left", "Right"]
+    landmarks.points[:] = np.random.default_rng(0).random((2, 21, 3))
+    landmarks.world[:] = landmarks.points / 10
+    return landmarks
+
+
+def test_both_hands_get_a_hand_sign(tmp_path):
+    from pygac import GestureControl
+
+    path = str(tmp_path / "session.npz")
+    recorder = LandmarkRecorder(2)
+    recorder.add(two_hands())
+    recorder.save(path, 640, 480)
+
+    volume = RecordingConnection()
+    gc = GestureControl(replay_args(path), volume_connection=volume,
+                        handle_signals=False)
+    gc.aggregate_vision()
+    try:
+        expected = two_hands()
+        expected.project(640, 480)
+        signs, _ = gc.keypoint_classifier.classify_batch(expected.normalize())
+
+        gc.keypoint_classifier = CountingClassifier(gc.keypoint_classifier)
+        assert gc.landmark_stream.read(gc.landmarks)
+        assert gc.handle_hands(2) == 2
+    finally:
+        gc.release()
+        volume.close()
+
+    assert gc.keypoint_classifier.batches == [2]
+    assert list(gc.hand_signs) == list(signs)
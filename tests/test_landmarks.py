@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import itertools
+
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from pygac.landmarks import HandLandmarks, PointHistory, NUM_LANDMARKS
+
+WIDTH, HEIGHT = 960, 540
+IMAGE = SimpleNamespace(shape=(HEIGHT, WIDTH, 3))
+
+
+# The list-based helpers the main loop used before pygac.landmarks
+
+
+def calc_bounding_rect(image, landmarks):
+    image_width, image_height = image.shape[1], image.shape[0]
+
+    landmark_array = np.empty((0, 2), int)
+
+    for _, landmark in enumerate(landmarks.landmark):
+        landmark_x = min(int(landmark.x * image_width), image_width - 1)
+        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+
+        landmark_point = [np.array((landmark_x, landmark_y))]
+
+        landmark_array = np.append(landmark_array, landmark_point, axis=0)
+
+    x, y, w, h = cv.boundingRect(landmark_array)
+
+    return [x, y, x + w, y + h]
+
+
+def calc_landmark_list(image, landmarks):
+    image_width, image_height = image.shape[1], image.shape[0]
+
+    landmark_point = []
+
+    for _, landmark in enumerate(landmarks.landmark):
+        landmark_x = min(int(landmark.x * image_width), image_width - 1)
+        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+
+        landmark_point.append([landmark_x, landmark_y])
+
+    return landmark_point
+
+
+def pre_process_landmark(landmark_list):
+    temp_landmark_list = copy.deepcopy(landmark_list)
+
+    base_x, base_y = 0, 0
+    for index, landmark_point in enumerate(temp_landmark_list):
+        if index == 0:
+            base_x, base_y = landmark_point[0], landmark_point[1]
+
+        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
+        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
+
+    temp_landmark_list = list(
+        itertools.chain.from_iterable(temp_landmark_list))
+
+    max_value = max(list(map(abs, temp_landmark_list)))
+
+    def normalize_(n):
+        return n / max_value
+
+    temp_landmark_list = list(map(normalize_, temp_landmark_list))
+
+    return temp_landmark_list
+
+
+def pre_process_point_history(image, point_history):
+    image_width, image_height = image.shape[1], image.shape[0]
+
+    temp_point_history = copy.deepcopy(point_history)
+
+    base_x, base_y = 0, 0
+    for index, point in enumerate(temp_point_history):
+        if index == 0:
+            base_x, base_y = point[0], point[1]
+
+        temp_point_history[index][0] = (temp_point_history[index][0] -
+                                        base_x) / image_width
+        temp_point_history[index][1] = (temp_point_history[index][1] -
+                                        base_y) / image_height
+
+    temp_point_history = list(
+        itertools.chain.from_iterable(temp_point_history))
+
+    return temp_point_history
+
+
+def random_hands(rng, hands):
+    """MediaPipe-like landmark lists, float32 values as MediaPipe returns
+
+    Coordinates slightly outside the frame are included, MediaPipe
+    reports those for partly visible hands.
+    """
+    points = rng.uniform(-0.1, 1.1, size=(hands, NUM_LANDMARKS, 3)).astype(np.float32)
+    return [SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z))
+                                      for x, y, z in hand])
+            for hand in points]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_landmarks_match_the_list_helpers(seed):
+    rng = np.random.default_rng(seed)
+    hands = random_hands(rng, 2)
+
+    landmarks = HandLandmarks(max_num_hands=2)
+    assert landmarks.load(hands) == 2
+
+    pixels = landmarks.project(WIDTH, HEIGHT)
+    features = landmarks.normalize()
+    rects = landmarks.bounding_rects()
+
+    for hand, mediapipe_hand in enumerate(hands):
+        landmark_list = calc_landmark_list(IMAGE, mediapipe_hand)
+        assert pixels[hand].tolist() == landmark_list
+        np.testing.assert_allclose(features[hand], pre_process_landmark(landmark_list),
+                                   rtol=1e-6)
+        assert rects[hand].tolist() == calc_bounding_rect(IMAGE, mediapipe_hand)
+
+
+def test_fewer_hands_than_buffers():
+    hands = random_hands(np.random.default_rng(0), 1)
+    landmarks = HandLandmarks(max_num_hands=2)
+    landmarks.load(hands)
+
+    assert landmarks.process(WIDTH, HEIGHT).shape == (1, NUM_LANDMARKS * 2)
+    landmark_list = calc_landmark_list(IMAGE, hands[0])
+    np.testing.assert_allclose(landmarks.features[0], pre_process_landmark(landmark_list),
+                               rtol=1e-6)
+
+
+@pytest.mark.parametrize("appended", [1, 7, 16, 17, 40])
+def test_point_history_matches_the_list_helper(appended):
+    rng = np.random.default_rng(appended)
+    history = PointHistory(length=16)
+    points = []
+    for x, y in rng.integers(0, (WIDTH, HEIGHT), size=(appended, 2)).tolist():
+        if rng.random() < 0.2:
+            x, y = 0, 0  # Pointer gesture not shown
+        history.append(x, y)
+        points.append([x, y])
+
+    expected = pre_process_point_history(IMAGE, points[-16:])
+    features = history.feature_view(WIDTH, HEIGHT)
+    assert len(history) == min(appended, 16)
+    np.testing.assert_allclose(features, expected, rtol=1e-6, atol=1e-7)
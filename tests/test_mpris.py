@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import shutil
+import subprocess
+
+import pytest
+
+dbus = pytest.importorskip("dbus")
+pytest.importorskip("gi")
+
+from dbus.mainloop.glib import DBusGMainLoop
+
+from pygac.audio import mpris
+
+PLAYER = os.path.join(os.path.dirname(__file__), "mpris_player.py")
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def address():
+    """A private session bus"""
+    executable = shutil.which("dbus-daemon")
+    if executable is None:
+        pytest.skip("dbus-daemon is not installed")
+    daemon = subprocess.Popen([executable, "--session", "--nofork", "--print-address"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    yield daemon.stdout.readline().strip()
+    daemon.terminate()
+    daemon.wait()
+
+
+@pytest.fixture
+def start_player(address):
+    """Starts fake players, bus name org.mpris.MediaPlayer2.<name>"""
+    players = []
+
+    def start(name, status="Stopped"):
+        player = subprocess.Popen([sys.executable, PLAYER, address, name, status],
+                                  stdout=subprocess.PIPE, text=True)
+        assert player.stdout.readline().strip() == "ready"
+        players.append(player)
+        return player
+
+    yield start
+    for player in players:
+        player.terminate()
+        player.wait()
+
+
+@pytest.fixture
+def bus(address):
+    DBusGMainLoop(set_as_default=True)
+    connection = dbus.bus.BusConnection(address)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def mainloop():
+    loop = mpris.run_mainloop()
+    yield loop
+    loop.quit()
+
+
+def test_running_players_are_picked_up(bus, mainloop, start_player):
+    start_player("first", "Paused")
+    start_player("second", "Playing")
+    cache = mpris.PlayerCache(bus)
+
+    assert sorted(cache.players) == [mpris.MPRIS_PREFIX + "first",
+                                     mpris.MPRIS_PREFIX + "second"]
+    # Both replies arrive asynchronously, in any order
+    assert wait_for(lambda: cache.with_status("Playing") == [mpris.MPRIS_PREFIX + "second"]
+                    and cache.with_status("Paused") == [mpris.MPRIS_PREFIX + "first"])
+
+
+def test_status_follows_signals(bus, mainloop, start_player):
+    start_player("player")
+    name = mpris.MPRIS_PREFIX + "player"
+    cache = mpris.PlayerCache(bus)
+
+    assert cache.call(name, "Play")
+    assert wait_for(lambda: cache.with_status("Playing") == [name])
+    assert cache.call(name, "Pause")
+    assert wait_for(lambda: cache.with_status("Paused") == [name])
+    assert not cache.call(mpris.MPRIS_PREFIX + "missing", "Play")
+
+
+def test_players_come_and_go(bus, mainloop, start_player):
+    cache = mpris.PlayerCache(bus)
+    assert cache.players == []
+
+    player = start_player("late", "Playing")
+    name = mpris.MPRIS_PREFIX + "late"
+    assert wait_for(lambda: cache.with_status("Playing") == [name])
+
+    player.terminate()
+    player.wait()
+    assert wait_for(lambda: cache.players == [])
+    assert cache.with_status("Playing") == []
+
+
+def test_refresh_without_a_main_loop(bus, start_player):
+    cache = mpris.PlayerCache(bus)
+    player = start_player("polled", "Paused")
+    name = mpris.MPRIS_PREFIX + "polled"
+    assert cache.players == []  # Nobody delivers NameOwnerChanged
+
+    cache.refresh()
+    assert cache.with_status("Paused") == [name]
+
+    bus.get_object(name, mpris.MPRIS_PATH).Play(dbus_interface=mpris.PLAYER_INTERFACE)
+    cache.refresh()
+    assert cache.with_status("Playing") == [name]
+
+    player.terminate()
+    player.wait()
+    cache.refresh()
+    assert cache.players == []
+
+
+def test_paused_players_survive_a_restart(tmp_path):
+    path = str(tmp_path / "paused-players.json")
+    paused = mpris.PausedPlayers()
+    assert not paused.snapshot(path)  # Nothing changed yet
+
+    paused.replace(["org.mpris.MediaPlayer2.vlc", "org.mpris.MediaPlayer2.spotify"])
+    assert paused.snapshot(path)
+    assert not paused.snapshot(path)
+
+    restored = mpris.PausedPlayers()
+    assert restored.restore(path)
+    assert sorted(restored) == sorted(paused)
+    assert not restored.snapshot(path)
+    assert not mpris.PausedPlayers().restore(str(tmp_path / "missing.json"))
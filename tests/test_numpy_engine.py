@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+
+from pygac.model import numpy_engine
+from pygac.model.backend import resolve
+from pygac.model.numpy_engine import MODELS, NumpyInterpreter
+
+
+def tflite_interpreter():
+    try:
+        name, Interpreter, _ = resolve("auto")
+    except ImportError:
+        name = "numpy"
+    if name == "numpy":
+        pytest.skip("No TFLite interpreter installed")
+    return Interpreter
+
+
+def dataset_rows(dataset):
+    return np.loadtxt(dataset, delimiter=',', dtype=np.float32)[:, 1:]
+
+
+def compare(Interpreter, tflite_path, model_path, rows):
+    expected = numpy_engine.forward(Interpreter(model_path=tflite_path), rows)
+    result = numpy_engine.forward(NumpyInterpreter(model_path), rows)
+
+    np.testing.assert_allclose(result, expected, atol=1e-5)
+    assert (result.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_numpy_matches_tflite(tmp_path, name):
+    Interpreter = tflite_interpreter()
+    stem, dataset = MODELS[name]
+
+    model_path = str(tmp_path / (os.path.basename(stem) + ".tflite"))
+    numpy_engine.export(stem + ".tflite", numpy_engine.weights_path(model_path))
+
+    compare(Interpreter, stem + ".tflite", model_path, dataset_rows(dataset))
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_shipped_weights_match_tflite(name):
+    Interpreter = tflite_interpreter()
+    stem, dataset = MODELS[name]
+    assert os.path.exists(numpy_engine.weights_path(stem + ".tflite"))
+
+    compare(Interpreter, stem + ".tflite", stem + ".tflite", dataset_rows(dataset))
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_numpy_matches_tflite_converted_from_hdf5(tmp_path, name):
+    # The bundled point history .hdf5 and .tflite are different trainings,
+    # so the reference is converted from the same .hdf5
+    Interpreter = tflite_interpreter()
+    tf = pytest.importorskip("tensorflow")
+    from pygac.model.quantize import convert
+
+    stem, dataset = MODELS[name]
+    model_path = str(tmp_path / (os.path.basename(stem) + ".tflite"))
+    with open(model_path, "wb") as f:
+        f.write(convert(tf.keras.models.load_model(stem + ".hdf5", compile=False), "float"))
+    numpy_engine.export(stem + ".hdf5", numpy_engine.weights_path(model_path))
+
+    compare(Interpreter, model_path, model_path, dataset_rows(dataset))
+
+
+def test_quantized_tflite_is_refused(tmp_path):
+    tflite_interpreter()
+    tf = pytest.importorskip("tensorflow")
+    from pygac.model.quantize import convert
+
+    stem, dataset = MODELS["keypoint_classifier"]
+    model = tf.keras.models.load_model(stem + ".hdf5", compile=False)
+    for variant in ("float16", "int8"):
+        path = tmp_path / ("keypoint_classifier_%s.tflite" % variant)
+        path.write_bytes(convert(model, variant, dataset_rows(dataset)[:100]))
+        with pytest.raises(ValueError):
+            numpy_engine.export(str(path), str(tmp_path / "weights.npz"))
+    assert not (tmp_path / "weights.npz").exists()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+from pygac.pipeline import CoalescingBuffer, Pipeline
+
+
+def test_latest_item_per_key_wins():
+    buffer = CoalescingBuffer(4)
+    buffer.put("volume", 10)
+    buffer.put("pause", "a")
+    buffer.put("volume", 20)
+    buffer.close()
+
+    assert [buffer.get(), buffer.get(), buffer.get()] == ["a", 20, None]
+    assert buffer.coalesced == 1
+    assert buffer.dropped == 0
+
+
+def test_distinct_keys_beyond_maxlen_drop_the_oldest():
+    buffer = CoalescingBuffer(2)
+    for key in "abc":
+        buffer.put(key, key)
+    buffer.close()
+
+    assert [buffer.get(), buffer.get(), buffer.get()] == ["b", "c", None]
+    assert buffer.dropped == 1
+
+
+def test_slow_actuation_keeps_the_latest_volume():
+    release = threading.Event()
+    volumes = []
+    frames = iter(range(50))
+
+    def set_volume(percentage):
+        release.wait(5.0)  # The sound server is busy
+        volumes.append(percentage)
+
+    def infer(timestamp, frame):
+        pipeline.actuate(timestamp, set_volume, frame)
+        if frame == 49:
+            release.set()
+
+    pipeline = Pipeline(capture_depth=64, actuation_depth=4)
+    pipeline.start(lambda: next(frames, None), infer)
+    assert pipeline.stop(timeout=10.0)
+
+    assert volumes[-1] == 49
+    assert len(volumes) + pipeline.actions.coalesced == 50
+    assert pipeline.stats()["actions_dropped"] == 0
+
+
+def test_stop_reports_a_stuck_capture():
+    stuck = threading.Event()
+    done = threading.Event()
+
+    def capture():
+        stuck.set()
+        done.wait(5.0)  # A read that does not return
+        return None
+
+    pipeline = Pipeline()
+    pipeline.start(capture, lambda timestamp, frame: None)
+    assert stuck.wait(5.0)
+    assert not pipeline.stop(timeout=0.1)
+
+    done.set()
+    assert pipeline.stop(timeout=5.0)
@@ -0,0 +1,160 @@
+import time
+
+import pytest
+
+from pygac.audio import pulse
+
+
+class FakeSink(object):
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+
+
+class FakeServer(object):
+    """Stands in for a `pulsectl.Pulse`, drops its connection on demand"""
+
+    def __init__(self, volumes, sinks, broken=False):
+        self.volumes = volumes
+        self.sinks = sinks
+        self.broken = broken
+        self.closed = False
+
+    def server_info(self):
+        return type("ServerInfo", (), {"default_sink_name": self.sinks[0].name})
+
+    def get_sink_by_name(self, name):
+        return next(sink for sink in self.sinks if sink.name == name)
+
+    def sink_info(self, index):
+        return next(sink for sink in self.sinks if sink.index == index)
+
+    def volume_set_all_chans(self, sink, volume):
+        if self.broken:
+            raise ConnectionError("Disconnected")
+        self.volumes.append((sink.name, volume))
+
+    def close(self):
+        self.closed = True
+
+
+class SpanRecorder(object):
+    def __init__(self):
+        self.spans = []
+
+    def record(self, name, seconds):
+        self.spans.append((name, seconds))
+
+
+class SlowConnection(pulse.RecordingConnection):
+    def _send(self, sink, percentage):
+        time.sleep(0.05)
+        if percentage < 0:
+            raise IOError("Rejected")
+        pulse.RecordingConnection._send(self, sink, percentage)
+
+
+def test_connection_is_abstract():
+    with pytest.raises(TypeError):
+        pulse.SoundServerConnection()
+
+
+def test_requests_coalesce_per_sink():
+    connection = pulse.RecordingConnection()
+    try:
+        with connection._condition:  # Hold the writer back while requesting
+            for percentage in range(10, 60, 10):
+                connection.set_volume(percentage)
+            connection.set_volume(70, sink="1")
+        assert connection.flush(5.0)
+    finally:
+        connection.close()
+
+    assert sorted(connection.volumes) == [("1", 70), (pulse.DEFAULT_SINK, 50)]
+    assert connection.sent == 2
+    assert connection.coalesced == 4
+
+
+def test_latest_request_wins():
+    connection = pulse.RecordingConnection()
+    try:
+        for percentage in range(101):
+            connection.set_volume(percentage)
+        assert connection.flush(5.0)
+    finally:
+        connection.close()
+
+    assert connection.volumes[-1] == (pulse.DEFAULT_SINK, 100)
+    assert connection.sent + connection.coalesced == 101
+    assert connection.volumes == sorted(connection.volumes)
+
+
+def test_close_does_not_drop_pending():
+    connection = pulse.RecordingConnection()
+    connection.set_volume(30)
+    connection.close()
+    assert connection.volumes == [(pulse.DEFAULT_SINK, 30)]
+
+
+def test_native_connection_finds_sinks():
+    volumes = []
+    sinks = [FakeSink(1, "alsa_output.usb"), FakeSink(0, "alsa_output.pci")]
+    connection = pulse.NativeConnection(lambda: FakeServer(volumes, sinks))
+    try:
+        connection.set_volume(25)
+        assert connection.flush(5.0)
+        connection.set_volume(50, sink="0")
+        assert connection.flush(5.0)
+        connection.set_volume(75, sink="alsa_output.pci")
+        assert connection.flush(5.0)
+    finally:
+        connection.close()
+
+    assert volumes == [("alsa_output.usb", 0.25), ("alsa_output.pci", 0.5),
+                       ("alsa_output.pci", 0.75)]
+
+
+def test_native_connection_reconnects():
+    volumes = []
+    servers = []
+    sinks = [FakeSink(0, "alsa_output.pci")]
+
+    def connect():
+        servers.append(FakeServer(volumes, sinks, broken=not servers))
+        return servers[-1]
+
+    connection = pulse.NativeConnection(connect)
+    try:
+        connection.set_volume(40)
+        assert connection.flush(5.0)
+    finally:
+        connection.close()
+
+    assert volumes == [("alsa_output.pci", 0.4)]
+    assert len(servers) == 2
+    assert servers[0].closed and servers[1].closed
+    assert connection.sent == 1
+
+
+def test_native_connection_fails_without_server():
+    def connect():
+        raise ConnectionError("No server")
+
+    with pytest.raises(ConnectionError):
+        pulse.NativeConnection(connect)
+
+
+def test_actuation_is_timed_around_the_send():
+    recorder = SpanRecorder()
+    connection = SlowConnection()
+    connection.recorders.append(recorder)
+    try:
+        connection.set_volume(30)
+        assert connection.flush(5.0)
+        connection.set_volume(-1)  # Failed sends are not timed
+        assert connection.flush(5.0)
+    finally:
+        connection.close()
+
+    assert [name for name, _ in recorder.spans] == ["actuation"]
+    assert recorder.spans[0][1] >= 0.05
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from pygac.model.classifier import TFLiteClassifier
+from pygac.model.numpy_engine import MODELS
+from pygac.model.quantize import calibration_rows, convert, variant_path
+
+
+@pytest.fixture(scope="module", params=list(MODELS))
+def model(request):
+    """Keras model and calibration rows of one bundled classifier"""
+    stem, dataset = MODELS[request.param]
+    data = np.loadtxt(dataset, delimiter=',', dtype=np.float32)
+    keras = tf.keras.models.load_model(stem + ".hdf5", compile=False)
+    return keras, calibration_rows(data, 300)
+
+
+def write(tmp_path, model, variant, rows):
+    path = variant_path(str(tmp_path / "model"), variant)
+    with open(path, "wb") as f:
+        f.write(convert(model, variant, rows))
+    return path
+
+
+def test_int8_agrees_with_the_float_model(tmp_path, model):
+    keras, rows = model
+    expected = np.argmax(keras.predict(rows, verbose=0), axis=1)
+
+    classifier = TFLiteClassifier(write(tmp_path, keras, "int8", rows),
+                                  max_batch=len(rows))
+    assert classifier.quantized_input and classifier.quantized_output
+    indices, confidences = classifier.classify_batch(rows)
+
+    assert np.mean(indices == expected) >= 0.9
+    assert np.all((confidences >= 0.0) & (confidences <= 1.0))
+
+
+def test_dynamic_is_the_float_model(tmp_path, model):
+    # Every layer is under TFLite's 1024 element threshold for dynamic-range
+    # quantization, so the converter leaves all weights in float32
+    keras, rows = model
+    interpreter = tf.lite.Interpreter(model_path=write(tmp_path, keras, "dynamic", rows))
+    dtypes = {np.dtype(tensor["dtype"]) for tensor in interpreter.get_tensor_details()}
+    assert dtypes <= {np.dtype(np.float32), np.dtype(np.int32)}
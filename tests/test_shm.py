@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from multiprocessing import resource_tracker, shared_memory
+
+from pygac.landmarks import HandLandmarks
+from pygac.shm import LandmarkPublisher, LandmarkReader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def name():
+    name = "pygac-test-%d" % os.getpid()
+    yield name
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def hands(frame):
+    landmarks = HandLandmarks(2)
+    landmarks.count = 2
+    landmarks.handedness[:] = ["Left", "Right"]
+    landmarks.points[:] = frame
+    landmarks.world[:] = -frame
+    return landmarks
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def crash(publisher, pid):
+    """Leave the block behind as if `pid` had written it and died"""
+    publisher.header["writer_pid"] = pid
+    del publisher.header, publisher.slots
+    publisher.shm.close()
+    resource_tracker.unregister(publisher.shm._name, "shared_memory")
+
+
+def test_replaces_a_block_whose_writer_exited(name):
+    crash(LandmarkPublisher(name, slots=4), exited_pid())
+
+    publisher = LandmarkPublisher(name, slots=8)
+    try:
+        assert int(publisher.header["writer_pid"]) == os.getpid()
+        assert int(publisher.header["slots"]) == 8
+    finally:
+        publisher.close()
+
+
+def test_refuses_a_block_with_a_running_writer(name):
+    code = ("import sys\n"
+            "from pygac.shm import LandmarkPublisher\n"
+            "publisher = LandmarkPublisher(%r, slots=4)\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.read()\n"
+            "publisher.close()\n" % name)
+    writer = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        assert writer.stdout.readline().strip() == "ready"
+        with pytest.raises(FileExistsError, match="process %d" % writer.pid):
+            LandmarkPublisher(name, slots=4)
+    finally:
+        writer.communicate("", timeout=10)
+    assert writer.returncode == 0
+
+
+def test_refuses_a_block_it_does_not_know(name):
+    foreign = shared_memory.SharedMemory(name=name, create=True, size=128)
+    try:
+        with pytest.raises(FileExistsError, match="not a landmark stream"):
+            LandmarkPublisher(name, slots=4)
+        assert os.path.exists("/dev/shm/" + name)
+    finally:
+        foreign.close()
+
+
+def test_round_trip(name):
+    publisher = LandmarkPublisher(name, slots=8)
+    reader = LandmarkReader(name)
+    try:
+        assert reader.wait(timeout=0.01) == []
+        for frame in range(3):
+            publisher.publish(hands(frame), hand_signs=[frame, 1], capture_time=frame)
+        records = reader.wait(timeout=1.0)
+    finally:
+        reader.close()
+        publisher.close()
+
+    assert [int(record["frame"]) for record in records] == [0, 1, 2]
+    assert LandmarkReader.handedness(records[2]) == ["Left", "Right"]
+    assert list(records[2]["hand_sign"]) == [2, 1]
+    assert list(records[2]["finger_gesture"]) == [-1, -1]
+    np.testing.assert_array_equal(records[2]["points"], 2)
+    np.testing.assert_array_equal(records[2]["world"], -2)
+    assert reader.missed == reader.retries == 0
+
+
+def test_reader_backs_off_a_slot_being_written(name):
+    publisher = LandmarkPublisher(name, slots=4)
+    reader = LandmarkReader(name)
+    try:
+        publisher.publish(hands(1))
+        publisher.slots[0]["sequence"] += 1  # Odd, as in the middle of a write
+        assert reader.read(0, attempts=3) is None
+        assert reader.retries == 3
+
+        publisher.slots[0]["sequence"] += 1
+        assert int(reader.read(0)["frame"]) == 0
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_lapped_reader_skips_to_the_oldest_frame_left(name):
+    publisher = LandmarkPublisher(name, slots=4)
+    reader = LandmarkReader(name)
+    try:
+        for frame in range(10):
+            publisher.publish(hands(frame))
+        records = reader.poll()
+        assert int(reader.latest()["frame"]) == 9
+    finally:
+        reader.close()
+        publisher.close()
+
+    assert [int(record["frame"]) for record in records] == [6, 7, 8, 9]
+    assert reader.missed == 6
+
+
+def test_forked_reader_leaves_the_writer_registered(name):
+    # A forked reader shares the writer's resource tracker, which used
+    # to fail with a KeyError when the writer removed the block
+    code = ("import multiprocessing\n"
+            "from pygac.shm import LandmarkPublisher, LandmarkReader\n"
+            "def read(name):\n"
+            "    LandmarkReader(name).close()\n"
+            "publisher = LandmarkPublisher(%r, slots=4)\n"
+            "reader = multiprocessing.get_context('fork').Process(target=read, args=(%r,))\n"
+            "reader.start()\n"
+            "reader.join()\n"
+            "assert reader.exitcode == 0\n"
+            "publisher.close()\n" % (name, name))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, text=True,
+                            stderr=subprocess.PIPE, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert "KeyError" not in result.stderr
+    assert "leaked" not in result.stderr
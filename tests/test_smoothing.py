@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from pygac.smoothing import GestureVote, CONFIDENCE, DECAY
+
+
+def decisions(vote, gestures, confidence=1.0):
+    return [vote.update(gesture, confidence) for gesture in gestures]
+
+
+def test_window_forgets_and_decay_fades():
+    window = GestureVote(3, window=4)
+    assert decisions(window, [0] * 4 + [1] * 3) == [0] * 6 + [1]
+
+    # After four frames of 0 its score is 1.875, one frame of 1 outweighs
+    # the 0.9375 left of it
+    decay = GestureVote(3, mode=DECAY, decay=0.5)
+    assert decisions(decay, [0] * 4 + [1]) == [0] * 4 + [1]
+
+
+def test_confidence_weights_the_votes():
+    vote = GestureVote(3, window=4, mode=CONFIDENCE)
+    assert decisions(vote, [0] * 3, confidence=0.2) == [0] * 3
+    assert vote.update(1, 0.9) == 1
+
+
+def test_leader_below_enter_does_not_switch():
+    vote = GestureVote(3, window=10, enter=0.7)
+    assert decisions(vote, [0] * 10 + [1] * 6)[-1] == 0  # 1 leads with 60%
+    assert vote.update(1) == 1
+
+
+def test_current_above_exit_is_kept():
+    vote = GestureVote(3, window=10, exit=0.35)
+    assert decisions(vote, [0] * 10 + [1] * 6)[-1] == 0  # 0 still has 40%
+    assert vote.update(1) == 1
+
+
+def test_ties_keep_the_current_decision():
+    vote = GestureVote(3, window=4)
+    assert decisions(vote, [0, 0, 0, 0, 1, 1]) == [0] * 6
+    assert vote.scores[0] == vote.scores[1]
+
+    vote = GestureVote(3, mode=DECAY, decay=1.0)
+    assert decisions(vote, [0, 1]) == [0, 0]
+
+
+def test_decision_latency():
+    vote = GestureVote(3, window=4)
+    decisions(vote, [0] * 4 + [1] * 4 + [2] * 4)
+
+    # 0 is decided right away, 1 and 2 once they outnumber the previous
+    # class, on the third frame of their streak
+    assert vote.latencies == [0, 2, 2]
+    assert vote.report() == {"decisions": 3, "mean_frames": 1.33, "max_frames": 2}
+
+
+def test_unknown_mode_is_refused():
+    with pytest.raises(ValueError):
+        GestureVote(3, mode="median")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_after(statement):
+    """Heavy packages loaded by `statement` in a fresh interpreter"""
+    code = ("import sys\n%s\n"
+            "print(' '.join(name for name in ('cv2', 'numpy', 'mediapipe', 'tensorflow')"
+            " if name in sys.modules))" % statement)
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, text=True)
+    return output.split()
+
+
+def test_package_import_is_light():
+    assert imported_after("import pygac") == []
+
+
+def test_gesture_control_import_is_light():
+    assert imported_after("from pygac import GestureControl") == []
+
+
+def test_audio_extras_do_not_stop_startup(monkeypatch):
+    pytest.importorskip("dbus")
+    from pygac import GestureControl
+    from pygac.audio import linux
+    from pygac.audio.pulse import RecordingConnection
+    from pygac.benchmark import replay_args
+
+    def no_session_bus(self):
+        raise RuntimeError("org.freedesktop.DBus.Error.NotSupported")
+
+    def no_soundcards(self, *args):
+        raise IOError("No soundcards could be detected")
+
+    monkeypatch.setattr(linux.DbusHandler, "__init__", no_session_bus)
+    monkeypatch.setattr(linux.VolumeControls, "__init__", no_soundcards)
+
+    volume = RecordingConnection()
+    gc = GestureControl(replay_args(None), volume_connection=volume,
+                        handle_signals=False)
+    gc._connect_audio()
+    try:
+        gc.apply_volume(40)
+        gc.volume_actuator.close()
+        assert volume.flush(5.0)
+    finally:
+        volume.close()
+    assert volume.volumes[-1][1] == 40
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from pygac.landmarks import HandLandmarks
+from pygac.tracking import RoiTracker
+
+WIDTH, HEIGHT = 640, 480
+
+
+def frame():
+    return np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+def boxes(count):
+    return np.array([[100 + 200 * hand, 100, 180 + 200 * hand, 200]
+                     for hand in range(count)])
+
+
+def crops(tracker, hands, frames):
+    """Which of `frames` frames were cropped while `hands` stay in view"""
+    cropped = []
+    for _ in range(frames):
+        _, roi = tracker.crop(frame())
+        cropped.append(roi is not None)
+        tracker.update(boxes(hands), WIDTH, HEIGHT)
+    return cropped
+
+
+def test_full_frame_until_a_hand_is_found():
+    tracker = RoiTracker(max_num_hands=2)
+    assert tracker.crop(frame())[1] is None
+    tracker.update(None, WIDTH, HEIGHT)
+    assert tracker.crop(frame())[1] is None
+    assert tracker.full_frames == 2
+
+
+def test_looks_for_more_hands_every_refresh_frames():
+    tracker = RoiTracker(max_num_hands=2, refresh=5)
+    cropped = crops(tracker, 1, 16)
+    assert cropped == [False, True, True, True, True] * 3 + [False]
+    assert tracker.refreshes == 3
+
+
+def test_keeps_cropping_with_every_hand_tracked():
+    tracker = RoiTracker(max_num_hands=2, refresh=5)
+    assert crops(tracker, 2, 16) == [False] + [True] * 15
+    assert tracker.refreshes == 0
+
+
+def test_refresh_of_one_never_crops_below_max_hands():
+    tracker = RoiTracker(max_num_hands=2, refresh=1)
+    assert crops(tracker, 1, 5) == [False] * 5
+
+
+def test_to_full_frame_scales_depth_like_x():
+    tracker = RoiTracker()
+    landmarks = HandLandmarks(max_num_hands=1)
+    landmarks.count = 1
+    landmarks.points[0] = [0.5, 0.25, -0.2]
+
+    roi = (160, 120, 480, 360)  # Half the frame in each direction
+    tracker.to_full_frame(landmarks, roi, WIDTH, HEIGHT)
+
+    np.testing.assert_allclose(landmarks.points[0, 0], [0.5, 0.375, -0.1])
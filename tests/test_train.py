@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+
+from pygac.model.train import batches, cache_path, fit, load_dataset, split
+
+
+class FakeModel(object):
+    """Just enough of a Keras model for `fit`"""
+
+    def __init__(self, losses):
+        self.losses = iter(losses)
+        self.loss = float("nan")
+        self.weights = [np.zeros(3)]
+        self.batches = 0
+
+    def train_on_batch(self, x, y):
+        self.batches += 1
+        self.weights = [self.weights[0] + 1]
+
+    def evaluate(self, x, y, batch_size=None, verbose=0):
+        self.loss = next(self.losses, self.loss)
+        return self.loss, 0.5
+
+    def get_weights(self):
+        return list(self.weights)
+
+    def set_weights(self, weights):
+        if weights is None:
+            raise TypeError("set_weights(None)")
+        self.weights = list(weights)
+
+
+def dataset(rows=64, features=42, classes=3, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.random((rows, features + 1), dtype=np.float32)
+    data[:, 0] = rng.integers(0, classes, rows)
+    return data, split(data)
+
+
+def test_best_epoch_is_restored():
+    data, (train_rows, validation_rows) = dataset()
+    model = FakeModel([0.9, 0.5, 0.7, 0.8, 0.6])
+
+    result = fit(model, data, train_rows, validation_rows, epochs=5,
+                 batch_size=16, patience=10)
+
+    assert result["epochs"] == 5
+    np.testing.assert_array_equal(model.weights[0], 2 * model.batches / 5)
+
+
+def test_zero_epochs_keeps_the_initial_weights():
+    data, (train_rows, validation_rows) = dataset()
+    model = FakeModel([0.5])
+
+    result = fit(model, data, train_rows, validation_rows, epochs=0)
+
+    assert result["epochs"] == 0
+    assert result["epoch_ms"] == 0.0
+    assert model.batches == 0
+
+
+def test_nan_validation_loss_keeps_the_last_weights():
+    data, (train_rows, validation_rows) = dataset()
+    model = FakeModel([float("nan")] * 3)
+
+    result = fit(model, data, train_rows, validation_rows, epochs=3, patience=10)
+
+    assert result["epochs"] == 3
+    assert np.isnan(result["validation_loss"])
+    np.testing.assert_array_equal(model.weights[0], model.batches)
+
+
+def write_csv(path, data):
+    np.savetxt(path, data, delimiter=",", fmt="%g")
+
+
+def test_dataset_is_cached_and_memory_mapped(tmp_path):
+    csv = str(tmp_path / "keypoint.csv")
+    data, _ = dataset(rows=8)
+    data[:, 1:] = np.round(data[:, 1:], 3)
+    write_csv(csv, data)
+
+    assert load_dataset(csv)[2]  # Parsed
+    assert os.path.exists(cache_path(csv))
+
+    second, _, parsed = load_dataset(csv)
+    assert not parsed
+    assert isinstance(second, np.memmap)
+    assert second.dtype == np.float32 and second.flags.c_contiguous
+    np.testing.assert_allclose(second, data, rtol=1e-6)
+    with pytest.raises(ValueError):
+        second[0, 0] = 1  # Read-only
+
+    assert load_dataset(csv, rebuild=True)[2]
+
+
+def test_newer_csv_rebuilds_the_cache(tmp_path):
+    csv = str(tmp_path / "keypoint.csv")
+    write_csv(csv, np.zeros((4, 3)))
+    load_dataset(csv)
+    os.utime(cache_path(csv), (1, 1))  # Older than the CSV
+
+    write_csv(csv, np.ones((5, 3)))
+    data, _, parsed = load_dataset(csv)
+    assert parsed
+    np.testing.assert_array_equal(data, np.ones((5, 3)))
+
+
+def test_batches_split_rows_into_features_and_labels():
+    data = np.arange(40, dtype=np.float32).reshape(10, 4)
+    data[:, 0] = np.arange(10)  # Row number as the label
+
+    seen = []
+    for features, labels in batches(data, np.arange(10), 4, np.random.default_rng(0)):
+        assert len(labels) <= 4 and labels.dtype == np.int64
+        np.testing.assert_array_equal(features, data[labels, 1:])
+        seen.extend(labels)
+    assert sorted(seen) == list(range(10))